@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import String, and_, func, or_, type_coerce, insert, update, select
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 from datetime import datetime
+import base64
+import binascii
 
 from ..db.database import get_db
 from ..models import sql_models as models
+from ..core import signature_store, document_search, document_holders, document_dwell
 from .auth import get_current_user
 
 router = APIRouter()
@@ -23,13 +27,7 @@ try:
             conn.commit()
         except Exception:
             pass # Column likely exists or other error (ignored to prevent crash)
-
-        # Check and add signature_image
-        try:
-            conn.execute(text("ALTER TABLE document_logs ADD COLUMN signature_image TEXT"))
-            conn.commit()
-        except Exception:
-            pass # Column likely exists
+        # Signatures moved to the blob store: see scripts/auto_migrate.py
 except Exception as e:
     print(f"Auto-migration warning: {e}")
 
@@ -41,6 +39,7 @@ class DocumentCreate(BaseModel):
     ref_number: Optional[str] = None
     description: Optional[str] = None
     current_holder: str
+    holder_id: Optional[int] = None # Picks the holder directly (current_holder is then ignored)
     project_id: Optional[int] = None
 
 class DocumentUpdate(BaseModel):
@@ -48,6 +47,7 @@ class DocumentUpdate(BaseModel):
     ref_number: Optional[str] = None
     project_id: Optional[int] = None
     current_holder: Optional[str] = None
+    holder_id: Optional[int] = None
     status: Optional[str] = None
     description: Optional[str] = None
     signed_at: Optional[datetime] = None
@@ -55,16 +55,30 @@ class DocumentUpdate(BaseModel):
     signature_image: Optional[str] = None
     is_correction: Optional[bool] = False
 
+class DocumentBulkTransfer(BaseModel):
+    document_ids: List[int] = Field(..., min_length=1, max_length=500)
+    current_holder: Optional[str] = None
+    holder_id: Optional[int] = None
+    status: Optional[str] = None # New status for all documents (default: keep each one's)
+    note: Optional[str] = None
+
+class DocumentBulkTransferResult(BaseModel):
+    holder_id: int
+    current_holder: str
+    transferred: List[int]
+    skipped: List[int] # Already with that holder
+
 class DocumentLogResponse(BaseModel):
     id: int
     from_holder: Optional[str]
     to_holder: str
+    holder_id: Optional[int] = None
     status: str
     note: Optional[str]
     timestamp: datetime
     signed_at: Optional[datetime] = None
     signer_name: Optional[str] = None
-    signature_image: Optional[str] = None
+    signature_hash: Optional[str] = None # Image at /documents/signatures/{signature_hash}
     
     class Config:
         from_attributes = True
@@ -75,6 +89,7 @@ class DocumentResponse(BaseModel):
     ref_number: Optional[str]
     description: Optional[str]
     current_holder: str
+    holder_id: Optional[int] = None
     status: str
     project_id: Optional[int]
     created_at: datetime
@@ -84,21 +99,228 @@ class DocumentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DocumentSummary(BaseModel):
+    id: int
+    title: str
+    ref_number: Optional[str]
+    description: Optional[str]
+    current_holder: str
+    holder_id: Optional[int] = None
+    status: str
+    project_id: Optional[int]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    last_log: Optional[DocumentLogResponse] = None
+
+    class Config:
+        from_attributes = True
+
+class DocumentHandoffResponse(DocumentSummary):
+    closed_log: Optional[DocumentLogResponse] = None # Previous holder's log, closed by a hand-off
+
+class DocumentHolderResponse(BaseModel):
+    id: int
+    name: str
+    user_id: Optional[int]
+
+    class Config:
+        from_attributes = True
+
+class DocumentSearchHit(DocumentSummary):
+    snippet: Optional[str] = None # Best matching fragment, matches wrapped in <mark></mark>
+
+class DocumentPage(BaseModel):
+    items: List[DocumentSummary]
+    next_cursor: Optional[str] = None
+    status_counts: Optional[Dict[str, int]] = None # First page only
+
+# --- Helpers ---
+
+# Tracker columns a DocumentUpdate may set directly (holder fields are resolved separately)
+TRACKER_FIELDS = {"title", "ref_number", "project_id", "status", "description"}
+
+def resolve_document_holder(db: Session, name: Optional[str], holder_id: Optional[int] = None):
+    if holder_id is not None:
+        holder = db.get(models.DocumentHolder, holder_id)
+        if not holder:
+            raise HTTPException(status_code=400, detail="Holder not found")
+        return holder
+    if not name or not name.strip():
+        raise HTTPException(status_code=400, detail="Holder is required")
+    return document_holders.resolve_holder(db, name)
+
+def holder_condition(db: Session, current_user, holder=None, holder_id=None, mine=False):
+    """Filter on the current holder, or None when no holder filter was asked for."""
+    if mine:
+        holder_id = document_holders.user_holder_id(db, current_user.id) or -1
+    elif holder:
+        found = document_holders.find_holder(db, holder)
+        holder_id = found.id if found else -1 # Unknown name: nothing matches
+    if holder_id is None:
+        return None
+    return models.DocumentTracker.holder_id == holder_id
+
 # --- Endpoints ---
 
 @router.get("/", response_model=List[DocumentResponse])
 async def get_documents(
     project_id: Optional[int] = None,
     holder: Optional[str] = None,
+    holder_id: Optional[int] = None,
+    mine: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     query = db.query(models.DocumentTracker)
     if project_id:
         query = query.filter(models.DocumentTracker.project_id == project_id)
-    if holder:
-        query = query.filter(models.DocumentTracker.current_holder == holder)
-    return query.order_by(models.DocumentTracker.updated_at.desc()).all()
+    held_by = holder_condition(db, current_user, holder, holder_id, mine)
+    if held_by is not None:
+        query = query.filter(held_by)
+    return query.options(
+        selectinload(models.DocumentTracker.logs)
+    ).order_by(models.DocumentTracker.updated_at.desc()).all()
+
+# updated_at is compared as stored (SQLite text) so the cursor matches rows exactly
+_updated_text = type_coerce(models.DocumentTracker.updated_at, String)
+
+def encode_cursor(updated_at, doc_id):
+    return base64.urlsafe_b64encode(f"{updated_at}|{doc_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        updated_at, doc_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return updated_at, int(doc_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def summarize(doc, last_log, schema=DocumentSummary):
+    summary = schema.model_validate(doc)
+    summary.last_log = DocumentLogResponse.model_validate(last_log) if last_log else None
+    return summary
+
+@router.get("/list", response_model=DocumentPage)
+def list_documents(
+    project_id: Optional[int] = None,
+    holder: Optional[str] = None,
+    holder_id: Optional[int] = None,
+    mine: bool = False,
+    open_only: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Documents by most recent update, one page at a time, with only their latest log.
+    Pass next_cursor back as cursor for the following page. Full history: /documents/{id}/logs.
+    """
+    Doc = models.DocumentTracker
+    filters = []
+    if project_id:
+        filters.append(Doc.project_id == project_id)
+    held_by = holder_condition(db, current_user, holder, holder_id, mine)
+    if held_by is not None:
+        filters.append(held_by)
+    if open_only:
+        filters.append(Doc.status != "completed")
+
+    query = db.query(Doc, models.DocumentLog, _updated_text).outerjoin(
+        models.DocumentLog, models.DocumentLog.id == Doc.last_log_id
+    ).filter(*filters)
+    if cursor:
+        after_updated, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            _updated_text < after_updated,
+            and_(_updated_text == after_updated, Doc.id < after_id)
+        ))
+    rows = query.order_by(Doc.updated_at.desc(), Doc.id.desc()).limit(limit + 1).all()
+
+    items = [summarize(doc, last_log) for doc, last_log, _ in rows[:limit]]
+
+    page = DocumentPage(items=items)
+    if len(rows) > limit:
+        last_doc, _, last_updated = rows[limit - 1]
+        page.next_cursor = encode_cursor(last_updated, last_doc.id)
+    if not cursor:
+        page.status_counts = dict(
+            db.query(Doc.status, func.count(Doc.id)).filter(*filters).group_by(Doc.status).all()
+        )
+    return page
+
+@router.get("/search", response_model=List[DocumentSearchHit])
+def search_documents(
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Full-text search over titles, reference numbers, descriptions, holders and log notes, best match first."""
+    matches = document_search.search(db, q, project_id=project_id, limit=limit)
+    if not matches:
+        return []
+    rows = db.query(models.DocumentTracker, models.DocumentLog).outerjoin(
+        models.DocumentLog, models.DocumentLog.id == models.DocumentTracker.last_log_id
+    ).filter(models.DocumentTracker.id.in_([doc_id for doc_id, _ in matches])).all()
+    by_id = {doc.id: (doc, last_log) for doc, last_log in rows}
+
+    hits = []
+    for doc_id, snippet in matches:
+        if doc_id in by_id:
+            hit = summarize(*by_id[doc_id], schema=DocumentSearchHit)
+            hit.snippet = snippet
+            hits.append(hit)
+    return hits
+
+@router.get("/holders", response_model=List[DocumentHolderResponse])
+def get_document_holders(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Known holders (users and offices), for holder pickers."""
+    return db.query(models.DocumentHolder).order_by(models.DocumentHolder.name).all()
+
+@router.get("/analytics/dwell")
+def get_dwell_analytics(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    How long documents stay with each holder: median and p90 of finished stays per holder
+    (slowest first) and per month of arrival, plus documents currently waiting per holder.
+    """
+    return document_dwell.dwell_report(db)
+
+@router.get("/{doc_id}/logs", response_model=List[DocumentLogResponse])
+def get_document_logs(
+    doc_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Movement history of a document, oldest first."""
+    exists = db.query(models.DocumentTracker.id).filter(models.DocumentTracker.id == doc_id).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return db.query(models.DocumentLog).filter(
+        models.DocumentLog.document_id == doc_id
+    ).order_by(models.DocumentLog.id).all()
+
+@router.get("/signatures/{signature_hash}")
+async def get_signature(signature_hash: str):
+    """
+    Signature image by content hash. No bearer token: <img> tags load it directly, and
+    the hash is only known to clients that can read the document logs. A hash always
+    names the same bytes, so the response is cacheable forever.
+    """
+    blob = signature_store.read(signature_hash)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Signature not found")
+    data, media_type = blob
+    return Response(content=data, media_type=media_type, headers={
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{signature_hash}"'
+    })
 
 @router.post("/", response_model=DocumentResponse)
 async def create_document(
@@ -112,6 +334,9 @@ async def create_document(
     doc_data = doc.dict()
     if not doc_data.get("ref_number"):
         doc_data["ref_number"] = None
+    holder = resolve_document_holder(db, doc.current_holder, doc.holder_id)
+    doc_data["current_holder"] = holder.name
+    doc_data["holder_id"] = holder.id
         
     db_doc = models.DocumentTracker(**doc_data)
     # Explicitly set status if not provided (should be handled by default, but being safe)
@@ -131,11 +356,14 @@ async def create_document(
         document_id=db_doc.id,
         from_holder=None,
         to_holder=db_doc.current_holder,
+        holder_id=db_doc.holder_id,
         status=db_doc.status,
         note="Physical tracking started."
     )
     db.add(first_log)
     try:
+        db.flush()
+        db_doc.last_log_id = first_log.id
         db.commit()
         db.refresh(db_doc)
     except Exception as e:
@@ -144,58 +372,75 @@ async def create_document(
     
     return db_doc
 
-@router.put("/{doc_id}", response_model=DocumentResponse)
+@router.put("/{doc_id}", response_model=DocumentHandoffResponse)
 async def update_document(
     doc_id: int,
     doc_update: DocumentUpdate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    db_doc = db.query(models.DocumentTracker).filter(models.DocumentTracker.id == doc_id).first()
-    if not db_doc:
+    """
+    Edit, sign, hand off or reroute a document. The tracker and its latest log are read
+    in one query through last_log_id; the response holds the tracker, its latest log and,
+    on a hand-off, the log that was closed.
+    """
+    row = db.query(models.DocumentTracker, models.DocumentLog).outerjoin(
+        models.DocumentLog, models.DocumentLog.id == models.DocumentTracker.last_log_id
+    ).filter(models.DocumentTracker.id == doc_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Document not found")
-        
-    old_holder = db_doc.current_holder
-    old_status = db_doc.status
-    
-    update_data = doc_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_doc, key, value)
-        
+    db_doc, latest_log = row
+
+    signature_hash = None
+    if doc_update.signature_image:
+        try:
+            signature_hash = signature_store.store_signature(doc_update.signature_image)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    changes = doc_update.dict(exclude_unset=True, include=TRACKER_FIELDS)
+    same_holder = True
+    if doc_update.current_holder or doc_update.holder_id is not None:
+        holder = resolve_document_holder(db, doc_update.current_holder, doc_update.holder_id)
+        # Same holder whatever the spelling; documents from before holders existed compare by name
+        same_holder = holder.id == db_doc.holder_id if db_doc.holder_id else holder.name == db_doc.current_holder
+        changes["current_holder"] = holder.name
+        changes["holder_id"] = holder.id
+    doc_status = changes.get("status", db_doc.status)
+    holder_name = changes.get("current_holder", db_doc.current_holder)
+    holder_id = changes.get("holder_id", db_doc.holder_id)
+    closed_log = None
+
     # --- Advanced Logging Logic (Sequential Tracking) ---
-    
-    # Get the latest log entry for this document
-    latest_log = db.query(models.DocumentLog).filter(
-        models.DocumentLog.document_id == doc_id
-    ).order_by(models.DocumentLog.id.desc()).first()
 
-    if old_holder == db_doc.current_holder:
+    if same_holder:
         # UPDATING CURRENT HOLDER (Sign or Note update)
         if latest_log:
-            if db_doc.status in ["signed", "completed"] and not latest_log.signed_at:
+            if doc_status in ["signed", "completed"] and not latest_log.signed_at:
                 latest_log.signed_at = datetime.now()
             
-            latest_log.status = db_doc.status
+            latest_log.status = doc_status
             if doc_update.description:
                 latest_log.note = doc_update.description
             
             # Update signature info if provided
             if doc_update.signer_name:
                 latest_log.signer_name = doc_update.signer_name
-            if doc_update.signature_image:
-                latest_log.signature_image = doc_update.signature_image
+            if signature_hash:
+                latest_log.signature_hash = signature_hash
                 if not latest_log.signed_at:
                     latest_log.signed_at = datetime.now()
     else:
         # TRANSFERRING TO NEW HOLDER (Handoff or Reroute)
         if doc_update.is_correction and latest_log:
             # REROUTE: Update the current slot in history instead of creating new one
-            latest_log.to_holder = db_doc.current_holder
-            latest_log.status = db_doc.status
+            latest_log.to_holder = holder_name
+            latest_log.holder_id = holder_id
+            latest_log.status = doc_status
             if doc_update.description:
                 latest_log.note = doc_update.description
             elif latest_log.note and (latest_log.note.startswith("Transferred to") or latest_log.note == ""):
-                latest_log.note = f"Transferred to {db_doc.current_holder}"
+                latest_log.note = f"Transferred to {holder_name}"
         else:
             # NORMAL TRANSFER: Close previous person and create new record
             if latest_log:
@@ -203,24 +448,103 @@ async def update_document(
                 if not latest_log.signed_at:
                     latest_log.signed_at = datetime.now()
                 latest_log.status = "signed"
+                closed_log = latest_log
 
             # Create new log for the next person
-            new_log = models.DocumentLog(
+            latest_log = models.DocumentLog(
                 document_id=db_doc.id,
-                from_holder=latest_log.to_holder if latest_log else None,
-                to_holder=db_doc.current_holder,
-                status=db_doc.status,
-                note=doc_update.description if doc_update.description else f"Transferred to {db_doc.current_holder}",
+                from_holder=closed_log.to_holder if closed_log else None,
+                to_holder=holder_name,
+                holder_id=holder_id,
+                status=doc_status,
+                note=doc_update.description if doc_update.description else f"Transferred to {holder_name}",
 
-                signed_at=datetime.now() if doc_update.signature_image else None,
+                signed_at=datetime.now() if signature_hash else None,
                 signer_name=doc_update.signer_name,
-                signature_image=doc_update.signature_image
+                signature_hash=signature_hash
             )
-            db.add(new_log)
+            db.add(latest_log)
+            db.flush() # Log writes first, so the tracker (with the new pointer) is a single UPDATE
+            changes["last_log_id"] = latest_log.id
 
+    for key, value in changes.items():
+        setattr(db_doc, key, value)
+    db.flush()
+    # Serialized before commit: server defaults come back with the writes (eager_defaults)
+    response = summarize(db_doc, latest_log, schema=DocumentHandoffResponse)
+    response.closed_log = DocumentLogResponse.model_validate(closed_log) if closed_log else None
     db.commit()
-    db.refresh(db_doc)
-    return db_doc
+    return response
+
+@router.post("/transfer", response_model=DocumentBulkTransferResult)
+def bulk_transfer_documents(
+    transfer: DocumentBulkTransfer,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Hand a stack of documents to one holder in a single transaction: close every current
+    log, insert all new logs and move the trackers with one statement each.
+    Documents already with the holder are skipped.
+    """
+    Doc = models.DocumentTracker.__table__
+    Log = models.DocumentLog.__table__
+    doc_ids = list(dict.fromkeys(transfer.document_ids))
+    holder = resolve_document_holder(db, transfer.current_holder, transfer.holder_id)
+
+    rows = db.execute(
+        select(Doc.c.id, Doc.c.status, Doc.c.holder_id, Log.c.id, Log.c.to_holder).select_from(
+            Doc.outerjoin(Log, Log.c.id == Doc.c.last_log_id)
+        ).where(Doc.c.id.in_(doc_ids))
+    ).all()
+    found = {row[0] for row in rows}
+    missing = [doc_id for doc_id in doc_ids if doc_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Documents not found: {', '.join(map(str, missing))}")
+
+    moving = [row for row in rows if row[2] != holder.id]
+    skipped = [row[0] for row in rows if row[2] == holder.id]
+    if not moving:
+        return DocumentBulkTransferResult(
+            holder_id=holder.id, current_holder=holder.name, transferred=[], skipped=skipped
+        )
+
+    now = datetime.now()
+    note = transfer.note or f"Transferred to {holder.name}"
+    # Close the previous holders' logs (auto-signed, as in a single hand-off)
+    closing = [log_id for _, _, _, log_id, _ in moving if log_id is not None]
+    if closing:
+        db.execute(
+            update(Log).where(Log.c.id.in_(closing)).values(
+                status="signed", signed_at=func.coalesce(Log.c.signed_at, now)
+            )
+        )
+    db.execute(insert(Log), [
+        {
+            "document_id": doc_id,
+            "from_holder": from_holder,
+            "to_holder": holder.name,
+            "holder_id": holder.id,
+            "status": transfer.status or doc_status,
+            "note": note
+        }
+        for doc_id, doc_status, _, _, from_holder in moving
+    ])
+    moved_ids = [row[0] for row in moving]
+    tracker_values = {
+        "current_holder": holder.name,
+        "holder_id": holder.id,
+        "last_log_id": select(func.max(Log.c.id)).where(Log.c.document_id == Doc.c.id).scalar_subquery(),
+        "updated_at": func.now()
+    }
+    if transfer.status:
+        tracker_values["status"] = transfer.status
+    db.execute(update(Doc).where(Doc.c.id.in_(moved_ids)).values(**tracker_values))
+    result = DocumentBulkTransferResult(
+        holder_id=holder.id, current_holder=holder.name, transferred=moved_ids, skipped=skipped
+    )
+    db.commit()
+    return result
 
 @router.delete("/{doc_id}")
 async def delete_document(
@@ -237,4 +561,5 @@ async def delete_document(
         
     db.delete(db_doc)
     db.commit()
+    document_dwell.invalidate()
     return {"message": "Document deleted successfully"}
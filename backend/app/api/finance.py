@@ -6,7 +6,10 @@ from datetime import datetime
 
 from ..db.database import get_db
 from ..models import sql_models as models
+from ..core import jobs
+from ..schemas import job as job_schemas
 from .auth import get_current_user
+from .jobs import job_read
 
 router = APIRouter()
 
@@ -418,6 +421,34 @@ async def update_budget_request(
     db.commit()
     return req
 
+def recalculate_budgets(db: Session):
+    """Rebuild category budgets from approved requests. Does not commit."""
+    # Zero out all category budgets first
+    db.query(models.DepartmentBudget).update({"amount": 0.0})
+    
+    # Get all approved requests
+    approved_requests = db.query(models.BudgetRequest).filter(
+        models.BudgetRequest.status == models.RequestStatus.APPROVED
+    ).all()
+    
+    for req in approved_requests:
+        cat_budget = db.query(models.DepartmentBudget).filter(
+            models.DepartmentBudget.department_id == req.department_id,
+            models.DepartmentBudget.category == req.category
+        ).first()
+        
+        if cat_budget:
+            cat_budget.amount += req.amount
+        else:
+            new_cat = models.DepartmentBudget(
+                department_id=req.department_id,
+                category=req.category,
+                amount=req.amount
+            )
+            db.add(new_cat)
+            db.flush() # Later requests of the same category must find it
+    return len(approved_requests)
+
 @router.post("/recalculate-budgets")
 async def recalculate_all_budgets(
     current_user: models.User = Depends(get_current_user),
@@ -427,32 +458,25 @@ async def recalculate_all_budgets(
         raise HTTPException(status_code=403, detail="Not authorized")
         
     try:
-        # Zero out all category budgets first
-        db.query(models.DepartmentBudget).update({"amount": 0.0})
-        
-        # Get all approved requests
-        approved_requests = db.query(models.BudgetRequest).filter(
-            models.BudgetRequest.status == models.RequestStatus.APPROVED
-        ).all()
-        
-        for req in approved_requests:
-            cat_budget = db.query(models.DepartmentBudget).filter(
-                models.DepartmentBudget.department_id == req.department_id,
-                models.DepartmentBudget.category == req.category
-            ).first()
-            
-            if cat_budget:
-                cat_budget.amount += req.amount
-            else:
-                new_cat = models.DepartmentBudget(
-                    department_id=req.department_id,
-                    category=req.category,
-                    amount=req.amount
-                )
-                db.add(new_cat)
-        
+        recalculate_budgets(db)
         db.commit()
         return {"message": "Budgets successfully recalculated based on ledger entries"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+
+@jobs.handler("recalculate_budgets")
+def run_recalculate_budgets_job(db, ctx):
+    ctx.report(10, "Recalculating category budgets")
+    requests_applied = recalculate_budgets(db)
+    return {"message": "Budgets successfully recalculated based on ledger entries", "requests_applied": requests_applied}
+
+@router.post("/recalculate-budgets/jobs", response_model=job_schemas.JobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_recalculate_budgets_job(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a budget recalculation; poll GET /jobs/{id} for the outcome."""
+    if current_user.role not in [models.UserRole.ADMIN, models.UserRole.HOD]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return job_read(jobs.submit(db, "recalculate_budgets", {}, current_user.id))
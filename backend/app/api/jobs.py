@@ -0,0 +1,62 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from ..db.database import get_db
+from ..models import sql_models
+from ..schemas import job as job_schemas
+from ..core import jobs
+from .auth import get_current_user
+
+router = APIRouter()
+
+# Job params clients may see; the rest (e.g. server-side spool paths) stays internal
+PUBLIC_PARAMS = {"project_id", "mode", "format", "filename", "since_job"}
+
+def job_read(job):
+    """Job row as JobRead, with live progress while it runs and a download link for file results."""
+    read = job_schemas.JobRead.model_validate(job)
+    read.params = {key: value for key, value in (job.params or {}).items() if key in PUBLIC_PARAMS}
+    read.progress, read.message = jobs.live_progress(job)
+    if job.status == sql_models.JobStatus.SUCCEEDED and job.result_path:
+        read.download_url = f"/jobs/{job.id}/download"
+    return read
+
+def get_visible_job(job_id, db, current_user):
+    job = db.query(sql_models.Job).filter(sql_models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.created_by_id not in (None, current_user.id) and current_user.role not in [sql_models.UserRole.ADMIN, sql_models.UserRole.HOD]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return job
+
+@router.get("/", response_model=List[job_schemas.JobRead])
+def list_jobs(
+    kind: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: sql_models.User = Depends(get_current_user)
+):
+    query = db.query(sql_models.Job)
+    if current_user.role not in [sql_models.UserRole.ADMIN, sql_models.UserRole.HOD]:
+        query = query.filter(sql_models.Job.created_by_id == current_user.id)
+    if kind:
+        query = query.filter(sql_models.Job.kind == kind)
+    if status:
+        query = query.filter(sql_models.Job.status == status)
+    return [job_read(job) for job in query.order_by(sql_models.Job.id.desc()).limit(limit).all()]
+
+@router.get("/{job_id}", response_model=job_schemas.JobRead)
+def get_job(job_id: int, db: Session = Depends(get_db), current_user: sql_models.User = Depends(get_current_user)):
+    """Poll a job: status, progress and, once finished, its result or error."""
+    return job_read(get_visible_job(job_id, db, current_user))
+
+@router.get("/{job_id}/download")
+def download_job_result(job_id: int, db: Session = Depends(get_db), current_user: sql_models.User = Depends(get_current_user)):
+    job = get_visible_job(job_id, db, current_user)
+    if job.status != sql_models.JobStatus.SUCCEEDED or not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=404, detail="Job has no downloadable result")
+    filename = (job.result or {}).get("filename") or os.path.basename(job.result_path)
+    return FileResponse(job.result_path, filename=filename)
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import extract, and_, or_
+from typing import Optional
 from datetime import datetime, timedelta, timezone
 from app.db.database import get_db
 from app.models import sql_models
 from app.api.projects import calculate_task_overdue
+from app.api.auth import get_current_user
+from app.api.jobs import job_read
+from app.core import jobs, analytics_export
+from app.schemas import job as job_schemas
 
 router = APIRouter()
 
@@ -115,3 +120,50 @@ def get_portfolio_dashboard(db: Session = Depends(get_db)):
         })
         
     return dashboard_data
+
+# --- Analytics export ---
+
+@jobs.handler("analytics_export")
+def run_analytics_export_job(db, ctx):
+    file_format = ctx.params.get("format", "parquet")
+    manifest = analytics_export.export_portfolio(
+        db, ctx.output_path(".zip"), file_format, since=ctx.params.get("since"), report=ctx.report
+    )
+    kind = "incremental" if manifest["incremental"] else "full"
+    return {
+        "filename": f"portfolio_{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file_format}.zip",
+        "incremental": manifest["incremental"],
+        "watermarks": manifest["watermarks"],
+        "datasets": manifest["datasets"]
+    }
+
+@router.post("/portfolio/analytics-export/jobs", tags=["Portfolio"], response_model=job_schemas.JobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_analytics_export(
+    file_format: str = Query("parquet", alias="format", pattern="^(parquet|arrow)$"),
+    since_job: Optional[int] = Query(None, description="Previous analytics export job; only changes after it are exported"),
+    db: Session = Depends(get_db),
+    current_user: sql_models.User = Depends(get_current_user)
+):
+    """
+    Queue a columnar dump of projects, WBS, tasks, payments, expenses, budget requests and
+    document logs (zip of one file per dataset plus manifest.json, from GET /jobs/{id}/download).
+    """
+    if current_user.role not in [sql_models.UserRole.ADMIN, sql_models.UserRole.HOD, sql_models.UserRole.FINANCE]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not analytics_export.available():
+        raise HTTPException(status_code=501, detail="Analytics export requires the pyarrow package")
+
+    since = None
+    if since_job is not None:
+        previous = db.query(sql_models.Job).filter(
+            sql_models.Job.id == since_job,
+            sql_models.Job.kind == "analytics_export",
+            sql_models.Job.status == sql_models.JobStatus.SUCCEEDED
+        ).first()
+        if not previous:
+            raise HTTPException(status_code=400, detail="since_job must be a finished analytics export")
+        since = previous.result["watermarks"]
+
+    job = jobs.submit(db, "analytics_export", {"format": file_format, "since_job": since_job, "since": since}, current_user.id)
+    return job_read(job)
+
@@ -1,21 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from app.db.database import get_db
+from app.db.database import get_db, SessionLocal
 from app.models import sql_models
 from app.schemas import project_schemas
-from app.core import security
+from app.core import security, scheduling, rollups, change_feed, task_import, task_export, jobs, wbs_templates
+from app.core.task_tree import task_subtree_cte
+from app.schemas import job as job_schemas
+from app.api.auth import get_current_user
+from app.api.jobs import job_read
 from datetime import datetime, timezone
 import pandas as pd
 import io
+import os
+from zipfile import BadZipFile
+from openpyxl.utils.exceptions import InvalidFileException
 
 router = APIRouter()
 
 # --- Projects ---
 
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, update, delete, select, bindparam, cast, case, Integer
 
 def calculate_task_overdue(t, now):
     """Utility to calculate if a task is overdue based on start or due dates."""
@@ -35,6 +43,55 @@ def calculate_task_overdue(t, now):
                 is_overdue = True
     return is_overdue
 
+def find_parent_cycle(parent_of):
+    """Return a task id that lies on a parent cycle in {task_id: parent_id}, or None if it is a valid tree."""
+    state = {} # id -> 1 while on the current path, 2 once proven acyclic
+    for start in parent_of:
+        path = []
+        node = start
+        while node is not None and node not in state:
+            state[node] = 1
+            path.append(node)
+            node = parent_of.get(node)
+        if node is not None and state[node] == 1:
+            return node
+        for n in path:
+            state[n] = 2
+    return None
+
+def delete_task_subtrees(db: Session, root_ids):
+    """Delete tasks and every descendant in one statement. Returns the number of rows removed."""
+    tasks_table = sql_models.Task.__table__
+    subtree = task_subtree_cte(root_ids)
+    result = db.execute(delete(tasks_table).where(tasks_table.c.id.in_(select(subtree.c.id))))
+    return result.rowcount
+
+# Task columns that feed the critical-path schedule
+SCHEDULE_FIELDS = {"planned_start", "planned_end", "due_date"}
+# Task columns that feed the stored progress rollups (leaf status and planned-duration weights)
+ROLLUP_FIELDS = {"status", "parent_id", "planned_start", "planned_end"}
+
+def project_ids_for_tasks(db: Session, task_ids):
+    return [row[0] for row in db.query(sql_models.WBS.project_id).join(
+        sql_models.Task, sql_models.Task.wbs_id == sql_models.WBS.id
+    ).filter(sql_models.Task.id.in_(task_ids)).distinct().all()]
+
+def load_schedule_inputs(db: Session, project_id: int):
+    """Task date rows and dependency edges of a project, as plain tuples for the scheduling engine."""
+    tasks = db.query(
+        sql_models.Task.id, sql_models.Task.planned_start, sql_models.Task.planned_end, sql_models.Task.due_date
+    ).join(sql_models.WBS, sql_models.Task.wbs_id == sql_models.WBS.id).filter(
+        sql_models.WBS.project_id == project_id
+    ).all()
+    dependencies = db.query(
+        sql_models.TaskDependency.predecessor_id, sql_models.TaskDependency.successor_id, sql_models.TaskDependency.lag_days
+    ).join(
+        sql_models.Task, sql_models.TaskDependency.successor_id == sql_models.Task.id
+    ).join(sql_models.WBS, sql_models.Task.wbs_id == sql_models.WBS.id).filter(
+        sql_models.WBS.project_id == project_id
+    ).all()
+    return tasks, dependencies
+
 @router.get("/projects", tags=["Projects"], response_model=List[project_schemas.ProjectRead])
 def get_projects(owner_id: Optional[int] = None, db: Session = Depends(get_db)):
     query = db.query(sql_models.Project).options(
@@ -199,20 +256,133 @@ def get_project_wbs(project_id: int, db: Session = Depends(get_db)):
             
     return wbs_items
 
+@router.get("/projects/{project_id}/wbs/tree", tags=["WBS"], response_model=List[project_schemas.WBSTreeNode])
+def get_project_wbs_tree(project_id: int, max_depth: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Nested WBS -> task tree for a project, built from two flat queries.
+    Every node carries a rolled-up progress (completed leaf tasks / leaf tasks).
+    max_depth limits nesting below the top-level phases (0 = top-level phases only);
+    progress always reflects the full subtree.
+    """
+    phases = db.query(
+        sql_models.WBS.id, sql_models.WBS.parent_id, sql_models.WBS.name
+    ).filter(sql_models.WBS.project_id == project_id).order_by(sql_models.WBS.id).all()
+
+    tasks = db.query(
+        sql_models.Task.id, sql_models.Task.wbs_id, sql_models.Task.parent_id, sql_models.Task.name,
+        sql_models.Task.status, sql_models.Task.assignee_id, sql_models.Task.planned_start,
+        sql_models.Task.planned_end, sql_models.Task.due_date, sql_models.Task.position
+    ).join(sql_models.WBS, sql_models.Task.wbs_id == sql_models.WBS.id).filter(
+        sql_models.WBS.project_id == project_id
+    ).order_by(sql_models.Task.position, sql_models.Task.id).all()
+
+    now = datetime.now(timezone.utc)
+
+    # 1. Index nodes by id
+    phase_nodes = {}
+    for ph in phases:
+        phase_nodes[ph.id] = {
+            "id": ph.id, "project_id": project_id, "parent_id": ph.parent_id, "name": ph.name or "",
+            "children": [], "tasks": [], "leaves": 0, "done": 0
+        }
+    task_nodes = {}
+    for t in tasks:
+        task_nodes[t.id] = {
+            "id": t.id, "wbs_id": t.wbs_id, "parent_id": t.parent_id, "name": t.name,
+            "status": t.status, "assignee_id": t.assignee_id, "planned_start": t.planned_start,
+            "planned_end": t.planned_end, "due_date": t.due_date, "position": t.position or 0,
+            "is_overdue": calculate_task_overdue(t, now), "children": [], "leaves": 0, "done": 0
+        }
+
+    # 2. Link children to parents
+    roots = []
+    for node in phase_nodes.values():
+        parent = phase_nodes.get(node["parent_id"])
+        (parent["children"] if parent else roots).append(node)
+    for node in task_nodes.values():
+        parent = task_nodes.get(node["parent_id"])
+        if parent:
+            parent["children"].append(node)
+        elif node["wbs_id"] in phase_nodes:
+            phase_nodes[node["wbs_id"]]["tasks"].append(node)
+
+    # 3. Roll up leaf counts bottom-up (iterative post-order)
+    order = []
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node["children"])
+        stack.extend(node.get("tasks", []))
+    for node in reversed(order):
+        is_task = "tasks" not in node
+        if is_task and not node["children"]:
+            node["leaves"] = 1
+            node["done"] = 1 if str(node["status"]).lower() == "completed" else 0
+        for child in node["children"] + node.get("tasks", []):
+            node["leaves"] += child["leaves"]
+            node["done"] += child["done"]
+        node["progress"] = (node["done"] / node["leaves"]) * 100 if node["leaves"] else 0.0
+
+    # 4. Apply depth limit
+    if max_depth is not None:
+        stack = [(node, 0) for node in roots]
+        while stack:
+            node, depth = stack.pop()
+            nested = node["children"] + node.get("tasks", [])
+            if depth >= max_depth:
+                node["truncated"] = bool(nested)
+                node["children"] = []
+                if "tasks" in node:
+                    node["tasks"] = []
+            else:
+                stack.extend((child, depth + 1) for child in nested)
+
+    return roots
+
+@router.get("/projects/{project_id}/progress", tags=["WBS"], response_model=project_schemas.ProjectProgressRead)
+def get_project_progress(project_id: int, db: Session = Depends(get_db)):
+    """Stored per-phase and project progress rollups (unweighted and duration-weighted)."""
+    project = db.query(
+        sql_models.Project.weighted_progress, sql_models.Project.progress_updated_at
+    ).filter(sql_models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    phases = db.query(
+        sql_models.WBS.id, sql_models.WBS.parent_id, sql_models.WBS.name,
+        sql_models.WBS.progress, sql_models.WBS.weighted_progress
+    ).filter(sql_models.WBS.project_id == project_id).order_by(sql_models.WBS.id).all()
+    return {
+        "project_id": project_id,
+        "weighted_progress": project.weighted_progress,
+        "progress_updated_at": project.progress_updated_at,
+        "phases": phases
+    }
+
+@router.post("/projects/{project_id}/progress/recalculate", tags=["WBS"], response_model=project_schemas.ProjectProgressRead)
+def recalculate_project_progress(project_id: int, db: Session = Depends(get_db)):
+    exists = db.query(sql_models.Project.id).filter(sql_models.Project.id == project_id).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Project not found")
+    rollups.refresh_project_rollups(db, project_id)
+    db.commit()
+    return get_project_progress(project_id, db)
+
 @router.post("/projects/{project_id}/wbs", tags=["WBS"])
-def create_wbs_phase(project_id: int, wbs: project_schemas.WBSCreate, db: Session = Depends(get_db)):
+def create_wbs_phase(project_id: int, wbs: project_schemas.WBSCreate, response: Response, db: Session = Depends(get_db)):
     new_wbs = sql_models.WBS(
         project_id=project_id,
         name=wbs.name,
         parent_id=wbs.parent_id
     )
     db.add(new_wbs)
-    db.commit()
+    change_feed.commit_and_stamp(response, db)
     db.refresh(new_wbs)
     return new_wbs
 
 @router.post("/projects/{project_id}/tasks", tags=["WBS"], response_model=project_schemas.TaskRead)
-def create_task(project_id: int, task: project_schemas.TaskCreate, db: Session = Depends(get_db)):
+def create_task(project_id: int, task: project_schemas.TaskCreate, response: Response, db: Session = Depends(get_db)):
     # Verify WBS belongs to project
     wbs = db.query(sql_models.WBS).filter(sql_models.WBS.id == task.wbs_id, sql_models.WBS.project_id == project_id).first()
     if not wbs:
@@ -238,12 +408,14 @@ def create_task(project_id: int, task: project_schemas.TaskCreate, db: Session =
         position=new_pos
     )
     db.add(new_task)
-    db.commit()
+    rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
     db.refresh(new_task)
+    scheduling.invalidate_project_schedule(project_id)
     return new_task
 
 @router.put("/tasks/{task_id}/move", tags=["WBS"])
-def move_task(task_id: int, move: project_schemas.TaskMove, db: Session = Depends(get_db)):
+def move_task(task_id: int, move: project_schemas.TaskMove, response: Response, db: Session = Depends(get_db)):
     task = db.query(sql_models.Task).filter(sql_models.Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -257,7 +429,6 @@ def move_task(task_id: int, move: project_schemas.TaskMove, db: Session = Depend
         
         if prev_task:
             task.position, prev_task.position = prev_task.position, task.position
-            db.commit()
             
     elif move.direction == project_schemas.MoveDirection.DOWN:
         next_task = db.query(sql_models.Task).filter(
@@ -268,7 +439,6 @@ def move_task(task_id: int, move: project_schemas.TaskMove, db: Session = Depend
         
         if next_task:
             task.position, next_task.position = next_task.position, task.position
-            db.commit()
 
     elif move.direction == project_schemas.MoveDirection.INDENT:
         prev_task = db.query(sql_models.Task).filter(
@@ -284,7 +454,6 @@ def move_task(task_id: int, move: project_schemas.TaskMove, db: Session = Depend
                 sql_models.Task.parent_id == prev_task.id
             ).scalar()
             task.position = (max_pos + 1) if max_pos is not None else 0
-            db.commit()
             
     elif move.direction == project_schemas.MoveDirection.OUTDENT:
         if task.parent_id:
@@ -305,44 +474,156 @@ def move_task(task_id: int, move: project_schemas.TaskMove, db: Session = Depend
                 # Update task
                 task.parent_id = current_parent.parent_id
                 task.position = new_pos
-                db.commit()
+
+    if move.direction in (project_schemas.MoveDirection.INDENT, project_schemas.MoveDirection.OUTDENT):
+        # Leaf/parent roles may have changed
+        rollups.refresh_project_rollups(db, task.wbs_item.project_id)
     
+    change_feed.commit_and_stamp(response, db)
     return {"message": "Task moved"}
 
+@router.put("/wbs/{wbs_id}/tasks/reorder", tags=["WBS"])
+def reorder_phase_tasks(wbs_id: int, layout: project_schemas.TaskReorder, response: Response, db: Session = Depends(get_db)):
+    """Apply a (parent_id, position) layout to many tasks of a phase in one transaction."""
+    if not layout.items:
+        return {"message": "No tasks to reorder", "updated": 0}
+
+    # Current hierarchy of the phase (ids only, no ORM objects)
+    parent_of = dict(
+        db.query(sql_models.Task.id, sql_models.Task.parent_id).filter(sql_models.Task.wbs_id == wbs_id).all()
+    )
+
+    seen = set()
+    for item in layout.items:
+        if item.id in seen:
+            raise HTTPException(status_code=400, detail=f"Task {item.id} appears more than once in the layout")
+        seen.add(item.id)
+        if item.id not in parent_of:
+            raise HTTPException(status_code=400, detail=f"Task {item.id} does not belong to this phase")
+        if item.parent_id is not None and item.parent_id not in parent_of:
+            raise HTTPException(status_code=400, detail=f"Parent task {item.parent_id} does not belong to this phase")
+        parent_of[item.id] = item.parent_id
+
+    cycle_at = find_parent_cycle(parent_of)
+    if cycle_at is not None:
+        raise HTTPException(status_code=400, detail=f"Layout creates a cycle at task {cycle_at}")
+
+    tasks_table = sql_models.Task.__table__
+    stmt = update(tasks_table).where(tasks_table.c.id == bindparam("task_id")).values(
+        parent_id=bindparam("new_parent_id"),
+        position=bindparam("new_position")
+    )
+    db.execute(stmt, [
+        {"task_id": item.id, "new_parent_id": item.parent_id, "new_position": item.position}
+        for item in layout.items
+    ])
+    project_id = db.query(sql_models.WBS.project_id).filter(sql_models.WBS.id == wbs_id).scalar()
+    rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+    return {"message": f"Reordered {len(layout.items)} tasks", "updated": len(layout.items)}
+
 @router.delete("/wbs/{wbs_id}", tags=["WBS"])
-def delete_wbs_phase(wbs_id: int, db: Session = Depends(get_db)):
+def delete_wbs_phase(wbs_id: int, response: Response, db: Session = Depends(get_db)):
     wbs = db.query(sql_models.WBS).filter(sql_models.WBS.id == wbs_id).first()
     if not wbs:
         raise HTTPException(status_code=404, detail="Phase not found")
     
+    project_id = wbs.project_id
     db.delete(wbs)
-    db.commit()
+    rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+    scheduling.invalidate_project_schedule(project_id)
     return {"message": "Phase deleted successfully"}
 
 @router.delete("/tasks/{task_id}", tags=["WBS"])
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(sql_models.Task).filter(sql_models.Task.id == task_id).first()
-    if not task:
+def delete_task(task_id: int, response: Response, db: Session = Depends(get_db)):
+    project_id = db.query(sql_models.WBS.project_id).join(
+        sql_models.Task, sql_models.Task.wbs_id == sql_models.WBS.id
+    ).filter(sql_models.Task.id == task_id).scalar()
+    if project_id is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    db.delete(task)
-    db.commit()
-    return {"message": "Task deleted successfully"}
+    # Sub-tasks are removed by the recursive CTE instead of loading the subtree into the session
+    deleted = delete_task_subtrees(db, [task_id])
+    rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+    scheduling.invalidate_project_schedule(project_id)
+    return {"message": "Task deleted successfully", "deleted": deleted}
 
 @router.post("/tasks/bulk-delete", tags=["WBS"])
-def bulk_delete_tasks(task_ids: List[int], db: Session = Depends(get_db)):
+def bulk_delete_tasks(task_ids: List[int], response: Response, db: Session = Depends(get_db)):
     if not task_ids:
         return {"message": "No tasks selected"}
     
-    # Delete tasks with IDs in the provided list
-    db.query(sql_models.Task).filter(sql_models.Task.id.in_(task_ids)).delete(synchronize_session=False)
-    db.commit()
-    return {"message": f"Successfully deleted {len(task_ids)} tasks"}
+    project_ids = project_ids_for_tasks(db, task_ids)
+
+    # Delete the selected tasks together with all of their descendants
+    deleted = delete_task_subtrees(db, task_ids)
+    for project_id in project_ids:
+        rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+    scheduling.invalidate_project_schedule(*project_ids)
+    return {"message": f"Successfully deleted {deleted} tasks", "deleted": deleted}
+
+@router.get("/tasks/{task_id}/subtree/count", tags=["WBS"])
+def count_task_subtree(task_id: int, db: Session = Depends(get_db)):
+    subtree = task_subtree_cte([task_id])
+    size = db.execute(select(func.count()).select_from(subtree)).scalar()
+    if not size:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"task_id": task_id, "subtree_size": size, "descendants": size - 1}
+
+@router.put("/tasks/{task_id}/phase", tags=["WBS"])
+def move_task_subtree_to_phase(task_id: int, move: project_schemas.TaskPhaseMove, response: Response, db: Session = Depends(get_db)):
+    """Move a task and all of its descendants to another phase of the same project."""
+    task = db.query(sql_models.Task).filter(sql_models.Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    source_project_id = db.query(sql_models.WBS.project_id).filter(sql_models.WBS.id == task.wbs_id).scalar()
+    target = db.query(sql_models.WBS).filter(sql_models.WBS.id == move.wbs_id).first()
+    if not target or target.project_id != source_project_id:
+        raise HTTPException(status_code=400, detail="Invalid WBS ID for this project")
+
+    # Append the moved root to the end of the target phase's top level
+    max_pos = db.query(func.max(sql_models.Task.position)).filter(
+        sql_models.Task.wbs_id == move.wbs_id,
+        sql_models.Task.parent_id == None
+    ).scalar()
+    task.parent_id = None
+    task.position = (max_pos + 1) if max_pos is not None else 0
+    db.flush()
+
+    tasks_table = sql_models.Task.__table__
+    subtree = task_subtree_cte([task_id])
+    moved = db.execute(
+        update(tasks_table).where(tasks_table.c.id.in_(select(subtree.c.id))).values(wbs_id=move.wbs_id)
+    ).rowcount
+    rollups.refresh_project_rollups(db, source_project_id)
+    change_feed.commit_and_stamp(response, db)
+    return {"message": f"Moved {moved} tasks to phase {target.name}", "moved": moved}
+
+@router.put("/tasks/{task_id}/subtree/status", tags=["WBS"])
+def propagate_task_status(task_id: int, update_req: project_schemas.TaskStatusPropagate, response: Response, db: Session = Depends(get_db)):
+    """Set the status of a task and all of its descendants in one statement."""
+    tasks_table = sql_models.Task.__table__
+    subtree = task_subtree_cte([task_id])
+    updated = db.execute(
+        update(tasks_table).where(tasks_table.c.id.in_(select(subtree.c.id))).values(status=update_req.status.value)
+    ).rowcount
+    if not updated:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Task not found")
+    for project_id in project_ids_for_tasks(db, [task_id]):
+        rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+    return {"message": f"Updated status of {updated} tasks", "updated": updated}
 
 @router.put("/wbs/{wbs_id}", tags=["WBS"])
 def update_wbs_phase(
     wbs_id: int, 
     wbs_update: project_schemas.WBSUpdate, 
+    response: Response,
     db: Session = Depends(get_db)
 ):
     wbs = db.query(sql_models.WBS).filter(sql_models.WBS.id == wbs_id).first()
@@ -353,7 +634,9 @@ def update_wbs_phase(
     for key, value in update_data.items():
         setattr(wbs, key, value)
     
-    db.commit()
+    if "parent_id" in update_data:
+        rollups.refresh_project_rollups(db, wbs.project_id)
+    change_feed.commit_and_stamp(response, db)
     db.refresh(wbs)
     return wbs
 
@@ -361,6 +644,7 @@ def update_wbs_phase(
 def update_task_details(
     task_id: int, 
     task_update: project_schemas.TaskUpdate, 
+    response: Response,
     db: Session = Depends(get_db)
 ):
     task = db.query(sql_models.Task).filter(sql_models.Task.id == task_id).first()
@@ -371,10 +655,269 @@ def update_task_details(
     for key, value in update_data.items():
         setattr(task, key, value)
     
-    db.commit()
+    if ROLLUP_FIELDS.intersection(update_data):
+        rollups.refresh_project_rollups(db, task.wbs_item.project_id)
+    change_feed.commit_and_stamp(response, db)
     db.refresh(task)
+    if SCHEDULE_FIELDS.intersection(update_data):
+        scheduling.update_cached_task_dates(
+            task.wbs_item.project_id, task.id, task.planned_start, task.planned_end, task.due_date
+        )
     return task
 
+@router.patch("/tasks", tags=["WBS"])
+def bulk_patch_tasks(patch: project_schemas.TaskBulkPatch, response: Response, db: Session = Depends(get_db)):
+    """Partially update many tasks in one transaction. Returns only the fields that actually changed."""
+    changes = {} # task_id -> {column: value}
+    if patch.update is not None:
+        shared = patch.update.dict(exclude_unset=True)
+        for task_id in patch.ids:
+            changes[task_id] = dict(shared)
+    for item in patch.items:
+        data = item.dict(exclude_unset=True)
+        changes.setdefault(data.pop("id"), {}).update(data)
+
+    for data in changes.values():
+        if "due_date" in data and data["due_date"] is None:
+            raise HTTPException(status_code=400, detail="due_date cannot be cleared")
+        if data.get("status") is not None:
+            data["status"] = data["status"].value
+
+    changes = {task_id: data for task_id, data in changes.items() if data}
+    if not changes:
+        return {"updated": [], "unchanged": [], "not_found": []}
+
+    # Current values of only the touched columns, to diff against
+    columns = sorted({key for data in changes.values() for key in data})
+    current = {
+        row.id: row for row in db.query(
+            sql_models.Task.id, *[getattr(sql_models.Task, col) for col in columns]
+        ).filter(sql_models.Task.id.in_(list(changes))).all()
+    }
+
+    updated, unchanged, not_found = [], [], []
+    groups = {} # identical change set -> task ids
+    for task_id, data in changes.items():
+        row = current.get(task_id)
+        if row is None:
+            not_found.append(task_id)
+            continue
+        diff = {key: value for key, value in data.items() if getattr(row, key) != value}
+        if not diff:
+            unchanged.append(task_id)
+            continue
+        groups.setdefault(tuple(sorted(diff.items())), []).append(task_id)
+        updated.append({"id": task_id, **diff})
+
+    tasks_table = sql_models.Task.__table__
+    for change_set, task_ids in groups.items():
+        db.execute(update(tasks_table).where(tasks_table.c.id.in_(task_ids)).values(**dict(change_set)))
+
+    rolled = [diff["id"] for diff in updated if ROLLUP_FIELDS.intersection(diff)]
+    for project_id in (project_ids_for_tasks(db, rolled) if rolled else []):
+        rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+
+    rescheduled = [diff["id"] for diff in updated if SCHEDULE_FIELDS.intersection(diff)]
+    if rescheduled:
+        scheduling.invalidate_project_schedule(*project_ids_for_tasks(db, rescheduled))
+    return {"updated": updated, "unchanged": unchanged, "not_found": not_found}
+
+# --- Change Feed ---
+
+def project_metrics(db: Session, project_id: int):
+    """CAPEX utilization and task progress of a project using aggregate queries only."""
+    budget_capex, weighted_progress = db.query(
+        sql_models.Project.budget_capex, sql_models.Project.weighted_progress
+    ).filter(sql_models.Project.id == project_id).first()
+
+    is_capex = func.lower(sql_models.Payment.payment_type) == "capex"
+    total_planned, total_capex_paid = db.query(
+        func.coalesce(func.sum(case((is_capex, sql_models.Payment.amount), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((and_(is_capex, func.lower(sql_models.Payment.status) == "paid"), sql_models.Payment.amount), else_=0.0)), 0.0)
+    ).filter(sql_models.Payment.project_id == project_id).first()
+
+    effective_budget = budget_capex if budget_capex and budget_capex > 0 else total_planned
+    _, (task_progress, _) = rollups.compute_project_rollups(db, project_id)
+    return {
+        "capex_utilization": (total_capex_paid / effective_budget) * 100 if effective_budget > 0 else 0.0,
+        "task_progress": task_progress,
+        "weighted_progress": weighted_progress or 0.0
+    }
+
+@router.get("/projects/{project_id}/changes", tags=["Projects"], response_model=project_schemas.ProjectChangesRead)
+def get_project_changes(project_id: int, since: Optional[int] = Query(None, ge=0), db: Session = Depends(get_db)):
+    """
+    Tasks, phases and payments inserted, updated or deleted after version `since`.
+    Without `since` only the current version is returned (take it before a full load).
+    Write endpoints return the new version in the X-Project-Version header.
+    """
+    if since is None:
+        version = change_feed.latest_version(db)
+        return {"project_id": project_id, "since": version, "version": version, "deleted": {"tasks": [], "phases": [], "payments": []}}
+
+    version, upserted, deleted = change_feed.collect_changes(db, project_id, since)
+    result = {
+        "project_id": project_id,
+        "since": since,
+        "version": version,
+        "deleted": {"tasks": deleted["task"], "phases": deleted["wbs"], "payments": deleted["payment"]}
+    }
+    if version == since:
+        return result
+
+    if upserted["task"]:
+        now = datetime.now(timezone.utc)
+        tasks = db.query(sql_models.Task).options(
+            joinedload(sql_models.Task.assignee)
+        ).filter(sql_models.Task.id.in_(upserted["task"])).order_by(sql_models.Task.position, sql_models.Task.id).all()
+        for t in tasks:
+            t.is_overdue = calculate_task_overdue(t, now)
+        result["tasks"] = tasks
+    if upserted["wbs"]:
+        result["phases"] = db.query(
+            sql_models.WBS.id, sql_models.WBS.parent_id, sql_models.WBS.name,
+            sql_models.WBS.progress, sql_models.WBS.weighted_progress
+        ).filter(sql_models.WBS.id.in_(upserted["wbs"])).all()
+    if upserted["payment"]:
+        result["payments"] = db.query(sql_models.Payment).filter(
+            sql_models.Payment.id.in_(upserted["payment"])
+        ).order_by(sql_models.Payment.planned_date).all()
+    result["metrics"] = project_metrics(db, project_id)
+    return result
+
+# --- Dependencies & Scheduling ---
+
+@router.get("/projects/{project_id}/dependencies", tags=["Scheduling"], response_model=List[project_schemas.TaskDependencyRead])
+def get_project_dependencies(project_id: int, db: Session = Depends(get_db)):
+    return db.query(sql_models.TaskDependency).join(
+        sql_models.Task, sql_models.TaskDependency.successor_id == sql_models.Task.id
+    ).join(sql_models.WBS, sql_models.Task.wbs_id == sql_models.WBS.id).filter(
+        sql_models.WBS.project_id == project_id
+    ).all()
+
+@router.post("/projects/{project_id}/dependencies", tags=["Scheduling"], response_model=project_schemas.TaskDependencyRead)
+def create_task_dependency(project_id: int, dep: project_schemas.TaskDependencyCreate, db: Session = Depends(get_db)):
+    if dep.predecessor_id == dep.successor_id:
+        raise HTTPException(status_code=400, detail="A task cannot depend on itself")
+
+    found = db.query(sql_models.Task.id).join(sql_models.WBS, sql_models.Task.wbs_id == sql_models.WBS.id).filter(
+        sql_models.WBS.project_id == project_id,
+        sql_models.Task.id.in_([dep.predecessor_id, dep.successor_id])
+    ).count()
+    if found != 2:
+        raise HTTPException(status_code=400, detail="Both tasks must belong to this project")
+
+    _, edges = load_schedule_inputs(db, project_id)
+    successors = {}
+    for pred_id, succ_id, _ in edges:
+        if pred_id == dep.predecessor_id and succ_id == dep.successor_id:
+            raise HTTPException(status_code=400, detail="Dependency already exists")
+        successors.setdefault(pred_id, []).append(succ_id)
+
+    # The new edge closes a cycle if the predecessor is already reachable from the successor
+    stack, seen = [dep.successor_id], {dep.successor_id}
+    while stack:
+        node = stack.pop()
+        if node == dep.predecessor_id:
+            raise HTTPException(status_code=400, detail="Dependency would create a cycle")
+        for nxt in successors.get(node, []):
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+
+    new_dep = sql_models.TaskDependency(
+        predecessor_id=dep.predecessor_id,
+        successor_id=dep.successor_id,
+        lag_days=dep.lag_days
+    )
+    db.add(new_dep)
+    db.commit()
+    db.refresh(new_dep)
+    scheduling.invalidate_project_schedule(project_id)
+    return new_dep
+
+@router.delete("/dependencies/{dependency_id}", tags=["Scheduling"])
+def delete_task_dependency(dependency_id: int, db: Session = Depends(get_db)):
+    dep = db.query(sql_models.TaskDependency).filter(sql_models.TaskDependency.id == dependency_id).first()
+    if not dep:
+        raise HTTPException(status_code=404, detail="Dependency not found")
+
+    project_id = dep.successor.wbs_item.project_id
+    db.delete(dep)
+    db.commit()
+    scheduling.invalidate_project_schedule(project_id)
+    return {"message": "Dependency deleted successfully"}
+
+@router.get("/projects/{project_id}/schedule", tags=["Scheduling"], response_model=project_schemas.ProjectScheduleRead)
+def get_project_schedule(project_id: int, db: Session = Depends(get_db)):
+    """Critical path, early/late dates and total float (in days) for every task of the project."""
+    try:
+        return scheduling.get_project_schedule(project_id, lambda: load_schedule_inputs(db, project_id))
+    except scheduling.ScheduleCycleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/projects/{project_id}/gantt", tags=["Scheduling"])
+def get_project_gantt(project_id: int, db: Session = Depends(get_db)):
+    """
+    Columnar timeline payload: parallel arrays indexed by row, dates as days since 1970-01-01,
+    phases and assignees interned into small lookup tables (null = none).
+    """
+    tasks = sql_models.Task.__table__
+    wbs = sql_models.WBS.__table__
+    users = sql_models.User.__table__
+
+    def epoch_day(column):
+        # Converted in SQLite so no datetime objects are built per row
+        return cast(func.julianday(column) - 2440587.5, Integer)
+
+    stmt = select(
+        tasks.c.id, tasks.c.parent_id, tasks.c.wbs_id, wbs.c.name, tasks.c.name,
+        epoch_day(tasks.c.planned_start), epoch_day(tasks.c.planned_end), epoch_day(tasks.c.due_date),
+        tasks.c.status, tasks.c.assignee_id, users.c.full_name
+    ).select_from(
+        tasks.join(wbs, tasks.c.wbs_id == wbs.c.id).outerjoin(users, tasks.c.assignee_id == users.c.id)
+    ).where(wbs.c.project_id == project_id).order_by(wbs.c.id, tasks.c.position, tasks.c.id)
+
+    ids, parents, phase_refs, names, starts, ends, dues, statuses, assignee_refs = [], [], [], [], [], [], [], [], []
+    phase_index, phase_table = {}, {"id": [], "name": []}
+    user_index, user_table = {}, {"id": [], "full_name": []}
+    for task_id, parent_id, wbs_id, wbs_name, name, start, end, due, task_status, assignee_id, assignee_name in db.execute(stmt):
+        if wbs_id not in phase_index:
+            phase_index[wbs_id] = len(phase_table["id"])
+            phase_table["id"].append(wbs_id)
+            phase_table["name"].append(wbs_name)
+        if assignee_id is not None and assignee_id not in user_index:
+            user_index[assignee_id] = len(user_table["id"])
+            user_table["id"].append(assignee_id)
+            user_table["full_name"].append(assignee_name)
+        ids.append(task_id)
+        parents.append(parent_id)
+        phase_refs.append(phase_index[wbs_id])
+        names.append(name)
+        starts.append(start)
+        ends.append(end)
+        dues.append(due)
+        statuses.append(task_status)
+        assignee_refs.append(user_index.get(assignee_id))
+
+    # Every value is already JSON-native, skip the generic encoder
+    return JSONResponse(content={
+        "project_id": project_id,
+        "count": len(ids),
+        "id": ids,
+        "parent": parents,
+        "wbs": phase_refs,
+        "name": names,
+        "start": starts,
+        "end": ends,
+        "due": dues,
+        "status": statuses,
+        "assignee": assignee_refs,
+        "phases": phase_table,
+        "users": user_table
+    })
+
 # --- Finance ---
 
 @router.get("/projects/{project_id}/payments", tags=["Finance"])
@@ -385,7 +928,7 @@ def get_project_payments(project_id: int, db: Session = Depends(get_db)):
     return payments
 
 @router.post("/projects/{project_id}/payments", tags=["Finance"])
-def create_payment(project_id: int, payment: project_schemas.PaymentCreate, db: Session = Depends(get_db)):
+def create_payment(project_id: int, payment: project_schemas.PaymentCreate, response: Response, db: Session = Depends(get_db)):
     new_payment = sql_models.Payment(
         project_id=project_id,
         title=payment.title,
@@ -396,7 +939,7 @@ def create_payment(project_id: int, payment: project_schemas.PaymentCreate, db:
         status=payment.status
     )
     db.add(new_payment)
-    db.commit()
+    change_feed.commit_and_stamp(response, db)
     db.refresh(new_payment)
     return new_payment
 
@@ -404,6 +947,7 @@ def create_payment(project_id: int, payment: project_schemas.PaymentCreate, db:
 def update_payment(
     payment_id: int, 
     payment_update: project_schemas.PaymentUpdate, 
+    response: Response,
     db: Session = Depends(get_db)
 ):
     payment = db.query(sql_models.Payment).filter(sql_models.Payment.id == payment_id).first()
@@ -414,18 +958,18 @@ def update_payment(
     for key, value in update_data.items():
         setattr(payment, key, value)
     
-    db.commit()
+    change_feed.commit_and_stamp(response, db)
     db.refresh(payment)
     return payment
 
 @router.delete("/payments/{payment_id}", tags=["Finance"])
-def delete_payment(payment_id: int, db: Session = Depends(get_db)):
+def delete_payment(payment_id: int, response: Response, db: Session = Depends(get_db)):
     payment = db.query(sql_models.Payment).filter(sql_models.Payment.id == payment_id).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     
     db.delete(payment)
-    db.commit()
+    change_feed.commit_and_stamp(response, db)
     return {"message": "Payment deleted successfully"}
 
 @router.delete("/projects/{project_id}", tags=["Projects"])
@@ -436,6 +980,7 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     
     db.delete(project)
     db.commit()
+    scheduling.invalidate_project_schedule(project_id)
     return {"message": "Project deleted successfully"}
 
 @router.put("/projects/{project_id}", tags=["Projects"], response_model=project_schemas.ProjectRead)
@@ -457,204 +1002,282 @@ def update_project(
     db.refresh(db_project)
     return db_project
 
-@router.get("/tasks/assigned", tags=["Tasks"], response_model=List[project_schemas.TaskRead])
-def get_assigned_tasks(assignee_id: Optional[int] = None, db: Session = Depends(get_db)):
-    """Fetch tasks. If assignee_id provided, filter by it. Otherwise return all (for admin/monitoring)."""
-    query = db.query(sql_models.Task)
+@router.get("/tasks/assigned", tags=["Tasks"], response_model=List[project_schemas.AssignedTaskRead])
+def get_assigned_tasks(
+    response: Response,
+    assignee_id: Optional[int] = None,
+    statuses: Optional[List[project_schemas.TaskStatus]] = Query(None, alias="status"),
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Fetch tasks ordered by due date, one page at a time. If assignee_id provided, filter by it,
+    otherwise return tasks of everyone (for admin/monitoring). The total match count is sent
+    in the X-Total-Count header.
+    """
+    # Joined before counting: a task whose phase or project is gone is neither counted nor listed
+    query = db.query(sql_models.Task).join(
+        sql_models.WBS, sql_models.Task.wbs_id == sql_models.WBS.id
+    ).join(
+        sql_models.Project, sql_models.WBS.project_id == sql_models.Project.id
+    )
     if assignee_id:
         query = query.filter(sql_models.Task.assignee_id == assignee_id)
-    return query.all()
+    if statuses:
+        query = query.filter(sql_models.Task.status.in_([s.value for s in statuses]))
+    if due_from:
+        query = query.filter(sql_models.Task.due_date >= due_from)
+    if due_to:
+        query = query.filter(sql_models.Task.due_date <= due_to)
+
+    response.headers["X-Total-Count"] = str(query.count())
+
+    rows = query.options(
+        joinedload(sql_models.Task.assignee)
+    ).add_columns(
+        sql_models.Project.id, sql_models.Project.name
+    ).order_by(
+        sql_models.Task.due_date, sql_models.Task.id
+    ).offset(offset).limit(limit).all()
+
+    now = datetime.now(timezone.utc)
+    tasks = []
+    for task, project_id, project_name in rows:
+        task.project_id = project_id
+        task.project_name = project_name
+        task.is_overdue = calculate_task_overdue(task, now)
+        tasks.append(task)
+    return tasks
 
 # --- Excel Template & Import ---
 
+TEMPLATE_CACHE_CONTROL = "public, max-age=86400"
+XLSX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
 @router.get("/tasks/template", tags=["WBS"])
-def download_wbs_template():
-    """Generate a sample Excel template for WBS tasks."""
-    df = pd.DataFrame([
-        {
-            "Phase Name": "1. INITIATING",
-            "Task Name": "Prepare Project Charter",
-            "Description": "Define project scope and objectives.",
-            "Assignee Email": "staff@example.com",
-            "Status": "not_started",
-            "Start Date (YYYY-MM-DD)": "2026-02-10",
-            "Finish Date (YYYY-MM-DD)": "2026-02-15",
-            "Due Date (YYYY-MM-DD)": "2026-02-15"
-        },
-        {
-            "Phase Name": "1. INITIATING",
-            "Task Name": "Stakeholder Analysis",
-            "Description": "Identify key stakeholders.",
-            "Assignee Email": "staff@example.com",
-            "Status": "not_started",
-            "Start Date (YYYY-MM-DD)": "2026-02-16",
-            "Finish Date (YYYY-MM-DD)": "2026-02-20",
-            "Due Date (YYYY-MM-DD)": "2026-02-20"
-        },
-        {
-            "Phase Name": "2. PLANNING",
-            "Task Name": "Define WBS",
-            "Description": "Create detailed WBS breakdown.",
-            "Assignee Email": "hod@example.com",
-            "Status": "not_started",
-            "Start Date (YYYY-MM-DD)": "2026-02-21",
-            "Finish Date (YYYY-MM-DD)": "2026-02-28",
-            "Due Date (YYYY-MM-DD)": "2026-02-28"
-        }
-    ])
+def download_wbs_template(request: Request, department_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Excel template for WBS task import: the department's own template if it has one, else the default."""
+    department_code = None
+    if department_id is not None:
+        department = db.query(sql_models.Department).filter(sql_models.Department.id == department_id).first()
+        if not department:
+            raise HTTPException(status_code=404, detail="Department not found")
+        department_code = department.code
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Tasks')
-    
-    output.seek(0)
-    
-    headers = {
-        'Content-Disposition': 'attachment; filename="wbs_template.xlsx"'
-    }
-    return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    template = wbs_templates.get_template(department_code)
+    headers = {"ETag": template.etag, "Cache-Control": TEMPLATE_CACHE_CONTROL}
+    if template.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    headers['Content-Disposition'] = f'attachment; filename="{template.filename}"'
+    return Response(content=template.content, headers=headers, media_type=XLSX_MEDIA_TYPE)
+
+@router.put("/tasks/template/departments/{department_id}", tags=["WBS"])
+async def upload_department_template(
+    department_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: sql_models.User = Depends(get_current_user)
+):
+    """Store a department-specific import template (must keep the required import columns)."""
+    if current_user.role not in [sql_models.UserRole.ADMIN, sql_models.UserRole.HOD]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    department = db.query(sql_models.Department).filter(sql_models.Department.id == department_id).first()
+    if not department:
+        raise HTTPException(status_code=404, detail="Department not found")
+    if not department.code:
+        raise HTTPException(status_code=400, detail="Department has no code")
+
+    contents = await file.read()
+    try:
+        columns = pd.read_excel(io.BytesIO(contents), nrows=0)
+    except Exception:
+        raise HTTPException(status_code=400, detail="File is not a valid Excel workbook")
+    missing = task_import.missing_columns(columns)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing required column: {missing[0]}")
+
+    wbs_templates.save_department_template(department.code, contents)
+    template = wbs_templates.get_template(department.code)
+    return {"message": f"Template saved for {department.name}", "etag": template.etag}
 
 @router.get("/projects/{project_id}/tasks/export", tags=["WBS"])
-def export_project_tasks(project_id: int, db: Session = Depends(get_db)):
-    """Export all WBS tasks to Excel."""
+def export_project_tasks(project_id: int, file_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$"), db: Session = Depends(get_db)):
+    """Export all WBS tasks to Excel (or CSV), streamed without building the file in memory."""
     # Verify project exists
     project = db.query(sql_models.Project).filter(sql_models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Fetch WBS and Tasks
-    wbs_items = db.query(sql_models.WBS).options(
-        joinedload(sql_models.WBS.tasks).joinedload(sql_models.Task.assignee)
-    ).filter(sql_models.WBS.project_id == project_id).all()
-    
-    data = []
-    
-    for wbs in wbs_items:
-        # Sort tasks by position
-        tasks = sorted(wbs.tasks, key=lambda t: (t.position, t.id))
-        
-        for task in tasks:
-            data.append({
-                "Phase Name": wbs.name,
-                "Task Name": task.name,
-                "Description": task.description or "",
-                "Assignee Email": task.assignee.email if task.assignee else "",
-                "Assignee Name": task.assignee.full_name if task.assignee else "",
-                "Status": task.status.value if hasattr(task.status, 'value') else task.status,
-                "Start Date (YYYY-MM-DD)": task.planned_start.strftime("%Y-%m-%d") if task.planned_start else "",
-                "Finish Date (YYYY-MM-DD)": task.planned_end.strftime("%Y-%m-%d") if task.planned_end else "",
-                "Due Date (YYYY-MM-DD)": task.due_date.strftime("%Y-%m-%d") if task.due_date else ""
-            })
-            
-    if not data:
-        # Create an empty dataframe with headers if no data
-        df = pd.DataFrame(columns=["Phase Name", "Task Name", "Description", "Assignee Email", "Status", "Start Date (YYYY-MM-DD)", "Finish Date (YYYY-MM-DD)", "Due Date (YYYY-MM-DD)"])
-    else:
-        df = pd.DataFrame(data)
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Tasks')
-    
-    output.seek(0)
-    
-    filename = f"{project.code}_wbs_export_{datetime.now().strftime('%Y%m%d')}.xlsx"
+    filename = f"{project.code}_wbs_export_{datetime.now().strftime('%Y%m%d')}.{file_format}"
     headers = {
         'Content-Disposition': f'attachment; filename="{filename}"'
     }
-    return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+    if file_format == "csv":
+        def csv_chunks():
+            # Own session: the response body is produced after the endpoint returns
+            stream_db = SessionLocal()
+            try:
+                yield from task_export.iter_csv(task_export.iter_task_rows(stream_db, project_id))
+            finally:
+                stream_db.close()
+        return StreamingResponse(csv_chunks(), headers=headers, media_type='text/csv; charset=utf-8')
+
+    path = task_export.xlsx_tempfile(task_export.iter_task_rows(db, project_id))
+    return StreamingResponse(task_export.iter_file(path), headers=headers, media_type=XLSX_MEDIA_TYPE)
 
 @router.post("/projects/{project_id}/tasks/import", tags=["WBS"])
-async def import_project_tasks(project_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Import WBS and tasks from an Excel file."""
+async def import_project_tasks(
+    project_id: int,
+    response: Response,
+    file: UploadFile = File(...),
+    mode: str = Query("append", pattern="^(append|upsert)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Import WBS and tasks from an Excel file.
+    mode=upsert updates tasks matched by the export's Task ID column or by phase + task name
+    and leaves unchanged rows alone, so re-importing a revised workbook does not duplicate tasks.
+    """
     # Verify project exists
     project = db.query(sql_models.Project).filter(sql_models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    contents = await file.read()
-    df = pd.read_excel(io.BytesIO(contents))
+    # Spool to disk and read in batches: memory stays bounded whatever the upload size
+    path = jobs.spool_path(".xlsx")
+    try:
+        await spool_import_upload(file, path)
+        result = await run_in_threadpool(import_spooled_workbook, db, project, path, mode)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
 
-    required_columns = ["Phase Name", "Task Name", "Due Date (YYYY-MM-DD)"]
-    for col in required_columns:
-        if col not in df.columns:
-            raise HTTPException(status_code=400, detail=f"Missing required column: {col}")
+    rollups.refresh_project_rollups(db, project_id)
+    change_feed.commit_and_stamp(response, db)
+    scheduling.invalidate_project_schedule(project_id)
+    return {"message": import_result_message(result), **result}
 
-    # Process rows
-    created_phases = 0
-    created_tasks = 0
-    
-    # Map for phases to avoid redundant queries
-    phase_map = {} # name -> id
-
-    def parse_date(val):
-        if pd.isna(val) or not val: return None
-        try:
-            if isinstance(val, datetime): return val
-            # Handle float/int timestamps from Excel if pandas read them that way
-            return pd.to_datetime(val).to_pydatetime()
-        except:
-            try:
-                # Fallback to manual string parsing if to_datetime fails
-                return datetime.strptime(str(val).split(' ')[0], "%Y-%m-%d")
-            except:
-                return None
-    
-    for _, row in df.iterrows():
-        phase_name = str(row.get("Phase Name", "Uncategorized")).strip()
-        task_name = str(row.get("Task Name", "")).strip()
-        if not task_name: continue
-
-        # 1. Handle Phase
-        if phase_name not in phase_map:
-            # Check if exists in DB for this project
-            db_phase = db.query(sql_models.WBS).filter(sql_models.WBS.project_id == project_id, sql_models.WBS.name == phase_name).first()
-            if not db_phase:
-                db_phase = sql_models.WBS(project_id=project_id, name=phase_name)
-                db.add(db_phase)
-                db.flush() # Get ID
-                created_phases += 1
-            phase_map[phase_name] = db_phase.id
-            
-        wbs_id = phase_map[phase_name]
-        
-        # 2. Get Assignee
-        assignee_id = None
-        email = str(row.get("Assignee Email", "")).strip()
-        if email:
-            user = db.query(sql_models.User).filter(sql_models.User.email == email).first()
-            if user:
-                assignee_id = user.id
-        
-        # 3. Handle Dates & Status
-        status = row.get("Status", "not_started")
-        if status not in [s.value for s in sql_models.TaskStatus]:
-            status = "not_started"
-            
-        planned_start = parse_date(row.get("Start Date (YYYY-MM-DD)"))
-        planned_end = parse_date(row.get("Finish Date (YYYY-MM-DD)"))
-        due_date = parse_date(row.get("Due Date (YYYY-MM-DD)"))
-
-        if not due_date:
-             # Fallback to planned_end, then project end date, then now
-             due_date = planned_end if planned_end else (project.end_date if project.end_date else datetime.now())
-
-        new_task = sql_models.Task(
-            wbs_id=wbs_id,
-            name=task_name,
-            description=str(row.get("Description", "")) if not pd.isna(row.get("Description")) else None,
-            assignee_id=assignee_id,
-            status=status,
-            planned_start=planned_start,
-            planned_end=planned_end,
-            due_date=due_date
-        )
-        db.add(new_task)
-        created_tasks += 1
+async def spool_import_upload(file, path):
+    try:
+        await task_import.spool_upload(file, path)
+    except task_import.ImportLimitError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
 
-    db.commit()
+def import_spooled_workbook(db, project, path, mode):
+    """Run the batched import, turning unreadable or over-limit files into HTTP errors."""
+    try:
+        return task_import.import_workbook(db, project, path, mode=mode)
+    except task_import.ImportLimitError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except (InvalidFileException, BadZipFile):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="File is not a valid Excel workbook")
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+def import_result_message(result):
+    message = f"Successfully imported {result['tasks_created']} tasks across {result['phases_created']} new phases."
+    if result["mode"] == "upsert":
+        message += f" {result['tasks_updated']} tasks updated, {result['tasks_unchanged']} unchanged."
+    if result["error_count"]:
+        message += f" {result['rows_skipped']} rows skipped with errors."
+    if result["warning_count"]:
+        message += f" {result['rows_with_warnings']} rows imported with default values."
+    return message
+
+# --- Background import / export jobs ---
+
+@jobs.handler("task_import")
+def run_task_import_job(db, ctx):
+    project_id = ctx.params["project_id"]
+    ctx.remove_when_done(ctx.params["path"])
+    project = db.query(sql_models.Project).filter(sql_models.Project.id == project_id).first()
+    if not project:
+        raise ValueError("Project not found")
+
+    ctx.report(5, "Reading workbook")
+    result = task_import.import_workbook(
+        db, project, ctx.params["path"], mode=ctx.params.get("mode", "append"),
+        report=lambda message: ctx.report(50, message)
+    )
+    ctx.report(90, "Updating progress rollups")
+    rollups.refresh_project_rollups(db, project_id)
+    ctx.after_commit(lambda: scheduling.invalidate_project_schedule(project_id))
+    return {"message": import_result_message(result), **result}
+
+@jobs.handler("task_export")
+def run_task_export_job(db, ctx):
+    project_id = ctx.params["project_id"]
+    file_format = ctx.params.get("format", "xlsx")
+    project = db.query(sql_models.Project).filter(sql_models.Project.id == project_id).first()
+    if not project:
+        raise ValueError("Project not found")
+
+    total = db.query(func.count(sql_models.Task.id)).join(sql_models.WBS).filter(
+        sql_models.WBS.project_id == project_id
+    ).scalar()
+    written = 0
+    def counted_rows():
+        nonlocal written
+        for row in task_export.iter_task_rows(db, project_id):
+            written += 1
+            if written % task_export.BATCH_SIZE == 0:
+                # The count was taken up front: tasks added since must not push past 95 or divide by 0
+                ctx.report(min(95, 95 * written / max(total, 1)), f"Exported {written} of {total} tasks")
+            yield row
+
+    path = ctx.output_path(f".{file_format}")
+    if file_format == "csv":
+        with open(path, "wb") as f:
+            for chunk in task_export.iter_csv(counted_rows()):
+                f.write(chunk)
+    else:
+        task_export.write_xlsx(counted_rows(), path)
     return {
-        "message": f"Successfully imported {created_tasks} tasks across {created_phases} new phases.",
-        "tasks_created": created_tasks,
-        "phases_created": created_phases
+        "filename": f"{project.code}_wbs_export_{datetime.now().strftime('%Y%m%d')}.{file_format}",
+        "tasks": written
     }
+
+@router.post("/projects/{project_id}/tasks/import/jobs", tags=["WBS"], response_model=job_schemas.JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def submit_import_job(
+    project_id: int,
+    file: UploadFile = File(...),
+    mode: str = Query("append", pattern="^(append|upsert)$"),
+    db: Session = Depends(get_db),
+    current_user: sql_models.User = Depends(get_current_user)
+):
+    """Queue an Excel import; poll GET /jobs/{id} for progress and the import result."""
+    project = db.query(sql_models.Project).filter(sql_models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    path = jobs.spool_path(".xlsx")
+    try:
+        await spool_import_upload(file, path)
+    except HTTPException:
+        os.remove(path)
+        raise
+    job = jobs.submit(db, "task_import", {"project_id": project_id, "path": path, "filename": file.filename, "mode": mode}, current_user.id)
+    return job_read(job)
+
+@router.post("/projects/{project_id}/tasks/export/jobs", tags=["WBS"], response_model=job_schemas.JobRead, status_code=status.HTTP_202_ACCEPTED)
+def submit_export_job(
+    project_id: int,
+    file_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: sql_models.User = Depends(get_current_user)
+):
+    """Queue a task export; the file is available from GET /jobs/{id}/download when done."""
+    project = db.query(sql_models.Project).filter(sql_models.Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    job = jobs.submit(db, "task_export", {"project_id": project_id, "format": file_format}, current_user.id)
+    return job_read(job)
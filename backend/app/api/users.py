@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel
+import base64
+import binascii
+import json
 from ..db.database import get_db
 from ..models import sql_models as models
-from ..core import security
+from ..core import security, document_holders, user_stats
 from .auth import get_current_user
 
 router = APIRouter()
@@ -43,6 +47,21 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class UserPickerItem(BaseModel):
+    id: int
+    full_name: str
+
+    class Config:
+        from_attributes = True
+
+class UserSearchPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+class UserPickerPage(BaseModel):
+    items: List[UserPickerItem]
+    next_cursor: Optional[str] = None
+
 class DepartmentResponse(BaseModel):
     id: int
     name: str
@@ -113,6 +132,7 @@ async def update_user(
         db_user.email = user_update.email
     if user_update.full_name:
         db_user.full_name = user_update.full_name
+        document_holders.rename_user_holder(db, db_user)
     if user_update.role:
         db_user.role = user_update.role
     if user_update.department_id is not None:
@@ -142,6 +162,10 @@ async def delete_user(
     if db_user.id == current_user.id:
          raise HTTPException(status_code=400, detail="Cannot delete your own account")
 
+    # Documents they hold stay with a plain named holder
+    db.query(models.DocumentHolder).filter(
+        models.DocumentHolder.user_id == db_user.id
+    ).update({models.DocumentHolder.user_id: None}, synchronize_session=False)
     db.delete(db_user)
     db.commit()
     return {"message": "User deleted successfully"}
@@ -153,6 +177,65 @@ async def get_departments(
 ):
     return db.query(models.Department).all()
 
+# Upper bound for prefix ranges: key <= column < key + _PREFIX_END
+_PREFIX_END = "\U0010ffff"
+
+def _prefix(column, key):
+    return and_(column >= key, column < key + _PREFIX_END)
+
+def _encode_user_cursor(name_key, user_id):
+    return base64.urlsafe_b64encode(json.dumps([name_key, user_id]).encode()).decode()
+
+def _decode_user_cursor(cursor):
+    try:
+        name_key, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(name_key), int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/search", response_model=Union[UserPickerPage, UserSearchPage])
+def search_users(
+    q: Optional[str] = Query(None, max_length=100),
+    role: Optional[str] = None,
+    department_id: Optional[int] = None,
+    compact: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Users whose name, username or email starts with q (case-insensitive), ordered by name,
+    one page at a time. compact=true returns only {id, full_name}, for pickers.
+    """
+    User = models.User
+    query = db.query(User.id, User.full_name, User.full_name_key) if compact else db.query(User)
+    key = models.search_key(q)
+    if key:
+        query = query.filter(or_(
+            _prefix(User.full_name_key, key), _prefix(User.username_key, key), _prefix(User.email_key, key)
+        ))
+    if role:
+        query = query.filter(User.role == role)
+    if department_id:
+        query = query.filter(User.department_id == department_id)
+    if cursor:
+        after_key, after_id = _decode_user_cursor(cursor)
+        query = query.filter(or_(
+            User.full_name_key > after_key, and_(User.full_name_key == after_key, User.id > after_id)
+        ))
+    rows = query.order_by(User.full_name_key, User.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_user_cursor(rows[-1].full_name_key, rows[-1].id)
+    if compact:
+        return UserPickerPage(
+            items=[UserPickerItem(id=row.id, full_name=row.full_name) for row in rows], next_cursor=next_cursor
+        )
+    return UserSearchPage(items=[UserResponse.model_validate(user) for user in rows], next_cursor=next_cursor)
+
 @router.get("/stats", response_model=List[dict])
 async def get_user_stats(
     current_user: models.User = Depends(get_current_user),
@@ -161,37 +244,4 @@ async def get_user_stats(
     if current_user.role != models.UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Get all users (except maybe the current one? No, let's show all)
-    users = db.query(models.User).all()
-    results = []
-    for u in users:
-        # Projects: where owner or assist
-        proj_count = db.query(models.Project).filter(
-            (models.Project.owner_id == u.id) | (models.Project.assist_coordinator_id == u.id)
-        ).count()
-        
-        # Tasks: where assignee and not completed
-        task_count = db.query(models.Task).filter(
-            models.Task.assignee_id == u.id,
-            models.Task.status != models.TaskStatus.COMPLETED
-        ).count()
-        
-        # Documents: where current_holder matches full_name and not completed
-        doc_count = db.query(models.DocumentTracker).filter(
-            models.DocumentTracker.current_holder == u.full_name,
-            models.DocumentTracker.status != "completed"
-        ).count()
-        
-        results.append({
-            "id": u.id,
-            "full_name": u.full_name,
-            "username": u.username,
-            "role": u.role,
-            "department": u.department.name if u.department else "N/A",
-            "stats": {
-                "active_projects": proj_count,
-                "pending_tasks": task_count,
-                "held_documents": doc_count
-            }
-        })
-    return results
+    return user_stats.get_user_stats(db)
@@ -0,0 +1,197 @@
+"""
+Portfolio-wide columnar export for analytics (Parquet or Arrow IPC).
+
+Each dataset is read with a server-side cursor and written CHUNK_ROWS rows at a time
+(one Parquet row group / Arrow record batch per chunk), with an Arrow schema derived
+from the table columns. Exports can be incremental: the manifest of a previous export
+holds its watermarks and the next one only writes what changed after them.
+
+Dataset strategies:
+- full: small dimension tables, always a complete snapshot (projects)
+- changes: rows touched in project_changes after the change version (wbs, tasks,
+  payments, expenses, budget requests, document logs); deletions are written to a
+  separate deletions dataset
+A dataset the previous export did not track by change version (an export made before
+its triggers existed) is written as a full snapshot again.
+
+pyarrow is optional: only this export needs it (see available()).
+"""
+import json
+import os
+import shutil
+import zipfile
+from datetime import datetime, timezone
+
+from sqlalchemy import select, func, Integer, Float, Boolean, DateTime, JSON
+
+from app.models import sql_models
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # pragma: no cover - depends on the deployment
+    pa = None
+    pq = None
+
+CHUNK_ROWS = 50000
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+CHANGE_DATASETS = {
+    "wbs": sql_models.WBS,
+    "tasks": sql_models.Task,
+    "payments": sql_models.Payment,
+    "expenses": sql_models.DepartmentExpense,
+    "budget_requests": sql_models.BudgetRequest,
+    "document_logs": sql_models.DocumentLog
+}
+CHANGE_ENTITIES = {
+    "wbs": "wbs", "tasks": "task", "payments": "payment",
+    "expenses": "expense", "budget_requests": "budget_request", "document_logs": "document_log"
+}
+# Datasets tracked by change version in manifests that predate the "tracked" watermark
+LEGACY_TRACKED = ["wbs", "tasks", "payments"]
+
+
+def available():
+    return pa is not None
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string() # String, Text, JSON (serialized below)
+
+
+def current_watermarks(db):
+    """Upper bounds taken before reading, so rows written during the export go to the next one."""
+    changes = sql_models.ProjectChange
+    marks = {"change_version": db.query(func.max(changes.id)).scalar() or 0, "tracked": list(CHANGE_DATASETS)}
+    marks["exported_at"] = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    return marks
+
+
+def dataset_queries(since, marks):
+    """
+    (name, columns, query, mode) for every dataset.
+    since: watermarks of the previous export, or None for a full export.
+    """
+    queries = []
+    projects = sql_models.Project.__table__
+    columns = list(projects.columns)
+    queries.append(("projects", columns, select(*columns).order_by(projects.c.id), "full"))
+
+    changes = sql_models.ProjectChange.__table__
+    tracked = since.get("tracked", LEGACY_TRACKED) if since else []
+    for name, model in CHANGE_DATASETS.items():
+        table = model.__table__
+        columns = list(table.columns)
+        query = select(*columns).order_by(table.c.id)
+        if name not in tracked:
+            queries.append((name, columns, query, "full"))
+            continue
+        touched = select(changes.c.entity_id).where(
+            changes.c.entity == CHANGE_ENTITIES[name],
+            changes.c.id > since["change_version"],
+            changes.c.id <= marks["change_version"]
+        )
+        queries.append((name, columns, query.where(table.c.id.in_(touched)), "incremental"))
+
+    deleted = select(
+        changes.c.id.label("version"), changes.c.entity, changes.c.entity_id, changes.c.created_at
+    ).where(
+        changes.c.op == "delete",
+        changes.c.id > (since or {}).get("change_version", 0),
+        changes.c.id <= marks["change_version"]
+    ).order_by(changes.c.id)
+    queries.append(("deletions", list(deleted.selected_columns), deleted, "incremental" if since else "full"))
+    return queries
+
+
+def iter_chunks(db, query):
+    """Column-oriented chunks ([values of column 0], [values of column 1], ...) of up to CHUNK_ROWS rows."""
+    result = db.execute(query.execution_options(stream_results=True, yield_per=CHUNK_ROWS))
+    for partition in result.partitions():
+        yield [list(values) for values in zip(*partition)]
+
+
+class _DatasetWriter:
+    def __init__(self, path, schema, file_format):
+        self.schema = schema
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, schema, compression="snappy")
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, schema)
+        self.file_format = file_format
+
+    def write(self, batch):
+        if self.file_format == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch], schema=self.schema))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        if self.file_format != "parquet":
+            self._sink.close()
+
+
+def write_dataset(db, name, columns, query, path, file_format):
+    """Stream one dataset into a file; returns the row count. The file has the schema even when empty."""
+    types = [_arrow_type(c) for c in columns]
+    json_columns = [i for i, c in enumerate(columns) if isinstance(c.type, JSON)]
+    schema = pa.schema([(c.name, t) for c, t in zip(columns, types)])
+    writer = _DatasetWriter(path, schema, file_format)
+    rows = 0
+    try:
+        for chunk in iter_chunks(db, query):
+            for i in json_columns:
+                chunk[i] = [json.dumps(v) if v is not None else None for v in chunk[i]]
+            arrays = [pa.array(values, type=t) for values, t in zip(chunk, types)]
+            writer.write(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(chunk[0]) if chunk else 0
+    finally:
+        writer.close()
+    return rows
+
+
+def export_portfolio(db, out_path, file_format="parquet", since=None, report=None):
+    """
+    Write every dataset plus manifest.json into a zip at out_path.
+    since: watermarks from a previous manifest (incremental export) or None.
+    Returns the manifest.
+    """
+    marks = current_watermarks(db)
+    extension = FORMATS[file_format]
+    work_dir = out_path + ".parts"
+    os.makedirs(work_dir, exist_ok=True)
+    manifest = {
+        "format": file_format,
+        "incremental": since is not None,
+        "since": since,
+        "watermarks": marks,
+        "datasets": {}
+    }
+    try:
+        queries = dataset_queries(since, marks)
+        for step, (name, columns, query, mode) in enumerate(queries):
+            if report:
+                report(100 * step / len(queries), f"Exporting {name}")
+            filename = f"{name}{extension}"
+            rows = write_dataset(db, name, columns, query, os.path.join(work_dir, filename), file_format)
+            manifest["datasets"][name] = {"file": filename, "rows": rows, "mode": mode}
+
+        # Parquet / Arrow files are already compressed or binary: store as is
+        with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for info in manifest["datasets"].values():
+                archive.write(os.path.join(work_dir, info["file"]), info["file"])
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return manifest
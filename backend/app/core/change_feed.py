@@ -0,0 +1,115 @@
+"""
+Per-project change log for the workspace delta feed.
+
+SQLite triggers on tasks, wbs and payments append a row to project_changes for every
+insert, update and delete, so Core bulk statements, CTE deletes and scripts are
+captured as well as ORM writes. The autoincrement id of project_changes is the version:
+it only grows, and a client holding version N asks for everything with id > N.
+Department expenses, budget requests and document logs are logged the same way with
+no project_id: they are not part of any project feed, only of the analytics export.
+"""
+from sqlalchemy import text, func
+from app.models import sql_models
+
+VERSION_HEADER = "X-Project-Version"
+
+_TASK_PROJECT = "(SELECT project_id FROM wbs WHERE id = {row}.wbs_id)"
+
+CHANGE_TRIGGERS = [
+    # Tasks
+    f"""CREATE TRIGGER IF NOT EXISTS trg_tasks_change_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES ({_TASK_PROJECT.format(row='NEW')}, 'task', NEW.id, 'upsert');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_tasks_change_update AFTER UPDATE ON tasks BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES ({_TASK_PROJECT.format(row='NEW')}, 'task', NEW.id, 'upsert');
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_tasks_change_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES ({_TASK_PROJECT.format(row='OLD')}, 'task', OLD.id, 'delete');
+    END""",
+    # WBS phases (rollup refreshes rewrite every phase, only log real changes)
+    """CREATE TRIGGER IF NOT EXISTS trg_wbs_change_insert AFTER INSERT ON wbs BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (NEW.project_id, 'wbs', NEW.id, 'upsert');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_wbs_change_update AFTER UPDATE ON wbs
+    WHEN OLD.name IS NOT NEW.name OR OLD.parent_id IS NOT NEW.parent_id
+        OR OLD.progress IS NOT NEW.progress OR OLD.weighted_progress IS NOT NEW.weighted_progress
+    BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (NEW.project_id, 'wbs', NEW.id, 'upsert');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_wbs_change_delete AFTER DELETE ON wbs BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (OLD.project_id, 'wbs', OLD.id, 'delete');
+    END""",
+    # Payments
+    """CREATE TRIGGER IF NOT EXISTS trg_payments_change_insert AFTER INSERT ON payments BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (NEW.project_id, 'payment', NEW.id, 'upsert');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_payments_change_update AFTER UPDATE ON payments BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (NEW.project_id, 'payment', NEW.id, 'upsert');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_payments_change_delete AFTER DELETE ON payments BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (OLD.project_id, 'payment', OLD.id, 'delete');
+    END""",
+]
+
+# Tables outside the project feed: {table: entity}
+UNSCOPED_ENTITIES = {"department_expenses": "expense", "budget_requests": "budget_request", "document_logs": "document_log"}
+
+
+def _unscoped_triggers(table, entity):
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_change_{event} AFTER {event.upper()} ON {table} BEGIN
+        INSERT INTO project_changes (project_id, entity, entity_id, op) VALUES (NULL, '{entity}', {row}.id, '{op}');
+    END"""
+        for event, row, op in (("insert", "NEW", "upsert"), ("update", "NEW", "upsert"), ("delete", "OLD", "delete"))
+    ]
+
+
+CHANGE_TRIGGERS += [ddl for table, entity in UNSCOPED_ENTITIES.items() for ddl in _unscoped_triggers(table, entity)]
+
+
+def install_change_triggers(engine):
+    """Create the change-log triggers if missing (idempotent, run at startup after create_all)."""
+    with engine.begin() as conn:
+        for ddl in CHANGE_TRIGGERS:
+            conn.execute(text(ddl))
+
+
+def latest_version(db):
+    return db.query(func.max(sql_models.ProjectChange.id)).scalar() or 0
+
+
+def commit_and_stamp(response, db):
+    """
+    Commit a write and expose the change-log version it ends at, so the client can ask for
+    deltas from there. The version is read inside the transaction, after its own changes:
+    SQLite has one writer at a time, so no other write can land between the read and the
+    commit and be skipped by the client's next sync.
+    """
+    db.flush()
+    version = latest_version(db)
+    db.commit()
+    response.headers[VERSION_HEADER] = str(version)
+
+
+def collect_changes(db, project_id, since):
+    """
+    Net changes of a project after version `since`.
+    Returns (version, {entity: [upserted ids]}, {entity: [deleted ids]}) using the last op per entity.
+    """
+    rows = db.execute(text("""
+        SELECT c.entity, c.entity_id, c.op, c.id
+        FROM project_changes c
+        JOIN (
+            SELECT MAX(id) AS last_id FROM project_changes
+            WHERE project_id = :project_id AND id > :since
+            GROUP BY entity, entity_id
+        ) latest ON latest.last_id = c.id
+    """), {"project_id": project_id, "since": since}).all()
+
+    version = since
+    upserted = {"task": [], "wbs": [], "payment": []}
+    deleted = {"task": [], "wbs": [], "payment": []}
+    for entity, entity_id, op, change_id in rows:
+        version = max(version, change_id)
+        (deleted if op == "delete" else upserted).setdefault(entity, []).append(entity_id)
+    return version, upserted, deleted
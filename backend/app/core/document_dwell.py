@@ -0,0 +1,119 @@
+"""
+Dwell time: how long documents stay with each holder.
+
+A stay starts at a log's timestamp and ends at the timestamp of the document's next
+log (LEAD over the document's logs). Finished stays never change, so they are
+materialized in document_dwell: a refresh only computes the stays closed by logs
+newer than the last one processed, i.e. only the documents that moved since.
+Median and p90 per holder and per month are computed in SQL (nearest rank) and
+cached in memory until a new log arrives. Stays still open are reported live.
+"""
+import threading
+
+from sqlalchemy import text, func
+
+from app.models import sql_models
+
+_lock = threading.Lock()
+_cache = {"log_id": None, "result": None}
+
+_REFRESH_SQL = """
+    INSERT OR REPLACE INTO document_dwell (log_id, closed_by_log_id, document_id, holder_id, month, seconds)
+    SELECT id, next_id, document_id, holder_id, strftime('%Y-%m', timestamp),
+        (julianday(next_timestamp) - julianday(timestamp)) * 86400.0
+    FROM (
+        SELECT id, document_id, holder_id, timestamp,
+            LEAD(id) OVER w AS next_id,
+            LEAD(timestamp) OVER w AS next_timestamp
+        FROM document_logs
+        WHERE document_id IN (SELECT document_id FROM document_logs WHERE id > :after AND id <= :upto)
+        WINDOW w AS (PARTITION BY document_id ORDER BY timestamp, id)
+    )
+    WHERE next_id > :after AND next_id <= :upto
+"""
+
+# Nearest-rank median (mean of the two middle values) and p90 per group
+_PERCENTILES_SQL = """
+    WITH ranked AS (
+        SELECT {group} AS grp, seconds,
+            ROW_NUMBER() OVER (PARTITION BY {group} ORDER BY seconds) AS rn,
+            COUNT(*) OVER (PARTITION BY {group}) AS n
+        FROM document_dwell
+    )
+    SELECT grp, MAX(n),
+        AVG(CASE WHEN rn IN ((n + 1) / 2, (n + 2) / 2) THEN seconds END),
+        MAX(CASE WHEN rn = (9 * n + 9) / 10 THEN seconds END)
+    FROM ranked GROUP BY grp
+"""
+
+
+def refresh(db, upto):
+    """Materialize the stays closed by logs up to id `upto`. Returns the number of rows written."""
+    after = db.query(func.max(sql_models.DocumentDwell.closed_by_log_id)).scalar() or 0
+    if upto <= after:
+        return 0
+    written = db.execute(text(_REFRESH_SQL), {"after": after, "upto": upto}).rowcount
+    db.commit()
+    return written
+
+
+def _hours(seconds):
+    return round(seconds / 3600.0, 2) if seconds is not None else None
+
+
+def _aggregate(db):
+    holder_names = dict(db.query(sql_models.DocumentHolder.id, sql_models.DocumentHolder.name).all())
+    by_holder = [
+        {
+            "holder_id": holder_id,
+            "holder": holder_names.get(holder_id, "Unknown"),
+            "stays": stays,
+            "median_hours": _hours(median),
+            "p90_hours": _hours(p90)
+        }
+        for holder_id, stays, median, p90 in db.execute(text(_PERCENTILES_SQL.format(group="holder_id"))).all()
+    ]
+    by_holder.sort(key=lambda row: row["p90_hours"] or 0, reverse=True)
+    by_month = [
+        {"month": month, "stays": stays, "median_hours": _hours(median), "p90_hours": _hours(p90)}
+        for month, stays, median, p90 in db.execute(text(_PERCENTILES_SQL.format(group="month"))).all()
+    ]
+    by_month.sort(key=lambda row: row["month"] or "")
+    return by_holder, by_month
+
+
+def open_stays(db):
+    """Documents sitting with their current holder now: count and oldest age per holder."""
+    rows = db.execute(text("""
+        SELECT l.holder_id, h.name, COUNT(*),
+            MAX((julianday('now') - julianday(l.timestamp)) * 24.0)
+        FROM document_trackers d
+        JOIN document_logs l ON l.id = d.last_log_id
+        LEFT JOIN document_holders h ON h.id = l.holder_id
+        WHERE d.status != 'completed'
+        GROUP BY l.holder_id, h.name
+        ORDER BY 4 DESC
+    """)).all()
+    return [
+        {"holder_id": holder_id, "holder": name or "Unknown", "documents": count, "oldest_hours": round(oldest, 2)}
+        for holder_id, name, count, oldest in rows
+    ]
+
+
+def invalidate():
+    """Drop the cached aggregates (stays of deleted documents disappear by FK cascade)."""
+    with _lock:
+        _cache["log_id"] = None
+
+
+def dwell_report(db):
+    """Dwell statistics, refreshing the materialized stays and the cached aggregates if logs were added."""
+    latest = db.query(func.max(sql_models.DocumentLog.id)).scalar() or 0
+    with _lock:
+        if _cache["log_id"] != latest:
+            refresh(db, latest)
+            by_holder, by_month = _aggregate(db)
+            _cache["result"] = {"by_holder": by_holder, "by_month": by_month}
+            _cache["log_id"] = latest
+        cached = _cache["result"]
+    return {"as_of_log_id": latest, **cached, "open": open_stays(db)}
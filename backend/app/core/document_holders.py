@@ -0,0 +1,81 @@
+"""
+Document holders: the users and named offices that physical documents move between.
+
+Trackers and logs keep the holder's display name for history, plus holder_id for
+lookups. A holder name is matched on its normalized form (case and spacing ignored);
+a name equal to a user's full name resolves to that user's holder.
+"""
+from sqlalchemy import func
+
+from app.models import sql_models
+
+DocumentHolder = sql_models.DocumentHolder
+
+
+def normalize(name):
+    return " ".join((name or "").split()).casefold()
+
+
+def find_holder(db, name):
+    """Existing holder for a name, or None."""
+    key = normalize(name)
+    if not key:
+        return None
+    return db.query(DocumentHolder).filter(DocumentHolder.normalized_name == key).first()
+
+
+def user_holder_id(db, user_id):
+    """Holder id of a user, or None if they never held a document."""
+    return db.query(DocumentHolder.id).filter(DocumentHolder.user_id == user_id).scalar()
+
+
+def holder_for_user(db, user):
+    """The holder row of a user, created on first use."""
+    holder = db.query(DocumentHolder).filter(DocumentHolder.user_id == user.id).first()
+    if holder is None:
+        holder = find_holder(db, user.full_name)
+        if holder is not None and holder.user_id is None:
+            holder.user_id = user.id # Office-style holder created earlier under the user's name
+        else:
+            holder = DocumentHolder(name=user.full_name, normalized_name=_free_key(db, user), user_id=user.id)
+            db.add(holder)
+        db.flush()
+    return holder
+
+
+def resolve_holder(db, name):
+    """Holder for a free-text name: an existing holder, a user with that full name, or a new office."""
+    holder = find_holder(db, name)
+    if holder is not None:
+        return holder
+    key = normalize(name)
+    user = db.query(sql_models.User).filter(
+        func.lower(func.trim(sql_models.User.full_name)) == key
+    ).first()
+    if user is not None:
+        return holder_for_user(db, user)
+    holder = DocumentHolder(name=" ".join(name.split()), normalized_name=key)
+    db.add(holder)
+    db.flush()
+    return holder
+
+
+def rename_user_holder(db, user):
+    """Follow a user's new full name on their holder and on the documents they currently hold."""
+    holder = db.query(DocumentHolder).filter(DocumentHolder.user_id == user.id).first()
+    if holder is None or holder.name == user.full_name:
+        return
+    holder.name = user.full_name
+    holder.normalized_name = _free_key(db, user, holder.id)
+    db.query(sql_models.DocumentTracker).filter(
+        sql_models.DocumentTracker.holder_id == holder.id
+    ).update({sql_models.DocumentTracker.current_holder: user.full_name}, synchronize_session=False)
+
+
+def _free_key(db, user, holder_id=None):
+    """Normalized full name of a user, suffixed with the user id if another holder already uses it."""
+    key = normalize(user.full_name)
+    taken = db.query(DocumentHolder.id).filter(
+        DocumentHolder.normalized_name == key, DocumentHolder.id != holder_id
+    ).first()
+    return f"{key}#{user.id}" if taken else key
@@ -0,0 +1,110 @@
+"""
+Full-text search over document trackers (SQLite FTS5).
+
+document_search holds one row per document (rowid = document id) with its title,
+reference number and description plus the holders and notes of all its logs.
+Triggers on document_trackers and document_logs rebuild a document's row whenever
+it or one of its logs changes, so every write path keeps the index current.
+Results are ranked with BM25, weighting the title and reference number highest.
+"""
+import re
+
+from sqlalchemy import text
+
+SEARCH_TABLE = "document_search"
+SEARCH_COLUMNS = ["title", "ref_number", "description", "holders", "notes"]
+# bm25() weights, in SEARCH_COLUMNS order
+COLUMN_WEIGHTS = [10.0, 8.0, 3.0, 2.0, 1.0]
+HIGHLIGHT = ("<mark>", "</mark>")
+
+_CREATE_TABLE = f"""CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+    {", ".join(SEARCH_COLUMNS)},
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)"""
+
+
+def _refresh(document_id):
+    """Statements replacing the index row of one document (nothing is inserted if it no longer exists)."""
+    return f"""
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = {document_id};
+        INSERT INTO {SEARCH_TABLE} (rowid, {", ".join(SEARCH_COLUMNS)})
+        SELECT d.id, d.title, d.ref_number, d.description,
+            (SELECT group_concat(l.to_holder, ' ') FROM document_logs l WHERE l.document_id = d.id),
+            (SELECT group_concat(l.note, ' ') FROM document_logs l WHERE l.document_id = d.id)
+        FROM document_trackers d WHERE d.id = {document_id};"""
+
+
+SEARCH_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_document_search_insert AFTER INSERT ON document_trackers BEGIN
+        {_refresh("NEW.id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_document_search_update
+    AFTER UPDATE OF title, ref_number, description ON document_trackers BEGIN
+        {_refresh("NEW.id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_document_search_delete AFTER DELETE ON document_trackers BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_document_log_search_insert AFTER INSERT ON document_logs BEGIN
+        {_refresh("NEW.document_id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_document_log_search_update
+    AFTER UPDATE OF note, to_holder ON document_logs BEGIN
+        {_refresh("NEW.document_id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_document_log_search_delete AFTER DELETE ON document_logs BEGIN
+        {_refresh("OLD.document_id")}
+    END""",
+]
+
+
+def install_search_index(engine):
+    """Create the FTS table and its triggers if missing; a new table is filled from existing documents."""
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+        ).first()
+        if not exists:
+            conn.execute(text(_CREATE_TABLE))
+            conn.execute(text(f"""
+                INSERT INTO {SEARCH_TABLE} (rowid, {", ".join(SEARCH_COLUMNS)})
+                SELECT d.id, d.title, d.ref_number, d.description,
+                    group_concat(l.to_holder, ' '), group_concat(l.note, ' ')
+                FROM document_trackers d LEFT JOIN document_logs l ON l.document_id = d.id
+                GROUP BY d.id
+            """))
+        for ddl in SEARCH_TRIGGERS:
+            conn.execute(text(ddl))
+
+
+def match_query(q):
+    """
+    FTS5 query for free text: every word must match, as a prefix ("fin memo" finds
+    "Finance memorandum"). Words are quoted, so operators and punctuation are inert.
+    Returns None if q has no searchable word.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search(db, q, project_id=None, limit=20):
+    """[(document id, snippet)] best match first."""
+    match = match_query(q)
+    if match is None:
+        return []
+    weights = ", ".join(str(w) for w in COLUMN_WEIGHTS)
+    sql = f"""
+        SELECT s.rowid, snippet({SEARCH_TABLE}, -1, :hl_start, :hl_end, '…', 12)
+        FROM {SEARCH_TABLE} s
+        {"JOIN document_trackers d ON d.id = s.rowid" if project_id else ""}
+        WHERE {SEARCH_TABLE} MATCH :match {"AND d.project_id = :project_id" if project_id else ""}
+        ORDER BY bm25({SEARCH_TABLE}, {weights})
+        LIMIT :limit
+    """
+    return db.execute(text(sql), {
+        "match": match, "project_id": project_id, "limit": limit,
+        "hl_start": HIGHLIGHT[0], "hl_end": HIGHLIGHT[1]
+    }).all()
@@ -0,0 +1,174 @@
+"""
+Persisted background jobs with an in-process worker pool.
+
+Jobs are rows in the jobs table and run on a small thread pool. A worker claims a job
+by flipping it from queued to running, calls the registered handler with its own
+session and commits the handler's work together with the final job status, so a job
+either completes as a whole or leaves nothing behind and can simply run again.
+At startup, jobs left running by a stopped process go back to the queue (up to
+MAX_ATTEMPTS) and every queued job is handed to the pool again.
+"""
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update, func
+
+from app.db.database import SessionLocal, DB_DIR
+from app.models import sql_models
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.path.join(DB_DIR, "jobs")
+MAX_WORKERS = 2
+MAX_ATTEMPTS = 3
+
+Job = sql_models.Job
+JobStatus = sql_models.JobStatus
+
+_handlers = {}
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job-worker")
+_live_progress = {} # job_id -> (progress, message) while a handler runs
+_lock = threading.Lock()
+
+
+def handler(kind):
+    """Register fn(db, ctx) -> result dict as the handler for a job kind. The worker commits."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+class JobContext:
+    def __init__(self, job_id, params):
+        self.job_id = job_id
+        self.params = params or {}
+        self.result_path = None
+        self._after_commit = []
+        self._cleanup = []
+
+    def report(self, progress, message=None):
+        """Live progress (0 - 100), visible to pollers while the job runs."""
+        with _lock:
+            _live_progress[self.job_id] = (progress, message)
+
+    def after_commit(self, fn):
+        """Run fn once the job's work is committed (cache invalidation and the like)."""
+        self._after_commit.append(fn)
+
+    def remove_when_done(self, path):
+        """Delete a file once the job has succeeded or failed (kept if the process dies, for the retry)."""
+        self._cleanup.append(path)
+
+    def output_path(self, suffix):
+        """Path for the job's result file, served by GET /jobs/{id}/download."""
+        os.makedirs(JOBS_DIR, exist_ok=True)
+        self.result_path = os.path.join(JOBS_DIR, f"job_{self.job_id}{suffix}")
+        return self.result_path
+
+
+def spool_path(suffix):
+    """Fresh file path for job input (e.g. an uploaded workbook) that must outlive the request."""
+    uploads = os.path.join(JOBS_DIR, "uploads")
+    os.makedirs(uploads, exist_ok=True)
+    return os.path.join(uploads, f"{uuid.uuid4().hex}{suffix}")
+
+
+def submit(db, kind, params, user_id=None):
+    """Persist a queued job and hand it to the pool. Returns the job row."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind, params=params, status=JobStatus.QUEUED.value, created_by_id=user_id)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _executor.submit(_run, job.id)
+    return job
+
+
+def _run(job_id):
+    db = SessionLocal()
+    ctx = None
+    try:
+        claimed = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == JobStatus.QUEUED.value).values(
+                status=JobStatus.RUNNING.value, started_at=func.now(), attempts=Job.attempts + 1
+            )
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return # Already taken or finished
+
+        job = db.get(Job, job_id)
+        ctx = JobContext(job.id, job.params)
+        try:
+            result = _handlers[job.kind](db, ctx)
+            job.status = JobStatus.SUCCEEDED.value
+            job.progress = 100.0
+            job.message = None
+            job.result = result
+            job.result_path = ctx.result_path
+            job.finished_at = func.now()
+            db.commit()
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            db.rollback()
+            # A partial result file is never served, don't leave it in storage
+            if ctx.result_path and os.path.exists(ctx.result_path):
+                os.remove(ctx.result_path)
+            db.execute(
+                update(Job).where(Job.id == job_id).values(
+                    status=JobStatus.FAILED.value, error=str(e) or e.__class__.__name__, finished_at=func.now()
+                )
+            )
+            db.commit()
+            return
+
+        for fn in ctx._after_commit:
+            try:
+                fn()
+            except Exception:
+                logger.exception("After-commit hook of job %s failed", job_id)
+    finally:
+        if ctx is not None:
+            for path in ctx._cleanup:
+                if os.path.exists(path):
+                    os.remove(path)
+        with _lock:
+            _live_progress.pop(job_id, None)
+        db.close()
+
+
+def live_progress(job):
+    """(progress, message) of a job, using the in-memory value while it runs."""
+    with _lock:
+        live = _live_progress.get(job.id)
+    return live if live is not None else (job.progress or 0.0, job.message)
+
+
+def resume_jobs():
+    """Requeue jobs interrupted by a restart and resubmit everything queued."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Job).where(Job.status == JobStatus.RUNNING.value, Job.attempts < MAX_ATTEMPTS).values(
+                status=JobStatus.QUEUED.value, message="Resumed after restart"
+            )
+        )
+        db.execute(
+            update(Job).where(Job.status == JobStatus.RUNNING.value).values(
+                status=JobStatus.FAILED.value, error="Interrupted too many times", finished_at=func.now()
+            )
+        )
+        db.commit()
+        queued = [job_id for (job_id,) in db.query(Job.id).filter(
+            Job.status == JobStatus.QUEUED.value
+        ).order_by(Job.id).all()]
+    finally:
+        db.close()
+    for job_id in queued:
+        _executor.submit(_run, job_id)
+    return len(queued)
@@ -0,0 +1,103 @@
+"""
+Stored progress rollups for WBS phases and projects.
+
+Only leaf tasks (tasks without sub-tasks) count, as in the project task_progress.
+Weighted progress weighs each leaf by its planned duration in days (minimum 1 day).
+One aggregate query per project collects leaf totals per phase, the nested phase tree
+is rolled up in Python and the results are written back to wbs / projects.
+"""
+from sqlalchemy import select, update, func, case, exists, bindparam
+from app.models import sql_models
+
+
+def _percent(part, whole):
+    return (part / whole) * 100 if whole else 0.0
+
+
+def compute_project_rollups(db, project_id):
+    """Return ({wbs_id: (progress, weighted_progress)}, (project_progress, project_weighted_progress))."""
+    tasks = sql_models.Task.__table__
+    wbs = sql_models.WBS.__table__
+    child = tasks.alias("child")
+
+    weight = func.max(func.coalesce(func.julianday(tasks.c.planned_end) - func.julianday(tasks.c.planned_start), 1), 1)
+    is_done = func.lower(tasks.c.status) == "completed"
+
+    leaf_totals = db.execute(
+        select(
+            tasks.c.wbs_id,
+            func.count(),
+            func.sum(case((is_done, 1), else_=0)),
+            func.sum(weight),
+            func.sum(case((is_done, weight), else_=0))
+        ).select_from(
+            tasks.join(wbs, tasks.c.wbs_id == wbs.c.id)
+        ).where(
+            wbs.c.project_id == project_id,
+            ~exists().where(child.c.parent_id == tasks.c.id)
+        ).group_by(tasks.c.wbs_id)
+    ).all()
+    phases = db.execute(select(wbs.c.id, wbs.c.parent_id).where(wbs.c.project_id == project_id)).all()
+
+    # [leaves, done, weight, done_weight] per phase, own tasks first
+    totals = {phase_id: [0, 0, 0.0, 0.0] for phase_id, _ in phases}
+    for wbs_id, leaves, done, weight_sum, done_weight in leaf_totals:
+        totals[wbs_id] = [leaves, done or 0, weight_sum or 0.0, done_weight or 0.0]
+
+    # Post-order over the phase tree: add each phase into its parent
+    children = {}
+    roots = []
+    for phase_id, parent_id in phases:
+        if parent_id in totals and parent_id != phase_id:
+            children.setdefault(parent_id, []).append(phase_id)
+        else:
+            roots.append(phase_id)
+    order = []
+    stack = list(roots)
+    while stack:
+        phase_id = stack.pop()
+        order.append(phase_id)
+        stack.extend(children.get(phase_id, []))
+    parent_of = dict(phases)
+    root_set = set(roots)
+    for phase_id in reversed(order):
+        parent_id = parent_of.get(phase_id)
+        if phase_id not in root_set:
+            for k in range(4):
+                totals[parent_id][k] += totals[phase_id][k]
+
+    project = [0, 0, 0.0, 0.0]
+    for phase_id in roots:
+        for k in range(4):
+            project[k] += totals[phase_id][k]
+
+    phase_progress = {
+        phase_id: (_percent(t[1], t[0]), _percent(t[3], t[2])) for phase_id, t in totals.items()
+    }
+    return phase_progress, (_percent(project[1], project[0]), _percent(project[3], project[2]))
+
+
+def refresh_project_rollups(db, project_id):
+    """Recompute and store rollups for a project. Flushes pending changes first; the caller commits."""
+    db.flush()
+    phase_progress, (progress, weighted) = compute_project_rollups(db, project_id)
+
+    wbs = sql_models.WBS.__table__
+    if phase_progress:
+        db.execute(
+            update(wbs).where(wbs.c.id == bindparam("phase_id")).values(
+                progress=bindparam("new_progress"),
+                weighted_progress=bindparam("new_weighted_progress")
+            ),
+            [
+                {"phase_id": phase_id, "new_progress": p, "new_weighted_progress": w}
+                for phase_id, (p, w) in phase_progress.items()
+            ]
+        )
+    projects = sql_models.Project.__table__
+    db.execute(
+        update(projects).where(projects.c.id == project_id).values(
+            weighted_progress=weighted, progress_updated_at=func.now()
+        )
+    )
+    return progress, weighted
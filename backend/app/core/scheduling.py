@@ -0,0 +1,283 @@
+"""
+Critical-path scheduling for project tasks.
+
+Tasks are linked by finish-to-start dependencies with a lag in days (negative lag = lead).
+All dates are whole days (date ordinals). A task's planned start acts as a
+"start no earlier than" constraint, its duration is planned_end - planned_start.
+
+The schedule is computed with one topological pass forward (early dates) and one
+backward (late dates), O(V + E). Schedules are cached per project in-process and
+updated incrementally when a single task's dates change.
+"""
+import heapq
+import threading
+from datetime import date
+
+
+class ScheduleCycleError(ValueError):
+    """Raised when the dependency graph contains a cycle."""
+
+    def __init__(self, task_ids):
+        self.task_ids = sorted(task_ids)
+        super().__init__(f"Dependency cycle between tasks {self.task_ids}")
+
+
+def to_day(value):
+    # datetime.toordinal() ignores the time part, same as date.toordinal()
+    return value.toordinal() if value is not None else None
+
+
+def from_day(day):
+    return date.fromordinal(day) if day is not None else None
+
+
+def _task_window(planned_start, planned_end, due_date):
+    """(start_day, duration_days, due_day) for a task, falling back to the due date when plans are missing."""
+    due = to_day(due_date)
+    finish = to_day(planned_end)
+    if finish is None:
+        finish = due
+    start = to_day(planned_start)
+    if start is None:
+        start = finish
+    if start is None:
+        return 0, 0, due
+    duration = max(0, finish - start) if finish is not None else 0
+    return start, duration, due
+
+
+class ProjectSchedule:
+    def __init__(self, tasks, dependencies):
+        """
+        tasks: iterable of (task_id, planned_start, planned_end, due_date)
+        dependencies: iterable of (predecessor_id, successor_id, lag_days)
+        """
+        self.ids = []
+        self.index = {}
+        self.start = []
+        self.duration = []
+        self.due = []
+        for task_id, planned_start, planned_end, due_date in tasks:
+            start, duration, due = _task_window(planned_start, planned_end, due_date)
+            self.index[task_id] = len(self.ids)
+            self.ids.append(task_id)
+            self.start.append(start)
+            self.duration.append(duration)
+            self.due.append(due)
+
+        n = len(self.ids)
+        self.succ = succ = [[] for _ in range(n)]
+        self.pred = pred = [[] for _ in range(n)]
+        index = self.index
+        for predecessor_id, successor_id, lag in dependencies:
+            p = index.get(predecessor_id)
+            s = index.get(successor_id)
+            if p is None or s is None:
+                continue
+            lag = lag or 0
+            succ[p].append((s, lag))
+            pred[s].append((p, lag))
+
+        self.order = self._topological_order()
+        self.topo_pos = [0] * n
+        for pos, i in enumerate(self.order):
+            self.topo_pos[i] = pos
+
+        self.es = [0] * n
+        self.ef = [0] * n
+        self.ls = [0] * n
+        self.lf = [0] * n
+        self.finish = None
+        self._forward_all()
+        self._backward_all()
+
+    # --- Graph ---
+
+    def _topological_order(self):
+        n = len(self.ids)
+        indegree = [len(p) for p in self.pred]
+        queue = [i for i in range(n) if indegree[i] == 0]
+        order = []
+        while queue:
+            i = queue.pop()
+            order.append(i)
+            for s, _ in self.succ[i]:
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    queue.append(s)
+        if len(order) < n:
+            raise ScheduleCycleError(self.ids[i] for i in range(n) if indegree[i] > 0)
+        return order
+
+    # --- Passes ---
+
+    def _early_start(self, i):
+        es = self.start[i]
+        for p, lag in self.pred[i]:
+            candidate = self.ef[p] + lag
+            if candidate > es:
+                es = candidate
+        return es
+
+    def _late_finish(self, i):
+        lf = self.finish
+        for s, lag in self.succ[i]:
+            candidate = self.ls[s] - lag
+            if candidate < lf:
+                lf = candidate
+        return lf
+
+    def _forward_all(self):
+        es, ef, start, duration, pred = self.es, self.ef, self.start, self.duration, self.pred
+        for i in self.order:
+            early = start[i]
+            for p, lag in pred[i]:
+                if ef[p] + lag > early:
+                    early = ef[p] + lag
+            es[i] = early
+            ef[i] = early + duration[i]
+        self.finish = max(ef) if ef else None
+
+    def _backward_all(self):
+        ls, lf, duration, succ, finish = self.ls, self.lf, self.duration, self.succ, self.finish
+        for i in reversed(self.order):
+            late = finish
+            for s, lag in succ[i]:
+                if ls[s] - lag < late:
+                    late = ls[s] - lag
+            lf[i] = late
+            ls[i] = late - duration[i]
+
+    def update_task(self, task_id, planned_start, planned_end, due_date):
+        """
+        Apply new dates for one task and propagate only through the affected part of the graph.
+        Returns the ids of tasks whose early or late dates changed.
+        """
+        i = self.index[task_id]
+        self.start[i], self.duration[i], self.due[i] = _task_window(planned_start, planned_end, due_date)
+        changed = {i}
+
+        # Forward: walk successors in topological order while early finish keeps moving
+        heap = [(self.topo_pos[i], i)]
+        queued = {i}
+        while heap:
+            _, j = heapq.heappop(heap)
+            es = self._early_start(j)
+            ef = es + self.duration[j]
+            if j != i and ef == self.ef[j] and es == self.es[j]:
+                continue
+            moved = ef != self.ef[j]
+            self.es[j], self.ef[j] = es, ef
+            changed.add(j)
+            if moved:
+                for s, _ in self.succ[j]:
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(heap, (self.topo_pos[s], s))
+
+        finish = max(self.ef)
+        if finish != self.finish:
+            # Every sink's late finish moves with the project finish
+            self.finish = finish
+            self._backward_all()
+            return {self.ids[j] for j in range(len(self.ids))}
+
+        # Backward: only the edited task's duration changed, walk predecessors while late start moves
+        heap = [(-self.topo_pos[i], i)]
+        queued = {i}
+        while heap:
+            _, j = heapq.heappop(heap)
+            lf = self._late_finish(j)
+            ls = lf - self.duration[j]
+            if j != i and ls == self.ls[j]:
+                continue
+            self.lf[j], self.ls[j] = lf, ls
+            changed.add(j)
+            for p, _ in self.pred[j]:
+                if p not in queued:
+                    queued.add(p)
+                    heapq.heappush(heap, (-self.topo_pos[p], p))
+        return {self.ids[j] for j in changed}
+
+    # --- Results ---
+
+    def total_float(self, i):
+        return self.ls[i] - self.es[i]
+
+    def critical_path(self):
+        """One driving chain of zero-float tasks from the project start to the project finish."""
+        if not self.ids:
+            return []
+        critical = [i for i in self.order if self.total_float(i) <= 0]
+        if not critical:
+            return []
+        # Walk back from the critical task that finishes last along driving predecessors
+        current = max(critical, key=lambda i: (self.ef[i], -self.topo_pos[i]))
+        path = [current]
+        while True:
+            driver = None
+            for p, lag in self.pred[current]:
+                if self.total_float(p) <= 0 and self.ef[p] + lag == self.es[current]:
+                    driver = p
+                    break
+            if driver is None:
+                break
+            path.append(driver)
+            current = driver
+        return [self.ids[i] for i in reversed(path)]
+
+    def task_result(self, i):
+        slip = self.ef[i] - self.due[i] if self.due[i] is not None else 0
+        return {
+            "task_id": self.ids[i],
+            "early_start": from_day(self.es[i]),
+            "early_finish": from_day(self.ef[i]),
+            "late_start": from_day(self.ls[i]),
+            "late_finish": from_day(self.lf[i]),
+            "total_float": self.total_float(i),
+            "slip_days": max(0, slip),
+            "is_critical": self.total_float(i) <= 0
+        }
+
+    def to_dict(self):
+        return {
+            "project_start": from_day(min(self.es)) if self.es else None,
+            "project_finish": from_day(self.finish),
+            "critical_path": self.critical_path(),
+            "tasks": [self.task_result(i) for i in self.order]
+        }
+
+
+# --- Per-project cache ---
+# Kept in-process; write endpoints call update_cached_task_dates / invalidate_project_schedule.
+
+_schedules = {}
+_lock = threading.Lock()
+
+
+def get_project_schedule(project_id, loader):
+    """Schedule of a project as a dict, building and caching it with loader() -> (tasks, dependencies) on a miss."""
+    with _lock:
+        schedule = _schedules.get(project_id)
+        if schedule is None:
+            tasks, dependencies = loader()
+            schedule = ProjectSchedule(tasks, dependencies)
+            _schedules[project_id] = schedule
+        return schedule.to_dict()
+
+
+def update_cached_task_dates(project_id, task_id, planned_start, planned_end, due_date):
+    with _lock:
+        schedule = _schedules.get(project_id)
+        if schedule is None:
+            return
+        if task_id not in schedule.index:
+            _schedules.pop(project_id, None)
+            return
+        schedule.update_task(task_id, planned_start, planned_end, due_date)
+
+
+def invalidate_project_schedule(*project_ids):
+    with _lock:
+        for project_id in project_ids:
+            _schedules.pop(project_id, None)
@@ -0,0 +1,99 @@
+"""
+Content-addressed storage for document signatures.
+
+Signatures arrive as base64 images (usually a canvas data URL). They are decoded
+once and written as binary files named after the SHA-256 of their bytes, so the
+same image is stored only once and a file never changes after it is written.
+Document logs only keep the hash.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+
+from app.db.database import DB_DIR
+
+SIGNATURE_DIR = os.path.join(DB_DIR, "signatures")
+MAX_SIGNATURE_BYTES = 2 * 1024 * 1024
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_RE = re.compile(r"^data:[\w.+-]+/[\w.+-]+;base64,", re.IGNORECASE)
+
+MEDIA_TYPES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"RIFF", "image/webp")
+]
+
+
+def is_valid_hash(value):
+    return bool(value) and _HASH_RE.match(value) is not None
+
+
+def blob_path(content_hash):
+    # Two-character fan-out keeps directories small
+    return os.path.join(SIGNATURE_DIR, content_hash[:2], content_hash)
+
+
+def decode(value):
+    """Bytes of a base64 image or data URL; ValueError if it is not a supported image."""
+    payload = _DATA_URL_RE.sub("", value.strip(), count=1)
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Signature is not valid base64 data")
+    if len(data) > MAX_SIGNATURE_BYTES:
+        raise ValueError("Signature image is too large")
+    if media_type(data) is None:
+        raise ValueError("Signature must be a PNG, JPEG or WebP image")
+    return data
+
+
+def decode_raw(value):
+    """
+    Bytes of a stored value without the image checks, for migrating old rows: the decoded
+    base64 (padding repaired) if it is base64, else the text itself, so nothing is lost.
+    """
+    payload = _DATA_URL_RE.sub("", value.strip(), count=1)
+    try:
+        return base64.b64decode(payload + "=" * (-len(payload) % 4), validate=True)
+    except (binascii.Error, ValueError):
+        return value.encode("utf-8")
+
+
+def media_type(data):
+    for magic, kind in MEDIA_TYPES:
+        if data.startswith(magic):
+            return kind
+    return None
+
+
+def put(data):
+    """Store bytes (once) and return their hash."""
+    content_hash = hashlib.sha256(data).hexdigest()
+    path = blob_path(content_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return content_hash
+
+
+def store_signature(value):
+    """Decode a base64 signature, store it and return its hash."""
+    return put(decode(value))
+
+
+def read(content_hash):
+    """(bytes, media type) of a stored signature, or None."""
+    if not is_valid_hash(content_hash):
+        return None
+    path = blob_path(content_hash)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, media_type(data) or "application/octet-stream"
@@ -0,0 +1,103 @@
+"""
+Streaming export of project tasks.
+
+Rows are read with a server-side cursor in fixed-size batches and written straight
+out: CSV is yielded chunk by chunk, Excel goes through an openpyxl write-only workbook
+spooled to a temporary file. Memory stays flat regardless of the task count.
+"""
+import csv
+import io
+import os
+import tempfile
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from sqlalchemy import select
+
+from app.models import sql_models
+
+EXPORT_COLUMNS = [
+    "Phase Name", "Task Name", "Description", "Assignee Email", "Assignee Name", "Status",
+    "Start Date (YYYY-MM-DD)", "Finish Date (YYYY-MM-DD)", "Due Date (YYYY-MM-DD)",
+    "Task ID" # Hidden in the workbook; lets a re-import in upsert mode update these tasks
+]
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+
+def _day(value):
+    return value.strftime("%Y-%m-%d") if value else ""
+
+
+def iter_task_rows(db, project_id):
+    """Export rows of a project in phase / position order, fetched BATCH_SIZE at a time."""
+    wbs = sql_models.WBS.__table__
+    tasks = sql_models.Task.__table__
+    users = sql_models.User.__table__
+    query = select(
+        wbs.c.name, tasks.c.name, tasks.c.description, users.c.email, users.c.full_name,
+        tasks.c.status, tasks.c.planned_start, tasks.c.planned_end, tasks.c.due_date, tasks.c.id
+    ).select_from(
+        tasks.join(wbs, tasks.c.wbs_id == wbs.c.id).outerjoin(users, tasks.c.assignee_id == users.c.id)
+    ).where(wbs.c.project_id == project_id).order_by(wbs.c.id, tasks.c.position, tasks.c.id)
+
+    result = db.execute(query.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+    for partition in result.partitions():
+        for phase, name, description, email, full_name, status, start, end, due, task_id in partition:
+            yield (
+                phase, name, description or "", email or "", full_name or "",
+                status.value if hasattr(status, "value") else status,
+                _day(start), _day(end), _day(due), task_id
+            )
+
+
+def iter_csv(rows):
+    """Yield the CSV (UTF-8 with BOM so Excel detects the encoding) in chunks of about CHUNK_SIZE bytes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(rows, path):
+    """Write rows to an .xlsx file at path with a write-only (constant memory) workbook."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Tasks")
+    sheet.column_dimensions[get_column_letter(len(EXPORT_COLUMNS))].hidden = True # Task ID
+    sheet.append(EXPORT_COLUMNS)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def xlsx_tempfile(rows):
+    """Write the workbook to a temporary file and return its path (removed by iter_file)."""
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_xlsx(rows, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def iter_file(path, remove=True):
+    """Yield a file in CHUNK_SIZE pieces, deleting it afterwards."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if remove:
+            os.remove(path)
@@ -0,0 +1,569 @@
+"""
+Excel task import as a column-wise pipeline.
+
+The sheet is validated and converted per column with pandas, assignee emails are
+resolved with one IN query, missing phases are inserted in one batch and the tasks are
+bulk-inserted with executemany, appended after the existing top-level tasks of their phase.
+Rows without a task name are skipped and reported as errors with their sheet row number.
+Unknown statuses and assignee emails and unreadable dates don't lose the row: it is imported
+with the usual fallback (not started, unassigned, no date / fallback due date) and reported
+as a warning.
+In upsert mode rows are matched to existing tasks and only changed rows are written;
+a task moved to another phase takes its sub-tasks along (see TaskImporter.finish).
+Uploads are spooled to disk and read in fixed-size batches (iter_sheet_batches).
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from sqlalchemy import select, insert, update, func
+
+from app.models import sql_models
+from app.core.task_tree import task_subtree_cte
+
+PHASE_COLUMN = "Phase Name"
+TASK_COLUMN = "Task Name"
+DESCRIPTION_COLUMN = "Description"
+EMAIL_COLUMN = "Assignee Email"
+STATUS_COLUMN = "Status"
+TASK_ID_COLUMN = "Task ID" # Hidden column of the export, used by upsert imports
+DATE_COLUMNS = {
+    "planned_start": "Start Date (YYYY-MM-DD)",
+    "planned_end": "Finish Date (YYYY-MM-DD)",
+    "due_date": "Due Date (YYYY-MM-DD)"
+}
+REQUIRED_COLUMNS = [PHASE_COLUMN, TASK_COLUMN, DATE_COLUMNS["due_date"]]
+
+DEFAULT_PHASE = "Uncategorized"
+TASK_STATUSES = {s.value for s in sql_models.TaskStatus}
+MAX_REPORTED_ERRORS = 500
+# Per-import bounds; memory is about one READ_BATCH_ROWS batch regardless of the file size
+MAX_UPLOAD_BYTES = int(os.environ.get("PMS_IMPORT_MAX_BYTES", 50 * 1024 * 1024))
+MAX_IMPORT_ROWS = int(os.environ.get("PMS_IMPORT_MAX_ROWS", 200000))
+READ_BATCH_ROWS = 5000
+SPOOL_CHUNK = 1024 * 1024
+IN_CHUNK = 500 # Stay well below SQLite's bound-parameter limit
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+HEADER_ROWS = 1 # Sheet row number = frame position + HEADER_ROWS + 1
+
+
+class ImportLimitError(ValueError):
+    """Raised when an upload exceeds the configured size or row limit."""
+
+
+def missing_columns(df):
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def _text(df, column):
+    """Stripped strings of a column, '' for empty cells or a missing column."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def _blank(df, column):
+    if column not in df.columns:
+        return pd.Series(True, index=df.index)
+    values = df[column]
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def parse_dates(values):
+    """Raw cells -> datetime64 Series, NaT for empty or unparseable cells."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.tz_localize(None) if values.dt.tz is not None else values
+    parsed = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    # Excel serial day numbers
+    serial = pd.to_numeric(values, errors="coerce")
+    is_serial = parsed.isna() & serial.notna()
+    if is_serial.any():
+        parsed[is_serial] = pd.to_datetime(serial[is_serial], unit="D", origin="1899-12-30")
+    # Anything else that looks like a date (e.g. 10/02/2026), only for the leftovers
+    rest = parsed.isna() & values.notna() & ~is_serial
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest].astype(str), errors="coerce", format="mixed")
+    return parsed
+
+
+def _lookup_assignees(db, emails):
+    """{lowercased email: user id} for the given emails, one IN query per chunk."""
+    found = {}
+    emails = list(emails)
+    for i in range(0, len(emails), IN_CHUNK):
+        chunk = emails[i:i + IN_CHUNK]
+        rows = db.execute(
+            select(sql_models.User.id, func.lower(sql_models.User.email)).where(
+                func.lower(sql_models.User.email).in_(chunk)
+            )
+        ).all()
+        for user_id, email in rows:
+            found.setdefault(email, user_id)
+    return found
+
+
+def _resolve_phases(db, project_id, names):
+    """{phase name: wbs id}, inserting the missing phases in one batch. Returns (map, created count)."""
+    wbs = sql_models.WBS.__table__
+    phase_map = {}
+    for phase_id, name in db.execute(
+        select(wbs.c.id, wbs.c.name).where(wbs.c.project_id == project_id).order_by(wbs.c.id)
+    ).all():
+        phase_map.setdefault(name, phase_id)
+
+    missing = [name for name in names if name not in phase_map]
+    if missing:
+        db.execute(insert(wbs), [{"project_id": project_id, "name": name} for name in missing])
+        for phase_id, name in db.execute(
+            select(wbs.c.id, wbs.c.name).where(
+                wbs.c.project_id == project_id, wbs.c.id > max(phase_map.values(), default=0)
+            ).order_by(wbs.c.id)
+        ).all():
+            phase_map.setdefault(name, phase_id)
+    return phase_map, len(missing)
+
+
+def _next_positions(db, wbs_ids):
+    """{wbs_id: first free top-level position}."""
+    tasks = sql_models.Task.__table__
+    rows = db.execute(
+        select(tasks.c.wbs_id, func.max(tasks.c.position)).where(
+            tasks.c.wbs_id.in_(wbs_ids), tasks.c.parent_id.is_(None)
+        ).group_by(tasks.c.wbs_id)
+    ).all()
+    start = {wbs_id: 0 for wbs_id in wbs_ids}
+    for wbs_id, max_pos in rows:
+        if max_pos is not None:
+            start[wbs_id] = max_pos + 1
+    return start
+
+
+def _nullable(values):
+    """Object Series with None instead of NaN/NaT, safe to bind."""
+    values = values.astype(object)
+    return values.where(values.notna(), None)
+
+
+def _storage_dates(values):
+    """Dates formatted the way SQLAlchemy stores DateTime in SQLite, None for NaT."""
+    return _nullable(values.dt.strftime(SQLITE_DATETIME_FORMAT))
+
+
+def _issues(checks, sheet_rows, empty_row):
+    """[{"row": sheet row, "column": column, "message": ...}] for (mask, column, message) checks."""
+    issues = []
+    for mask, column, message in checks:
+        mask = mask & ~empty_row
+        if not mask.any():
+            continue
+        messages = message[mask] if isinstance(message, pd.Series) else pd.Series(message, index=mask[mask].index)
+        issues.extend(
+            {"row": int(row), "column": column, "message": text}
+            for row, text in zip(sheet_rows[mask], messages)
+        )
+    issues.sort(key=lambda e: e["row"])
+    return issues
+
+
+def validate_rows(df, project_end=None, now=None, sheet_rows=None):
+    """
+    Column-wise validation and conversion.
+    sheet_rows: sheet row number of each frame row (default: consecutive rows after the header).
+    Returns (frame of importable rows with task columns, errors, warnings). Errors are the
+    skipped rows, warnings the rows imported with a fallback value; both are lists of
+    {"row": sheet row, "column": column, "message": ...}.
+    """
+    now = now or datetime.now()
+    if sheet_rows is None:
+        sheet_rows = range(HEADER_ROWS + 1, HEADER_ROWS + 1 + len(df))
+    sheet_rows = pd.Series(list(sheet_rows), index=df.index, dtype="int64")
+    rows = pd.DataFrame(index=df.index)
+    checks = [] # Row is skipped: (mask, column, message series or str)
+    fallbacks = [] # Row is imported with a fallback value, same shape
+
+    rows["name"] = _text(df, TASK_COLUMN)
+    known_columns = [c for c in df.columns if not str(c).startswith("Unnamed")]
+    empty_row = df[known_columns].isna().all(axis=1) if known_columns else pd.Series(True, index=df.index)
+    checks.append((rows["name"].eq("") & ~empty_row, TASK_COLUMN, "Task Name is required"))
+
+    phase = _text(df, PHASE_COLUMN)
+    rows["phase"] = phase.mask(phase.eq(""), DEFAULT_PHASE)
+
+    description = _text(df, DESCRIPTION_COLUMN)
+    rows["description"] = description.where(description.ne(""), None)
+
+    status = _text(df, STATUS_COLUMN).str.lower().str.replace(" ", "_")
+    unknown_status = status.ne("") & ~status.isin(TASK_STATUSES)
+    rows["status"] = status.mask(status.eq("") | unknown_status, sql_models.TaskStatus.NOT_STARTED.value)
+    fallbacks.append((unknown_status, STATUS_COLUMN, "Unknown status '" + status + "', imported as not_started"))
+
+    for field, column in DATE_COLUMNS.items():
+        if column not in df.columns:
+            rows[field] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[us]")
+            continue
+        rows[field] = parse_dates(df[column])
+        raw = _text(df, column)
+        fallback_text = "used the fallback due date" if field == "due_date" else "left empty"
+        fallbacks.append((rows[field].isna() & ~_blank(df, column), column, "Invalid date '" + raw + "', " + fallback_text))
+
+    # Missing due date: planned finish, then the project end, then today (as before)
+    fallback = pd.Timestamp(project_end or now)
+    if fallback.tzinfo is not None:
+        fallback = fallback.tz_localize(None)
+    rows["due_date"] = rows["due_date"].fillna(rows["planned_end"]).fillna(fallback)
+
+    rows["email"] = _text(df, EMAIL_COLUMN).str.lower()
+    if TASK_ID_COLUMN in df.columns:
+        task_ids = pd.to_numeric(df[TASK_ID_COLUMN], errors="coerce")
+        rows["task_id"] = task_ids.where(task_ids % 1 == 0).astype("Int64")
+    else:
+        rows["task_id"] = pd.Series(pd.NA, index=df.index, dtype="Int64")
+
+    invalid = empty_row.copy()
+    for mask, _, _ in checks:
+        invalid |= mask
+    errors = _issues(checks, sheet_rows, empty_row)
+    # Warnings only for rows that are imported
+    warnings = _issues([(mask & ~invalid, column, message) for mask, column, message in fallbacks], sheet_rows, empty_row)
+    return rows[~invalid].assign(row=sheet_rows[~invalid]), errors, warnings
+
+
+def _existing_tasks(db, project_id):
+    """Tasks of the project in position order, with their phase name, as a frame."""
+    tasks = sql_models.Task.__table__
+    wbs = sql_models.WBS.__table__
+    columns = ["id", "wbs_id", "parent_id", "phase", "name", "description", "assignee_id", "status",
+               "planned_start", "planned_end", "due_date"]
+    rows = db.execute(
+        select(
+            tasks.c.id, tasks.c.wbs_id, tasks.c.parent_id, wbs.c.name, tasks.c.name, tasks.c.description, tasks.c.assignee_id,
+            tasks.c.status, tasks.c.planned_start, tasks.c.planned_end, tasks.c.due_date
+        ).select_from(tasks.join(wbs, tasks.c.wbs_id == wbs.c.id)).where(
+            wbs.c.project_id == project_id
+        ).order_by(tasks.c.position, tasks.c.id)
+    ).all()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def content_hash(frame):
+    """
+    Per-row hash over the imported fields. Dates compare by day, like the sheet,
+    so a time of day set in the workspace is not a change.
+    """
+    normalized = pd.DataFrame({
+        "phase": frame["phase"].astype(str),
+        "name": frame["name"].astype(str).str.strip(),
+        "description": frame["description"].fillna("").astype(str).str.strip(),
+        "assignee_id": pd.array(frame["assignee_id"], dtype="Int64").fillna(-1).astype("int64"),
+        "status": frame["status"].astype(str),
+        **{
+            field: pd.to_datetime(frame[field]).dt.strftime("%Y-%m-%d").fillna("")
+            for field in DATE_COLUMNS
+        }
+    }, index=frame.index)
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+
+def _match_existing(valid, existing):
+    """
+    Existing task id per sheet row (Int64, <NA> for new rows): by the hidden Task ID column
+    when it points into this project, otherwise the n-th (phase, task name) row of the sheet
+    pairs with the n-th existing task of that phase and name.
+    """
+    matched = valid["task_id"].where(valid["task_id"].isin(existing["id"]))
+    # One sheet row per task
+    matched = matched.mask(matched.duplicated() & matched.notna())
+
+    by_name = valid[matched.isna()]
+    free = existing[~existing["id"].isin(matched.dropna())]
+    if not by_name.empty and not free.empty:
+        left = by_name[["phase", "name"]].assign(n=by_name.groupby(["phase", "name"]).cumcount())
+        right = free[["phase", "name", "id"]].assign(n=free.groupby(["phase", "name"]).cumcount())
+        paired = left.reset_index().merge(right, on=["phase", "name", "n"]).set_index("index")["id"]
+        matched = matched.fillna(paired.reindex(matched.index))
+    return matched.astype("Int64")
+
+
+def _apply_updates(db, valid, existing, wbs_ids):
+    """
+    Write changed matched rows in one executemany.
+    Returns (updated count, unchanged count, {task id: new wbs id} of the tasks that changed phase).
+    """
+    current = existing.set_index("id").loc[valid["match_id"].astype("int64")]
+    current.index = valid.index
+    changed = content_hash(valid) != content_hash(current)
+    rows = valid[changed]
+    moved = {}
+    if not rows.empty:
+        records = pd.DataFrame({
+            "wbs_id": wbs_ids[changed],
+            "name": rows["name"],
+            "description": rows["description"],
+            "assignee_id": _nullable(rows["assignee_id"]),
+            "status": rows["status"],
+            "planned_start": _storage_dates(rows["planned_start"]),
+            "planned_end": _storage_dates(rows["planned_end"]),
+            "due_date": _storage_dates(rows["due_date"]),
+            "id": rows["match_id"].astype("int64")
+        })
+        assignments = ", ".join(f"{col} = ?" for col in records.columns[:-1])
+        db.connection().exec_driver_sql(
+            f"UPDATE tasks SET {assignments} WHERE id = ?",
+            list(records.itertuples(index=False, name=None))
+        )
+
+        # Tasks matched by id may have changed phase; their sub-tasks are moved by TaskImporter.finish
+        is_moved = records["wbs_id"].values != current.loc[changed, "wbs_id"].values
+        moved = dict(zip(records.loc[is_moved, "id"].tolist(), records.loc[is_moved, "wbs_id"].tolist()))
+    return int(changed.sum()), int((~changed).sum()), moved
+
+
+def _depth(task_id, parent_of):
+    """Number of ancestors of a task in {task id: parent id} (a parent cycle counts once)."""
+    depth, seen = 0, {task_id}
+    parent = parent_of.get(task_id)
+    while parent is not None and parent not in seen:
+        seen.add(parent)
+        depth += 1
+        parent = parent_of.get(parent)
+    return depth
+
+
+def _apply_moves(db, moved, parent_of):
+    """
+    Carry the sub-tasks of tasks moved to another phase along with them, then make every moved
+    task whose parent is now in another phase a top-level task of its new phase, after the
+    existing ones. Parents are processed first, so a sub-task the sheet puts in a phase of its
+    own ends up there. Returns the number of tasks detached from their parent.
+    """
+    tasks = sql_models.Task.__table__
+    for task_id in sorted(moved, key=lambda t: _depth(t, parent_of)):
+        subtree = task_subtree_cte([task_id])
+        db.execute(update(tasks).where(tasks.c.id.in_(select(subtree.c.id))).values(wbs_id=moved[task_id]))
+
+    parents = tasks.alias("parent")
+    ids = list(moved)
+    detached = []
+    for i in range(0, len(ids), IN_CHUNK):
+        detached.extend(db.execute(
+            select(tasks.c.id, tasks.c.wbs_id, tasks.c.position).select_from(
+                tasks.join(parents, parents.c.id == tasks.c.parent_id)
+            ).where(tasks.c.id.in_(ids[i:i + IN_CHUNK]), parents.c.wbs_id != tasks.c.wbs_id)
+        ).all())
+    if not detached:
+        return 0
+
+    frame = pd.DataFrame(detached, columns=["id", "wbs_id", "position"]).sort_values(["position", "id"])
+    start = _next_positions(db, frame["wbs_id"].unique().tolist())
+    positions = frame.groupby("wbs_id").cumcount() + frame["wbs_id"].map(start)
+    db.connection().exec_driver_sql(
+        "UPDATE tasks SET parent_id = NULL, position = ? WHERE id = ?",
+        list(zip(positions.astype("int64").tolist(), frame["id"].astype("int64").tolist()))
+    )
+    return len(frame)
+
+
+class TaskImporter:
+    """
+    Imports a sheet into one project batch by batch inside the caller's transaction.
+    Assignee emails and, in upsert mode, the existing tasks are looked up once and reused;
+    a task matched by one batch is not matched again by a later one. Call finish() after
+    the last batch.
+    """
+
+    def __init__(self, db, project, mode="append"):
+        self.db = db
+        self.project = project
+        self.mode = mode
+        self.existing = _existing_tasks(db, project.id) if mode == "upsert" else None
+        # Hierarchy before the import, to move parents before their sub-tasks
+        self.parent_of = {} if self.existing is None else {
+            int(task_id): (int(parent_id) if pd.notna(parent_id) else None)
+            for task_id, parent_id in zip(self.existing["id"], self.existing["parent_id"])
+        }
+        self.moved = {}
+        self.email_map = {}
+        self.errors = []
+        self.warnings = []
+        self.created = self.updated = self.unchanged = self.phases_created = 0
+
+    def add_batch(self, df, sheet_rows=None):
+        db = self.db
+        valid, errors, warnings = validate_rows(df, project_end=self.project.end_date, sheet_rows=sheet_rows)
+        self.errors.extend(errors)
+        self.warnings.extend(warnings)
+
+        # Assignees: one lookup for the emails not seen in earlier batches
+        emails = valid["email"]
+        unseen = [email for email in emails[emails.ne("")].unique() if email not in self.email_map]
+        if unseen:
+            found = _lookup_assignees(db, unseen)
+            self.email_map.update({email: found.get(email) for email in unseen})
+        valid["assignee_id"] = emails.map(self.email_map).astype("Int64")
+        unknown = emails.ne("") & valid["assignee_id"].isna()
+        if unknown.any():
+            self.warnings.extend(
+                {"row": int(row), "column": EMAIL_COLUMN, "message": f"Unknown assignee email '{email}', imported unassigned"}
+                for row, email in zip(valid.loc[unknown, "row"], emails[unknown])
+            )
+        if valid.empty:
+            return
+
+        phase_map, created_phases = _resolve_phases(db, self.project.id, valid["phase"].unique().tolist())
+        self.phases_created += created_phases
+        wbs_ids = valid["phase"].map(phase_map).astype("int64")
+
+        new_rows = valid
+        if self.mode == "upsert":
+            valid = valid.assign(match_id=_match_existing(valid, self.existing))
+            is_match = valid["match_id"].notna()
+            if is_match.any():
+                updated, unchanged, moved = _apply_updates(db, valid[is_match], self.existing, wbs_ids[is_match])
+                self.updated += updated
+                self.unchanged += unchanged
+                self.moved.update(moved)
+                self.existing = self.existing[~self.existing["id"].isin(valid.loc[is_match, "match_id"].astype("int64"))]
+            new_rows, wbs_ids = valid[~is_match], wbs_ids[~is_match]
+
+        if not new_rows.empty:
+            self._insert(new_rows, wbs_ids)
+            self.created += len(new_rows)
+
+    def _insert(self, new_rows, wbs_ids):
+        start = _next_positions(self.db, wbs_ids.unique().tolist())
+        positions = wbs_ids.groupby(wbs_ids).cumcount() + wbs_ids.map(start)
+
+        records = pd.DataFrame({
+            "wbs_id": wbs_ids,
+            "name": new_rows["name"],
+            "description": new_rows["description"],
+            "assignee_id": _nullable(new_rows["assignee_id"]),
+            "status": new_rows["status"],
+            "position": positions.astype("int64"),
+            "planned_start": _storage_dates(new_rows["planned_start"]),
+            "planned_end": _storage_dates(new_rows["planned_end"]),
+            "due_date": _storage_dates(new_rows["due_date"])
+        })
+        # Plain DBAPI executemany over tuples: no per-value ORM/type processing
+        self.db.connection().exec_driver_sql(
+            f"INSERT INTO tasks ({', '.join(records.columns)}) VALUES ({', '.join('?' * len(records.columns))})",
+            list(records.itertuples(index=False, name=None))
+        )
+
+    def finish(self):
+        """Apply the phase moves collected over all batches (see _apply_moves)."""
+        if self.moved:
+            _apply_moves(self.db, self.moved, self.parent_of)
+            self.moved = {}
+
+    def result(self):
+        errors = sorted(self.errors, key=lambda e: e["row"])
+        warnings = sorted(self.warnings, key=lambda e: e["row"])
+        return {
+            "mode": self.mode,
+            "tasks_created": self.created,
+            "tasks_updated": self.updated,
+            "tasks_unchanged": self.unchanged,
+            "phases_created": self.phases_created,
+            "rows_skipped": len({e["row"] for e in errors}),
+            "error_count": len(errors),
+            "errors": errors[:MAX_REPORTED_ERRORS],
+            "rows_with_warnings": len({e["row"] for e in warnings}),
+            "warning_count": len(warnings),
+            "warnings": warnings[:MAX_REPORTED_ERRORS]
+        }
+
+
+def import_tasks(db, project, df, mode="append"):
+    """
+    Validate a whole sheet and write its tasks into the project.
+    mode "append" inserts every row; "upsert" updates the matching existing task instead
+    (see _match_existing), skips rows whose content hash is unchanged and inserts the rest.
+    Flushes only; the caller refreshes rollups and commits.
+    """
+    importer = TaskImporter(db, project, mode)
+    importer.add_batch(df)
+    importer.finish()
+    return importer.result()
+
+
+# --- Streaming upload ingestion ---
+
+async def spool_upload(upload, path, max_bytes=None):
+    """Copy an UploadFile to path in SPOOL_CHUNK pieces, refusing files over max_bytes."""
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    size = 0
+    with open(path, "wb") as out:
+        while chunk := await upload.read(SPOOL_CHUNK):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ImportLimitError(f"File is larger than the {max_bytes // (1024 * 1024)} MB import limit")
+            out.write(chunk)
+    return size
+
+
+def iter_sheet_batches(path, batch_rows=None, max_rows=None):
+    """
+    Yield frames of up to batch_rows rows from the Tasks sheet (or the first sheet), read
+    with openpyxl in read-only mode. Frames are indexed by sheet row number; fully empty
+    rows are dropped. The first frame is always yielded (possibly empty) so the header
+    can be checked.
+    """
+    batch_rows = batch_rows or READ_BATCH_ROWS
+    max_rows = max_rows or MAX_IMPORT_ROWS
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except KeyError as e:
+        # openpyxl reports a zip without the expected workbook parts as a KeyError
+        raise InvalidFileException(f"Workbook part not found: {e}")
+    try:
+        if not workbook.sheetnames:
+            raise InvalidFileException("Workbook has no worksheet")
+        sheet = workbook["Tasks"] if "Tasks" in workbook.sheetnames else workbook.worksheets[0]
+        sheet.reset_dimensions() # Don't trust the stored sheet dimensions
+        rows = sheet.iter_rows(values_only=True)
+        try:
+            header = next(rows, None) or () # Read-only sheets open their part on first read
+        except KeyError as e:
+            raise InvalidFileException(f"Worksheet part not found: {e}")
+        columns = [str(v).strip() if v is not None else f"Unnamed: {i}" for i, v in enumerate(header)]
+        width = len(columns)
+
+        batch, numbers, count, yielded = [], [], 0, False
+        for number, row in enumerate(rows, start=HEADER_ROWS + 1):
+            if all(v is None or (isinstance(v, str) and not v.strip()) for v in row):
+                continue
+            count += 1
+            if count > max_rows:
+                raise ImportLimitError(f"Sheet has more than the {max_rows} row import limit")
+            row = tuple(row[:width])
+            batch.append(row + (None,) * (width - len(row)))
+            numbers.append(number)
+            if len(batch) == batch_rows:
+                yield pd.DataFrame(batch, columns=columns, index=numbers)
+                batch, numbers, yielded = [], [], True
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=columns, index=numbers)
+    finally:
+        workbook.close()
+
+
+def import_workbook(db, project, path, mode="append", report=None):
+    """
+    Import a spooled workbook batch by batch. Raises ImportLimitError or ValueError for
+    files that can't be imported; the caller rolls back in that case, else commits.
+    """
+    importer = None
+    for df in iter_sheet_batches(path):
+        if importer is None:
+            missing = missing_columns(df)
+            if missing:
+                raise ValueError(f"Missing required column: {missing[0]}")
+            importer = TaskImporter(db, project, mode)
+        importer.add_batch(df, sheet_rows=df.index)
+        if report and len(df):
+            report(f"Imported up to sheet row {df.index[-1]}")
+    importer.finish()
+    return importer.result()
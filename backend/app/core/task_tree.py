@@ -0,0 +1,16 @@
+"""
+Task hierarchy helpers shared by the task endpoints and the Excel import.
+"""
+from sqlalchemy import select
+
+from app.models import sql_models
+
+
+def task_subtree_cte(root_ids):
+    """Recursive CTE yielding the ids of the given tasks and all of their descendants."""
+    tasks_table = sql_models.Task.__table__
+    # nesting=True keeps the WITH inside the IN (...) subquery, so UPDATE/DELETE statements
+    # still start with their own keyword and sqlite reports a real rowcount
+    subtree = select(tasks_table.c.id).where(tasks_table.c.id.in_(root_ids)).cte("task_subtree", recursive=True, nesting=True)
+    # UNION (not UNION ALL) so a corrupted parent cycle terminates instead of looping
+    return subtree.union(select(tasks_table.c.id).where(tasks_table.c.parent_id == subtree.c.id))
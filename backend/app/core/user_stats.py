@@ -0,0 +1,119 @@
+"""
+Workload counts per user for the staff directory (GET /users/stats).
+
+All counts come from one statement: grouped subqueries for projects, open tasks and
+held documents, left-joined to users. The result is cached until a write touches one
+of the tables it reads. Writes are seen at the engine level (ORM, Core and raw driver
+statements alike) and invalidate the cache when their connection goes back to the
+pool, i.e. once the transaction is over and the new data is visible to readers.
+"""
+import re
+import threading
+
+from sqlalchemy import event, select, func, union, literal_column
+
+from app.models import sql_models
+
+STATS_TABLES = {"users", "departments", "projects", "tasks", "document_trackers", "document_holders"}
+
+_WRITE_TARGET = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+"?(\w+)',
+    re.IGNORECASE
+)
+_DIRTY_KEY = "user_stats_dirty"
+
+_lock = threading.Lock()
+_version = 0
+_cache = {"version": None, "rows": None}
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    match = _WRITE_TARGET.match(statement)
+    if match and match.group(1).lower() in STATS_TABLES:
+        conn.info[_DIRTY_KEY] = True
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    global _version
+    if connection_record is not None and connection_record.info.pop(_DIRTY_KEY, False):
+        with _lock:
+            _version += 1
+
+
+def track_writes(engine):
+    """Invalidate the cached stats after writes to STATS_TABLES (run once at startup)."""
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "checkin", _on_checkin)
+
+
+def stats_query():
+    users = sql_models.User.__table__
+    departments = sql_models.Department.__table__
+    projects = sql_models.Project.__table__
+    tasks = sql_models.Task.__table__
+    documents = sql_models.DocumentTracker.__table__
+    holders = sql_models.DocumentHolder.__table__
+
+    # Owner or assist coordinator, each project counted once per user
+    memberships = union(
+        select(projects.c.owner_id.label("user_id"), projects.c.id.label("project_id")),
+        select(projects.c.assist_coordinator_id.label("user_id"), projects.c.id.label("project_id"))
+    ).subquery()
+    project_counts = select(
+        memberships.c.user_id, func.count().label("n")
+    ).group_by(memberships.c.user_id).subquery()
+    task_counts = select(
+        tasks.c.assignee_id.label("user_id"), func.count().label("n")
+    ).where(
+        tasks.c.assignee_id.isnot(None), tasks.c.status != sql_models.TaskStatus.COMPLETED.value
+    ).group_by(tasks.c.assignee_id).subquery()
+    document_counts = select(
+        holders.c.user_id, func.count().label("n")
+    ).select_from(
+        documents.join(holders, documents.c.holder_id == holders.c.id)
+    ).where(
+        holders.c.user_id.isnot(None), documents.c.status != "completed"
+    ).group_by(holders.c.user_id).subquery()
+
+    return select(
+        users.c.id, users.c.full_name, users.c.username, users.c.role,
+        func.coalesce(departments.c.name, literal_column("'N/A'")),
+        func.coalesce(project_counts.c.n, 0),
+        func.coalesce(task_counts.c.n, 0),
+        func.coalesce(document_counts.c.n, 0)
+    ).select_from(
+        users.outerjoin(departments, departments.c.id == users.c.department_id)
+        .outerjoin(project_counts, project_counts.c.user_id == users.c.id)
+        .outerjoin(task_counts, task_counts.c.user_id == users.c.id)
+        .outerjoin(document_counts, document_counts.c.user_id == users.c.id)
+    ).order_by(users.c.id)
+
+
+def get_user_stats(db):
+    """Stats rows for every user, from the cache when nothing relevant was written since."""
+    with _lock:
+        version = _version
+        if _cache["version"] == version:
+            return _cache["rows"]
+    rows = [
+        {
+            "id": user_id,
+            "full_name": full_name,
+            "username": username,
+            "role": role,
+            "department": department,
+            "stats": {
+                "active_projects": active_projects,
+                "pending_tasks": pending_tasks,
+                "held_documents": held_documents
+            }
+        }
+        for user_id, full_name, username, role, department, active_projects, pending_tasks, held_documents
+        in db.execute(stats_query()).all()
+    ]
+    with _lock:
+        # A write finished while counting: keep the result for this caller only
+        if _version == version:
+            _cache["version"] = version
+            _cache["rows"] = rows
+    return rows
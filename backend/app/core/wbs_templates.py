@@ -0,0 +1,112 @@
+"""
+WBS import templates served from memory.
+
+The default template is rendered once, on first use, and kept as bytes with a content
+hash used as ETag. Departments can have their own template: an .xlsx named after the
+department code in TEMPLATE_DIR (e.g. storage/templates/IT.xlsx). Those files are read
+once and re-read only when their modification time changes.
+"""
+import hashlib
+import io
+import os
+import threading
+
+import pandas as pd
+
+from app.db.database import DB_DIR
+
+TEMPLATE_DIR = os.path.join(DB_DIR, "templates")
+
+DEFAULT_TEMPLATE_ROWS = [
+    {
+        "Phase Name": "1. INITIATING",
+        "Task Name": "Prepare Project Charter",
+        "Description": "Define project scope and objectives.",
+        "Assignee Email": "staff@example.com",
+        "Status": "not_started",
+        "Start Date (YYYY-MM-DD)": "2026-02-10",
+        "Finish Date (YYYY-MM-DD)": "2026-02-15",
+        "Due Date (YYYY-MM-DD)": "2026-02-15"
+    },
+    {
+        "Phase Name": "1. INITIATING",
+        "Task Name": "Stakeholder Analysis",
+        "Description": "Identify key stakeholders.",
+        "Assignee Email": "staff@example.com",
+        "Status": "not_started",
+        "Start Date (YYYY-MM-DD)": "2026-02-16",
+        "Finish Date (YYYY-MM-DD)": "2026-02-20",
+        "Due Date (YYYY-MM-DD)": "2026-02-20"
+    },
+    {
+        "Phase Name": "2. PLANNING",
+        "Task Name": "Define WBS",
+        "Description": "Create detailed WBS breakdown.",
+        "Assignee Email": "hod@example.com",
+        "Status": "not_started",
+        "Start Date (YYYY-MM-DD)": "2026-02-21",
+        "Finish Date (YYYY-MM-DD)": "2026-02-28",
+        "Due Date (YYYY-MM-DD)": "2026-02-28"
+    }
+]
+
+
+class Template:
+    def __init__(self, content, filename, mtime=None):
+        self.content = content
+        self.filename = filename
+        self.mtime = mtime
+        self.etag = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+_cache = {} # key -> Template
+_lock = threading.Lock()
+
+
+def _render_default():
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        pd.DataFrame(DEFAULT_TEMPLATE_ROWS).to_excel(writer, index=False, sheet_name='Tasks')
+    return output.getvalue()
+
+
+def department_template_path(department_code):
+    # Codes are short identifiers (IT, HR, FIN); keep anything else out of the path
+    safe = "".join(ch for ch in department_code if ch.isalnum() or ch in "-_")
+    return os.path.join(TEMPLATE_DIR, f"{safe}.xlsx") if safe else None
+
+
+def get_template(department_code=None):
+    """Template for a department (falls back to the default one)."""
+    path = department_template_path(department_code) if department_code else None
+    if path and os.path.isfile(path):
+        mtime = os.path.getmtime(path)
+        with _lock:
+            cached = _cache.get(path)
+            if cached is None or cached.mtime != mtime:
+                with open(path, "rb") as f:
+                    cached = Template(f.read(), f"wbs_template_{os.path.basename(path)}", mtime)
+                _cache[path] = cached
+            return cached
+
+    with _lock:
+        cached = _cache.get(None)
+        if cached is None:
+            cached = Template(_render_default(), "wbs_template.xlsx")
+            _cache[None] = cached
+        return cached
+
+
+def save_department_template(department_code, content):
+    """Store a department template on disk; the next get_template picks it up."""
+    path = department_template_path(department_code)
+    if not path:
+        raise ValueError("Invalid department code")
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    with _lock:
+        _cache.pop(path, None)
+    return path
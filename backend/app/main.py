@@ -18,7 +18,7 @@ origins = [
 ]
 
 from app.db.database import get_db, engine, Base
-from app.api import auth, projects, portfolio, finance, users, documents, categories, notes, issues
+from app.api import auth, projects, portfolio, finance, users, documents, categories, notes, issues, jobs
 
 # Run Auto-Migrations
 try:
@@ -30,12 +30,25 @@ except Exception as e:
 # Create tables on startup
 Base.metadata.create_all(bind=engine)
 
+# Change-log triggers behind the workspace delta feed
+from app.core.change_feed import install_change_triggers
+install_change_triggers(engine)
+
+# Full-text index behind /documents/search
+from app.core.document_search import install_search_index
+install_search_index(engine)
+
+# Invalidation of the cached /users/stats counts
+from app.core.user_stats import track_writes
+track_writes(engine)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Project-Version"],
 )
 
 app.include_router(auth.router)
@@ -47,6 +60,12 @@ app.include_router(documents.router, prefix="/documents", tags=["Documents"])
 app.include_router(categories.router, prefix="/categories", tags=["Categories"])
 app.include_router(notes.router, prefix="/notes", tags=["Notes"])
 app.include_router(issues.router, prefix="/issues", tags=["Issues"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+
+# Pick up background jobs queued or interrupted before this process started
+# (handlers are registered by the routers imported above)
+from app.core.jobs import resume_jobs
+resume_jobs()
 
 # Serve Frontend Static Files
 # We mount this LAST so it doesn't interfere with API routes
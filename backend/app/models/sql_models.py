@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum, Text, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum, Text, Table, Index, UniqueConstraint, JSON
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 import enum
 from ..db.database import Base
 
+def search_key(value):
+    """Lower-cased, single-spaced form of a name used for indexed prefix search."""
+    return " ".join((value or "").split()).casefold()
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     HOD = "hod"
@@ -50,6 +54,12 @@ class IssuePriority(str, enum.Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -68,6 +78,16 @@ class User(Base):
     tasks_assigned = relationship("Task", back_populates="assignee")
     budget_requests = relationship("BudgetRequest", foreign_keys="[BudgetRequest.requester_id]", back_populates="requester")
 
+    # search_key() of full_name / username / email, kept in step by the validator below (/users/search)
+    full_name_key = Column(String, index=True)
+    username_key = Column(String, index=True)
+    email_key = Column(String, index=True)
+
+    @validates("full_name", "username", "email")
+    def _update_search_key(self, key, value):
+        setattr(self, f"{key}_key", search_key(value))
+        return value
+
 class Department(Base):
     __tablename__ = "departments"
 
@@ -164,6 +184,10 @@ class Project(Base):
     assist_coordinator_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     assist_coordinator = relationship("User", foreign_keys=[assist_coordinator_id], back_populates="projects_assisted")
     
+    # Stored rollup (see app/core/rollups.py)
+    weighted_progress = Column(Float, default=0.0)
+    progress_updated_at = Column(DateTime(timezone=True), nullable=True)
+    
     wbs_items = relationship("WBS", back_populates="project", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="project", cascade="all, delete-orphan")
     documents = relationship("DocumentTracker", back_populates="project")
@@ -176,6 +200,10 @@ class WBS(Base):
     parent_id = Column(Integer, ForeignKey("wbs.id"), nullable=True)
     name = Column(String)
     
+    # Stored rollups over the phase and its sub-phases (see app/core/rollups.py)
+    progress = Column(Float, default=0.0)
+    weighted_progress = Column(Float, default=0.0)
+    
     project = relationship("Project", back_populates="wbs_items")
     parent = relationship("WBS", remote_side=[id], back_populates="children")
     children = relationship("WBS", back_populates="parent", cascade="all, delete-orphan")
@@ -186,7 +214,7 @@ class Task(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     wbs_id = Column(Integer, ForeignKey("wbs.id"))
-    parent_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
+    parent_id = Column(Integer, ForeignKey("tasks.id"), nullable=True, index=True)
     name = Column(String)
     description = Column(Text, nullable=True)
     
@@ -208,6 +236,27 @@ class Task(Base):
     parent = relationship("Task", remote_side=[id], back_populates="sub_tasks")
     sub_tasks = relationship("Task", back_populates="parent", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Serves /tasks/assigned: filter by assignee and status, ordered by due date
+        Index("ix_tasks_assignee_status_due", "assignee_id", "status", "due_date"),
+    )
+
+class TaskDependency(Base):
+    __tablename__ = "task_dependencies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Finish-to-start: successor may start lag_days after predecessor finishes (negative = lead)
+    predecessor_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
+    successor_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
+    lag_days = Column(Integer, default=0)
+
+    predecessor = relationship("Task", foreign_keys=[predecessor_id])
+    successor = relationship("Task", foreign_keys=[successor_id])
+
+    __table_args__ = (
+        UniqueConstraint("predecessor_id", "successor_id", name="uq_task_dependency"),
+    )
+
 class Payment(Base):
     __tablename__ = "payments"
     
@@ -230,6 +279,36 @@ class Payment(Base):
     
     project = relationship("Project", back_populates="payments")
 
+class ProjectChange(Base):
+    __tablename__ = "project_changes"
+    
+    # Written by SQLite triggers on tasks / wbs / payments and on expenses, budget requests
+    # and document logs (see app/core/change_feed.py).
+    # The id doubles as the monotonically increasing change version.
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer) # No FK: rows must survive project deletion cascades; NULL outside projects
+    entity = Column(String) # task, wbs, payment, expense, budget_request, document_log
+    entity_id = Column(Integer)
+    op = Column(String) # upsert, delete
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_project_changes_project_id_id", "project_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+class DocumentHolder(Base):
+    """Who can hold a physical document: a user, or a named office ("Director Office")."""
+    __tablename__ = "document_holders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String) # Display name; follows the user's full_name for user holders
+    normalized_name = Column(String, unique=True, index=True) # Lookup key, see document_holders.normalize
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    user = relationship("User")
+
 class DocumentTracker(Base):
     __tablename__ = "document_trackers"
     
@@ -239,15 +318,27 @@ class DocumentTracker(Base):
     description = Column(Text, nullable=True)
     
     current_holder = Column(String) # e.g. "Ahmad (Finance)", "Director Office"
+    holder_id = Column(Integer, ForeignKey("document_holders.id"), nullable=True)
     status = Column(String, default="pending") # pending, in_progress, completed
     
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     project = relationship("Project", back_populates="documents")
     
     logs = relationship("DocumentLog", back_populates="document", cascade="all, delete-orphan")
+    # Newest DocumentLog of this document, kept up to date by the document endpoints
+    last_log_id = Column(Integer, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pagination of /documents/list
+        Index("ix_document_trackers_updated_at_id", "updated_at", "id"),
+        # Documents held by someone, by status (dashboards, workload counts)
+        Index("ix_document_trackers_holder_status", "holder_id", "status"),
+    )
+    # Fetch server-generated timestamps with the INSERT / UPDATE itself (RETURNING)
+    __mapper_args__ = {"eager_defaults": True}
 
 class DocumentLog(Base):
     __tablename__ = "document_logs"
@@ -257,16 +348,33 @@ class DocumentLog(Base):
     
     from_holder = Column(String, nullable=True)
     to_holder = Column(String)
+    holder_id = Column(Integer, ForeignKey("document_holders.id"), nullable=True) # Holder of to_holder
     status = Column(String)
     note = Column(Text, nullable=True)
     
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     signed_at = Column(DateTime(timezone=True), nullable=True)
     signer_name = Column(String, nullable=True)
-    signature_image = Column(Text, nullable=True) # Base64 string
+    signature_hash = Column(String(64), nullable=True, index=True) # SHA-256 of the image in the signature store
     
     document = relationship("DocumentTracker", back_populates="logs")
 
+    __table_args__ = (
+        Index("ix_document_logs_holder_status", "holder_id", "status"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+class DocumentDwell(Base):
+    """Finished stay of a document with one holder (a log and the hand-off that closed it), see core/document_dwell.py."""
+    __tablename__ = "document_dwell"
+
+    log_id = Column(Integer, ForeignKey("document_logs.id", ondelete="CASCADE"), primary_key=True)
+    closed_by_log_id = Column(Integer, index=True)
+    document_id = Column(Integer)
+    holder_id = Column(Integer, ForeignKey("document_holders.id"), nullable=True)
+    month = Column(String(7)) # YYYY-MM the document arrived
+    seconds = Column(Float)
+
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -323,3 +431,23 @@ class Issue(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class Job(Base):
+    """Background job run by the in-process worker pool (see app/core/jobs.py)."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True) # Registered handler name, e.g. task_import
+    status = Column(String, default=JobStatus.QUEUED, index=True)
+    params = Column(JSON, nullable=True)
+    progress = Column(Float, default=0.0) # 0 - 100
+    message = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    result_path = Column(String, nullable=True) # Output file for export jobs
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+
+    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
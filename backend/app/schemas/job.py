@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Optional, Any
+from datetime import datetime
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: float = 0.0
+    message: Optional[str] = None
+    params: Optional[Any] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_by_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None # Set when a finished job produced a file
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from enum import Enum
 
 class TaskStatus(str, Enum):
@@ -48,6 +48,10 @@ class TaskRead(BaseModel):
     class Config:
         from_attributes = True
 
+class AssignedTaskRead(TaskRead):
+    project_id: Optional[int] = None
+    project_name: Optional[str] = None
+
 class MoveDirection(str, Enum):
     UP = "up"
     DOWN = "down"
@@ -57,6 +61,20 @@ class MoveDirection(str, Enum):
 class TaskMove(BaseModel):
     direction: MoveDirection
 
+class TaskLayoutItem(BaseModel):
+    id: int
+    parent_id: Optional[int] = None
+    position: int
+
+class TaskReorder(BaseModel):
+    items: List[TaskLayoutItem]
+
+class TaskPhaseMove(BaseModel):
+    wbs_id: int
+
+class TaskStatusPropagate(BaseModel):
+    status: TaskStatus
+
 class ProjectRead(BaseModel):
     id: int
     code: Optional[str] = None
@@ -75,6 +93,7 @@ class ProjectRead(BaseModel):
     # Calculated metrics
     capex_utilization: float = 0.0
     task_progress: float = 0.0
+    weighted_progress: Optional[float] = 0.0
 
     class Config:
         from_attributes = True
@@ -83,11 +102,55 @@ class WBSRead(BaseModel):
     id: int
     project_id: int
     name: str
+    progress: Optional[float] = 0.0
+    weighted_progress: Optional[float] = 0.0
     tasks: List[TaskRead] = []
 
     class Config:
         from_attributes = True
 
+class TaskTreeNode(BaseModel):
+    id: int
+    wbs_id: int
+    parent_id: Optional[int] = None
+    name: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    assignee_id: Optional[int] = None
+    planned_start: Optional[datetime] = None
+    planned_end: Optional[datetime] = None
+    due_date: Optional[datetime] = None
+    position: int = 0
+    is_overdue: bool = False
+    progress: float = 0.0
+    truncated: bool = False # True when children exist below the requested max_depth
+    children: List["TaskTreeNode"] = []
+
+class WBSTreeNode(BaseModel):
+    id: int
+    project_id: int
+    parent_id: Optional[int] = None
+    name: str
+    progress: float = 0.0
+    truncated: bool = False
+    children: List["WBSTreeNode"] = []
+    tasks: List[TaskTreeNode] = []
+
+class PhaseProgressRead(BaseModel):
+    id: int
+    parent_id: Optional[int] = None
+    name: Optional[str] = None
+    progress: Optional[float] = 0.0
+    weighted_progress: Optional[float] = 0.0
+
+    class Config:
+        from_attributes = True
+
+class ProjectProgressRead(BaseModel):
+    project_id: int
+    weighted_progress: Optional[float] = 0.0
+    progress_updated_at: Optional[datetime] = None
+    phases: List[PhaseProgressRead] = []
+
 class ProjectCreate(BaseModel):
     code: str
     name: str
@@ -141,6 +204,55 @@ class TaskUpdate(BaseModel):
     planned_end: Optional[datetime] = None
     due_date: Optional[datetime] = None
 
+class TaskPatchFields(BaseModel):
+    # Hierarchy changes (parent_id) go through the reorder endpoint so they can be cycle-checked
+    name: Optional[str] = None
+    description: Optional[str] = None
+    assignee_id: Optional[int] = None
+    status: Optional[TaskStatus] = None
+    planned_start: Optional[datetime] = None
+    planned_end: Optional[datetime] = None
+    due_date: Optional[datetime] = None
+
+class TaskPatchItem(TaskPatchFields):
+    id: int
+
+class TaskBulkPatch(BaseModel):
+    # Either one update applied to many ids, or per-task partial updates (or both)
+    ids: List[int] = []
+    update: Optional[TaskPatchFields] = None
+    items: List[TaskPatchItem] = []
+
+class TaskDependencyCreate(BaseModel):
+    predecessor_id: int
+    successor_id: int
+    lag_days: int = 0
+
+class TaskDependencyRead(BaseModel):
+    id: int
+    predecessor_id: int
+    successor_id: int
+    lag_days: int = 0
+
+    class Config:
+        from_attributes = True
+
+class TaskScheduleRead(BaseModel):
+    task_id: int
+    early_start: Optional[date] = None
+    early_finish: Optional[date] = None
+    late_start: Optional[date] = None
+    late_finish: Optional[date] = None
+    total_float: int = 0
+    slip_days: int = 0
+    is_critical: bool = False
+
+class ProjectScheduleRead(BaseModel):
+    project_start: Optional[date] = None
+    project_finish: Optional[date] = None
+    critical_path: List[int] = []
+    tasks: List[TaskScheduleRead] = []
+
 # --- Payment Schemas ---
 
 # Alias for backward compatibility or migration
@@ -154,6 +266,42 @@ class PaymentCreate(BaseModel):
     planned_date: datetime
     status: PaymentStatus = PaymentStatus.UNPAID
 
+class PaymentRead(BaseModel):
+    id: int
+    project_id: int
+    title: Optional[str] = None
+    vendor_name: Optional[str] = None
+    amount: Optional[float] = 0.0
+    payment_type: Optional[str] = None
+    status: Optional[str] = None
+    planned_date: Optional[datetime] = None
+    actual_date: Optional[datetime] = None
+    milestone_ref: Optional[str] = None
+    invoice_ref: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ProjectMetricsRead(BaseModel):
+    capex_utilization: float = 0.0
+    task_progress: float = 0.0
+    weighted_progress: float = 0.0
+
+class ChangeDeletions(BaseModel):
+    tasks: List[int] = []
+    phases: List[int] = []
+    payments: List[int] = []
+
+class ProjectChangesRead(BaseModel):
+    project_id: int
+    since: int
+    version: int
+    tasks: List[TaskRead] = []
+    phases: List[PhaseProgressRead] = []
+    payments: List[PaymentRead] = []
+    deleted: ChangeDeletions = ChangeDeletions()
+    metrics: Optional[ProjectMetricsRead] = None # Present when anything changed
+
 class PaymentUpdate(BaseModel):
     title: Optional[str] = None
     vendor_name: Optional[str] = None
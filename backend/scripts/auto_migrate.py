@@ -8,6 +8,8 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 def get_db_path():
     # Try to find the DB in the storage directory first (Production/Docker volume)
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -76,11 +78,229 @@ def run_migrations():
         else:
             logger.info("'position' column already exists.")
 
+        # --- Migration 2: Composite index for assigned-task lookups ---
+        logger.info("Ensuring 'ix_tasks_assignee_status_due' index exists...")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_tasks_assignee_status_due ON tasks (assignee_id, status, due_date)")
+        conn.commit()
+
+        # --- Migration 3: Stored progress rollups ---
+        logger.info("Checking progress rollup columns...")
+        cursor.execute("PRAGMA table_info(wbs)")
+        wbs_columns = [info[1] for info in cursor.fetchall()]
+        if "progress" not in wbs_columns:
+            logger.info("Adding 'progress' / 'weighted_progress' columns to 'wbs' table...")
+            cursor.execute("ALTER TABLE wbs ADD COLUMN progress FLOAT DEFAULT 0")
+            cursor.execute("ALTER TABLE wbs ADD COLUMN weighted_progress FLOAT DEFAULT 0")
+
+        cursor.execute("PRAGMA table_info(projects)")
+        project_columns = [info[1] for info in cursor.fetchall()]
+        if "weighted_progress" not in project_columns:
+            logger.info("Adding rollup columns to 'projects' table...")
+            cursor.execute("ALTER TABLE projects ADD COLUMN weighted_progress FLOAT DEFAULT 0")
+            cursor.execute("ALTER TABLE projects ADD COLUMN progress_updated_at DATETIME")
+
+        # Sub-task lookups (leaf detection, subtree CTEs)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_tasks_parent_id ON tasks (parent_id)")
+        conn.commit()
+
+        # --- Migration 4: Signatures out of document_logs into the blob store ---
+        migrate_signatures(conn)
+
+        # --- Migration 5: Latest-log pointer and keyset index for the document list ---
+        migrate_document_pointers(conn)
+
+        # --- Migration 6: Normalized document holders ---
+        migrate_document_holders(conn)
+
+        # --- Migration 7: Search keys for the user directory ---
+        migrate_user_search_keys(conn)
+
     except Exception as e:
         logger.error(f"Migration failed: {e}")
         conn.rollback()
     finally:
         conn.close()
 
+def migrate_signatures(conn, batch_size=500):
+    """Move base64 signature_image values to the content-addressed store, keeping only their hash."""
+    from app.core import signature_store
+
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(document_logs)")
+    columns = [info[1] for info in cursor.fetchall()]
+    if not columns:
+        return
+    if "signature_hash" not in columns:
+        logger.info("Adding 'signature_hash' column to 'document_logs' table...")
+        cursor.execute("ALTER TABLE document_logs ADD COLUMN signature_hash VARCHAR(64)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_logs_signature_hash ON document_logs (signature_hash)")
+    conn.commit()
+    if "signature_image" not in columns:
+        return
+
+    logger.info("Moving document signatures to the blob store...")
+    moved = kept_raw = 0
+    last_id = 0
+    while True:
+        cursor.execute(
+            "SELECT id, signature_image FROM document_logs "
+            "WHERE id > ? AND signature_image IS NOT NULL AND signature_image != '' AND signature_hash IS NULL "
+            "ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        updates = []
+        for log_id, image in rows:
+            try:
+                content_hash = signature_store.store_signature(image)
+            except ValueError as e:
+                # Not a supported image (SVG, oversized, bad padding...): signed records are kept as they are
+                content_hash = signature_store.put(signature_store.decode_raw(image))
+                kept_raw += 1
+                logger.warning(f"Signature of document log {log_id} stored unchanged: {e}")
+            updates.append((content_hash, log_id))
+        cursor.executemany("UPDATE document_logs SET signature_hash = ? WHERE id = ?", updates)
+        conn.commit()
+        moved += len(updates)
+        last_id = rows[-1][0]
+    logger.info(f"Moved {moved} signatures ({kept_raw} stored unchanged).")
+
+    # The old column only goes once every signature is in the store
+    cursor.execute(
+        "SELECT COUNT(*) FROM document_logs "
+        "WHERE signature_image IS NOT NULL AND signature_image != '' AND signature_hash IS NULL"
+    )
+    remaining = cursor.fetchone()[0]
+    if remaining:
+        logger.warning(f"Keeping 'signature_image': {remaining} signatures are not in the store yet.")
+        return
+    try:
+        cursor.execute("ALTER TABLE document_logs DROP COLUMN signature_image")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # SQLite before 3.35 cannot drop columns; the column is left in place
+        logger.warning(f"Could not drop 'signature_image' column: {e}")
+
+
+def migrate_document_pointers(conn):
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(document_trackers)")
+    columns = [info[1] for info in cursor.fetchall()]
+    if not columns:
+        return
+    if "last_log_id" not in columns:
+        logger.info("Adding 'last_log_id' column to 'document_trackers' table...")
+        cursor.execute("ALTER TABLE document_trackers ADD COLUMN last_log_id INTEGER")
+        cursor.execute(
+            "UPDATE document_trackers SET last_log_id = "
+            "(SELECT MAX(id) FROM document_logs WHERE document_logs.document_id = document_trackers.id)"
+        )
+    # Never-edited documents had no updated_at; the list is ordered by it
+    cursor.execute("UPDATE document_trackers SET updated_at = created_at WHERE updated_at IS NULL")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_document_trackers_updated_at_id ON document_trackers (updated_at, id)"
+    )
+    conn.commit()
+
+
+def migrate_document_holders(conn):
+    """Create document_holders from the free-text holder names and point trackers and logs at them."""
+    from app.core.document_holders import normalize
+
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(document_trackers)")
+    tracker_columns = [info[1] for info in cursor.fetchall()]
+    if not tracker_columns:
+        return
+    cursor.execute("""CREATE TABLE IF NOT EXISTS document_holders (
+        id INTEGER NOT NULL,
+        name VARCHAR,
+        normalized_name VARCHAR,
+        user_id INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id),
+        UNIQUE (user_id),
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_holders_id ON document_holders (id)")
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_document_holders_normalized_name ON document_holders (normalized_name)"
+    )
+    if "holder_id" not in tracker_columns:
+        logger.info("Adding 'holder_id' column to 'document_trackers' table...")
+        cursor.execute("ALTER TABLE document_trackers ADD COLUMN holder_id INTEGER REFERENCES document_holders (id)")
+    cursor.execute("PRAGMA table_info(document_logs)")
+    if "holder_id" not in [info[1] for info in cursor.fetchall()]:
+        logger.info("Adding 'holder_id' column to 'document_logs' table...")
+        cursor.execute("ALTER TABLE document_logs ADD COLUMN holder_id INTEGER REFERENCES document_holders (id)")
+
+    cursor.execute(
+        "SELECT current_holder FROM document_trackers WHERE holder_id IS NULL AND current_holder IS NOT NULL "
+        "UNION SELECT to_holder FROM document_logs WHERE holder_id IS NULL AND to_holder IS NOT NULL"
+    )
+    names = [name for (name,) in cursor.fetchall() if normalize(name)]
+    if names:
+        logger.info(f"Linking {len(names)} holder names to document holders...")
+        cursor.execute("SELECT normalized_name, id FROM document_holders")
+        holder_ids = dict(cursor.fetchall())
+        cursor.execute("SELECT user_id FROM document_holders WHERE user_id IS NOT NULL")
+        linked_users = {user_id for (user_id,) in cursor.fetchall()}
+        users_by_name = {}
+        cursor.execute("SELECT id, full_name FROM users")
+        for user_id, full_name in cursor.fetchall():
+            key = normalize(full_name)
+            # Ambiguous names stay office holders
+            users_by_name[key] = None if key in users_by_name else user_id
+
+        for name in sorted(names):
+            key = normalize(name)
+            if key not in holder_ids:
+                user_id = users_by_name.get(key)
+                if user_id in linked_users:
+                    user_id = None
+                cursor.execute(
+                    "INSERT INTO document_holders (name, normalized_name, user_id) VALUES (?, ?, ?)",
+                    (" ".join(name.split()), key, user_id)
+                )
+                holder_ids[key] = cursor.lastrowid
+                linked_users.add(user_id)
+        updates = [(holder_ids[normalize(name)], name) for name in names]
+        cursor.executemany(
+            "UPDATE document_trackers SET holder_id = ? WHERE holder_id IS NULL AND current_holder = ?", updates
+        )
+        cursor.executemany(
+            "UPDATE document_logs SET holder_id = ? WHERE holder_id IS NULL AND to_holder = ?", updates
+        )
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_document_trackers_holder_status ON document_trackers (holder_id, status)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_logs_holder_status ON document_logs (holder_id, status)")
+    conn.commit()
+
+
+def migrate_user_search_keys(conn):
+    from app.models.sql_models import search_key
+
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(users)")
+    columns = [info[1] for info in cursor.fetchall()]
+    if not columns or "full_name_key" in columns:
+        return
+    logger.info("Adding search key columns to 'users' table...")
+    for column in ("full_name_key", "username_key", "email_key"):
+        cursor.execute(f"ALTER TABLE users ADD COLUMN {column} VARCHAR")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_users_{column} ON users ({column})")
+    cursor.execute("SELECT id, full_name, username, email FROM users")
+    cursor.executemany(
+        "UPDATE users SET full_name_key = ?, username_key = ?, email_key = ? WHERE id = ?",
+        [(search_key(full_name), search_key(username), search_key(email), user_id)
+         for user_id, full_name, username, email in cursor.fetchall()]
+    )
+    conn.commit()
+
+
 if __name__ == "__main__":
     run_migrations()
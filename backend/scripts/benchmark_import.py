@@ -0,0 +1,87 @@
+import io
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+# Allow running as `python scripts/benchmark_import.py` from the backend folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import Base
+from app.models import sql_models
+from app.core import task_import, rollups
+from app.core.change_feed import install_change_triggers
+
+def build_sheet(rows, users, phases=40, seed=42):
+    """Synthetic import sheet in the template layout, with a few invalid rows mixed in."""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    data = []
+    for i in range(rows):
+        start = base + timedelta(days=rng.randint(0, 365))
+        finish = start + timedelta(days=rng.randint(0, 30))
+        data.append({
+            "Phase Name": f"{rng.randrange(phases) + 1}. PHASE",
+            "Task Name": f"Task {i + 1}",
+            "Description": "Imported task" if i % 3 else None,
+            "Assignee Email": f"user{rng.randrange(users)}@example.com" if i % 4 else "",
+            "Status": rng.choice(["not_started", "in_progress", "completed", "Blocked"]),
+            "Start Date (YYYY-MM-DD)": start.strftime("%Y-%m-%d"),
+            "Finish Date (YYYY-MM-DD)": finish if i % 2 else finish.strftime("%Y-%m-%d"),
+            "Due Date (YYYY-MM-DD)": "not a date" if i % 997 == 0 else finish.strftime("%Y-%m-%d")
+        })
+    return pd.DataFrame(data)
+
+def run_benchmark(rows=50000, users=200, with_excel=False):
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    install_change_triggers(engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add_all([
+        sql_models.User(username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}", role="staff")
+        for i in range(users)
+    ])
+    project = sql_models.Project(code="BENCH", name="Import benchmark", owner_id=1, end_date=datetime(2026, 12, 31))
+    db.add(project)
+    db.commit()
+
+    df = build_sheet(rows, users)
+    print(f"Sheet: {len(df)} rows")
+
+    if with_excel:
+        output = io.BytesIO()
+        started = time.perf_counter()
+        df.to_excel(output, index=False, sheet_name="Tasks")
+        print(f"  Write xlsx (setup only): {time.perf_counter() - started:.2f} s")
+        started = time.perf_counter()
+        df = pd.read_excel(io.BytesIO(output.getvalue()))
+        print(f"  Read xlsx: {time.perf_counter() - started:.2f} s")
+
+    started = time.perf_counter()
+    result = task_import.import_tasks(db, project, df)
+    import_s = time.perf_counter() - started
+    started = time.perf_counter()
+    rollups.refresh_project_rollups(db, project.id)
+    db.commit()
+    commit_s = time.perf_counter() - started
+
+    print(f"  Validate + bulk insert: {import_s:.2f} s ({result['tasks_created']} tasks, {result['phases_created']} phases)")
+    print(f"  Rollups + commit: {commit_s:.2f} s")
+    print(f"  Rows skipped: {result['rows_skipped']} (first error: {result['errors'][0] if result['errors'] else None})")
+    print(f"  Warnings: {result['warning_count']} (first: {result['warnings'][0] if result['warnings'] else None})")
+
+    positions = db.query(func.count(), func.count(func.distinct(sql_models.Task.wbs_id.op("||")("-").op("||")(sql_models.Task.position)))).one()
+    print(f"  Unique (phase, position) pairs: {positions[1] == positions[0]}")
+    db.close()
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    run_benchmark(int(args[0]) if args else 50000, with_excel="--excel" in sys.argv)
@@ -0,0 +1,62 @@
+import os
+import sys
+import random
+import time
+from datetime import datetime, timedelta
+
+# Allow running as `python scripts/benchmark_schedule.py` from the backend folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.scheduling import ProjectSchedule
+
+def build_project(task_count, edges_per_task=3, seed=42):
+    """Synthetic project: tasks with random windows, dependencies only pointing forward (always a DAG)."""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    tasks = []
+    for task_id in range(1, task_count + 1):
+        start = base + timedelta(days=rng.randint(0, 365))
+        end = start + timedelta(days=rng.randint(0, 20))
+        tasks.append((task_id, start, end, end + timedelta(days=rng.randint(0, 10))))
+
+    dependencies = []
+    for successor in range(2, task_count + 1):
+        for predecessor in rng.sample(range(max(1, successor - 200), successor), min(edges_per_task, successor - 1)):
+            dependencies.append((predecessor, successor, rng.randint(-1, 3)))
+    return tasks, dependencies
+
+def run_benchmark(task_count=10000, updates=200):
+    tasks, dependencies = build_project(task_count)
+    print(f"Project: {len(tasks)} tasks, {len(dependencies)} dependencies")
+
+    started = time.perf_counter()
+    schedule = ProjectSchedule(tasks, dependencies)
+    full_ms = (time.perf_counter() - started) * 1000
+    print(f"  Full schedule (topological forward + backward pass): {full_ms:.1f} ms")
+    print(f"  Critical path length: {len(schedule.critical_path())} tasks")
+
+    started = time.perf_counter()
+    schedule.to_dict()
+    print(f"  Result serialization: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(7)
+    started = time.perf_counter()
+    for _ in range(updates):
+        task_id, start, end, due = tasks[rng.randrange(task_count)]
+        shift = timedelta(days=rng.randint(-3, 3))
+        schedule.update_task(task_id, start + shift, end + shift + timedelta(days=rng.randint(0, 2)), due)
+    incremental_ms = (time.perf_counter() - started) * 1000 / updates
+    print(f"  Incremental date change (avg of {updates}): {incremental_ms:.2f} ms")
+
+    # Incremental results must match a from-scratch computation
+    fresh = ProjectSchedule(
+        [(tid, None, None, None) for tid in schedule.ids], dependencies
+    )
+    fresh.start, fresh.duration, fresh.due = list(schedule.start), list(schedule.duration), list(schedule.due)
+    fresh._forward_all()
+    fresh._backward_all()
+    consistent = (fresh.es, fresh.ef, fresh.ls, fresh.lf) == (schedule.es, schedule.ef, schedule.ls, schedule.lf)
+    print(f"  Incremental state matches full recompute: {consistent}")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
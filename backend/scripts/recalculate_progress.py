@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal
+from app.models import sql_models
+from app.core.rollups import refresh_project_rollups
+
+def recalculate_progress():
+    db = SessionLocal()
+    try:
+        print("Starting WBS progress rollup recalculation...")
+        project_ids = [row[0] for row in db.query(sql_models.Project.id).all()]
+        for project_id in project_ids:
+            progress, weighted = refresh_project_rollups(db, project_id)
+            print(f"  - Project {project_id}: {progress:.1f}% (weighted {weighted:.1f}%)")
+        db.commit()
+        print(f"Progress rollups recalculated for {len(project_ids)} projects.")
+    except Exception as e:
+        print(f"Error during recalculation: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    recalculate_progress()
@@ -1,6 +1,6 @@
 import { useState, useEffect, useRef } from 'react';
 import SignatureCanvas from 'react-signature-canvas';
-import { getDocuments, createDocument, updateDocument, deleteDocument } from '../services/documents';
+import { listDocuments, searchDocuments, getDocumentLogs, createDocument, updateDocument, transferDocuments, deleteDocument, signatureUrl } from '../services/documents';
 import { getProjects } from '../services/projects';
 import {
     FileText,
@@ -20,6 +20,16 @@ import {
 import clsx from 'clsx';
 import { formatDate } from '../utils/dateUtils';
 
+// Render a search snippet, highlighting the <mark></mark> spans as text (never as HTML)
+const Snippet = ({ text }) => (
+    <p className="text-xs text-slate-500 mt-1 line-clamp-2">
+        {text.split(/(<mark>.*?<\/mark>)/g).map((part, i) => part.startsWith('<mark>')
+            ? <mark key={i} className="bg-yellow-100 text-slate-900 rounded px-0.5">{part.slice(6, -7)}</mark>
+            : part
+        )}
+    </p>
+);
+
 const StatusBadge = ({ status }) => {
     const styles = {
         pending: "bg-amber-50 text-amber-600 border-amber-200",
@@ -39,9 +49,16 @@ const StatusBadge = ({ status }) => {
 
 export default function DocumentController() {
     const [documents, setDocuments] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [statusCounts, setStatusCounts] = useState({});
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [docLogs, setDocLogs] = useState([]);
+    const [selectedIds, setSelectedIds] = useState([]);
+    const [bulkHolder, setBulkHolder] = useState('');
     const [projects, setProjects] = useState([]);
     const [loading, setLoading] = useState(true);
     const [searchQuery, setSearchQuery] = useState('');
+    const [searchResults, setSearchResults] = useState(null);
     const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
     const [isUpdateModalOpen, setIsUpdateModalOpen] = useState(false);
     const [isCorrection, setIsCorrection] = useState(false);
@@ -61,14 +78,34 @@ export default function DocumentController() {
         loadData();
     }, []);
 
+    // Server-side search, debounced; an empty box goes back to the paged list
+    useEffect(() => {
+        if (!searchQuery.trim()) {
+            setSearchResults(null);
+            return;
+        }
+        let cancelled = false;
+        const timer = setTimeout(async () => {
+            try {
+                const hits = await searchDocuments(searchQuery.trim(), { limit: 50 });
+                if (!cancelled) setSearchResults(hits);
+            } catch (err) {
+                console.error("Document search failed", err);
+            }
+        }, 250);
+        return () => { cancelled = true; clearTimeout(timer); };
+    }, [searchQuery]);
+
     async function loadData() {
         setLoading(true);
         try {
-            const [docs, projs] = await Promise.all([
-                getDocuments(),
+            const [page, projs] = await Promise.all([
+                listDocuments(),
                 getProjects()
             ]);
-            setDocuments(docs);
+            setDocuments(page.items);
+            setNextCursor(page.next_cursor);
+            setStatusCounts(page.status_counts || {});
             setProjects(projs);
         } catch (err) {
             console.error("Failed to load documents", err);
@@ -77,6 +114,32 @@ export default function DocumentController() {
         }
     }
 
+    async function loadMore() {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const page = await listDocuments({ cursor: nextCursor });
+            setDocuments(prev => [...prev, ...page.items]);
+            setNextCursor(page.next_cursor);
+        } catch (err) {
+            console.error("Failed to load more documents", err);
+        } finally {
+            setLoadingMore(false);
+        }
+    }
+
+    // The list only carries the latest log; the full history is fetched when a document is opened
+    async function openDocument(doc) {
+        setSelectedDoc(doc);
+        setDocLogs(doc.last_log ? [doc.last_log] : []);
+        setIsUpdateModalOpen(true);
+        try {
+            setDocLogs(await getDocumentLogs(doc.id));
+        } catch (err) {
+            console.error("Failed to load document history", err);
+        }
+    }
+
     async function handleAddDocument() {
         if (!newDoc.title || !newDoc.current_holder) return;
         try {
@@ -96,7 +159,7 @@ export default function DocumentController() {
     async function handleUpdateDocument() {
         if (!selectedDoc) return;
         try {
-            await updateDocument(selectedDoc.id, {
+            const updated = await updateDocument(selectedDoc.id, {
                 title: selectedDoc.title,
                 ref_number: selectedDoc.ref_number,
                 project_id: selectedDoc.project_id ? parseInt(selectedDoc.project_id) : null,
@@ -108,17 +171,46 @@ export default function DocumentController() {
                 signature_image: sigPad.current?.toDataURL && !sigPad.current.isEmpty() ? sigPad.current.toDataURL() : null
             });
 
+            // The response is the updated tracker with its latest log: patch the list in place
+            const { closed_log, ...summary } = updated;
+            const previous = documents.find(d => d.id === summary.id);
+            setDocuments(prev => [summary, ...prev.filter(d => d.id !== summary.id)]);
+            if (previous && previous.status !== summary.status) {
+                setStatusCounts(prev => ({
+                    ...prev,
+                    [previous.status]: Math.max((prev[previous.status] || 0) - 1, 0),
+                    [summary.status]: (prev[summary.status] || 0) + 1
+                }));
+            }
             setIsUpdateModalOpen(false);
             setSelectedDoc(null);
             setIsCorrection(false);
             setSignerName('');
-            loadData();
         } catch (err) {
             console.error("Update Document Error:", err);
             alert(`Failed to update document: ${err.message || 'Unknown Error'}`);
         }
     }
 
+    function toggleSelected(id) {
+        setSelectedIds(prev => prev.includes(id) ? prev.filter(x => x !== id) : [...prev, id]);
+    }
+
+    async function handleBulkTransfer() {
+        if (!selectedIds.length || !bulkHolder.trim()) return;
+        try {
+            const result = await transferDocuments(selectedIds, bulkHolder.trim());
+            setSelectedIds([]);
+            setBulkHolder('');
+            if (result.skipped.length) {
+                alert(`${result.transferred.length} documents transferred to ${result.current_holder}; ${result.skipped.length} were already there.`);
+            }
+            loadData();
+        } catch (err) {
+            alert(`Failed to transfer: ${err.message || "Unknown error"}`);
+        }
+    }
+
     async function handleDelete(id) {
         if (!confirm("Are you sure you want to delete this document tracker?")) return;
         try {
@@ -129,11 +221,7 @@ export default function DocumentController() {
         }
     }
 
-    const filteredDocs = documents.filter(doc =>
-        doc.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        doc.current_holder.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        doc.ref_number?.toLowerCase().includes(searchQuery.toLowerCase())
-    );
+    const filteredDocs = searchResults ?? documents;
 
     if (loading) return (
         <div className="flex items-center justify-center min-h-[400px]">
@@ -159,12 +247,12 @@ export default function DocumentController() {
             {/* Quick Stats */}
             <div className="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-6 gap-6">
                 {[
-                    { label: "Total Tracked", value: documents.length, color: "text-slate-900", bg: "bg-white" },
-                    { label: "Pending", value: documents.filter(d => d.status === 'pending').length, color: "text-amber-600", bg: "bg-amber-50/50" },
-                    { label: "In Progress", value: documents.filter(d => d.status === 'in_progress').length, color: "text-blue-600", bg: "bg-blue-50/50" },
-                    { label: "Signed", value: documents.filter(d => d.status === 'signed').length, color: "text-indigo-600", bg: "bg-indigo-50/50" },
-                    { label: "Completed", value: documents.filter(d => d.status === 'completed').length, color: "text-emerald-600", bg: "bg-emerald-50/50" },
-                    { label: "Lost/Cancel", value: documents.filter(d => ['lost', 'cancelled'].includes(d.status)).length, color: "text-rose-600", bg: "bg-rose-50/50" }
+                    { label: "Total Tracked", value: Object.values(statusCounts).reduce((sum, n) => sum + n, 0), color: "text-slate-900", bg: "bg-white" },
+                    { label: "Pending", value: statusCounts.pending || 0, color: "text-amber-600", bg: "bg-amber-50/50" },
+                    { label: "In Progress", value: statusCounts.in_progress || 0, color: "text-blue-600", bg: "bg-blue-50/50" },
+                    { label: "Signed", value: statusCounts.signed || 0, color: "text-indigo-600", bg: "bg-indigo-50/50" },
+                    { label: "Completed", value: statusCounts.completed || 0, color: "text-emerald-600", bg: "bg-emerald-50/50" },
+                    { label: "Lost/Cancel", value: (statusCounts.lost || 0) + (statusCounts.cancelled || 0), color: "text-rose-600", bg: "bg-rose-50/50" }
                 ].map((stat, i) => (
                     <div key={i} className={clsx("p-5 rounded-[2rem] border border-slate-200/60 shadow-sm transition-all hover:shadow-md", stat.bg)}>
                         <p className="text-[10px] font-black text-slate-400 uppercase tracking-widest">{stat.label}</p>
@@ -186,12 +274,38 @@ export default function DocumentController() {
                             onChange={e => setSearchQuery(e.target.value)}
                         />
                     </div>
+                    {selectedIds.length > 0 && (
+                        <div className="flex items-center gap-2">
+                            <span className="text-xs font-bold text-slate-500 whitespace-nowrap">{selectedIds.length} selected</span>
+                            <input
+                                type="text"
+                                placeholder="Transfer to..."
+                                className="px-3 py-2 text-sm border border-slate-200 rounded-lg focus:ring-2 focus:ring-blue-500 outline-none"
+                                value={bulkHolder}
+                                onChange={e => setBulkHolder(e.target.value)}
+                            />
+                            <button
+                                onClick={handleBulkTransfer}
+                                disabled={!bulkHolder.trim()}
+                                className="flex items-center gap-1.5 px-3 py-2 text-sm bg-blue-600 text-white rounded-lg hover:bg-blue-700 font-bold disabled:opacity-50"
+                            >
+                                <ArrowRight size={14} /> Transfer
+                            </button>
+                        </div>
+                    )}
                 </div>
 
                 <div className="overflow-x-auto">
                     <table className="w-full text-left">
                         <thead className="bg-slate-50 text-xs uppercase text-slate-500 font-semibold border-b border-slate-200">
                             <tr>
+                                <th className="pl-6 py-4 w-4">
+                                    <input
+                                        type="checkbox"
+                                        checked={filteredDocs.length > 0 && filteredDocs.every(doc => selectedIds.includes(doc.id))}
+                                        onChange={e => setSelectedIds(e.target.checked ? filteredDocs.map(doc => doc.id) : [])}
+                                    />
+                                </th>
                                 <th className="px-6 py-4">Document Details</th>
                                 <th className="px-6 py-4">Project</th>
                                 <th className="px-6 py-4">Current Location / Holder</th>
@@ -203,17 +317,21 @@ export default function DocumentController() {
                         <tbody className="divide-y divide-slate-100">
                             {filteredDocs.length > 0 ? filteredDocs.map(doc => (
                                 <tr key={doc.id} className="hover:bg-slate-50/50 transition-colors group">
+                                    <td className="pl-6 py-4">
+                                        <input type="checkbox" checked={selectedIds.includes(doc.id)} onChange={() => toggleSelected(doc.id)} />
+                                    </td>
                                     <td className="px-6 py-4">
                                         <div className="flex items-center gap-3">
                                             <div className="p-2 bg-blue-50 text-blue-600 rounded-lg">
                                                 <FileText size={20} />
                                             </div>
                                             <button
-                                                onClick={() => { setSelectedDoc(doc); setIsUpdateModalOpen(true); }}
+                                                onClick={() => openDocument(doc)}
                                                 className="text-left group/title"
                                             >
                                                 <p className="font-bold text-slate-900 text-sm group-hover/title:text-blue-600 transition-colors">{doc.title}</p>
                                                 {doc.ref_number && <p className="text-xs text-slate-500 font-mono mt-1">{doc.ref_number}</p>}
+                                                {doc.snippet && <Snippet text={doc.snippet} />}
                                             </button>
                                         </div>
                                     </td>
@@ -238,7 +356,7 @@ export default function DocumentController() {
                                     <td className="px-6 py-4 text-right">
                                         <div className="flex justify-end gap-2">
                                             <button
-                                                onClick={() => { setSelectedDoc(doc); setIsUpdateModalOpen(true); }}
+                                                onClick={() => openDocument(doc)}
                                                 className="flex items-center gap-1.5 px-3 py-1.5 text-slate-600 hover:bg-slate-100 rounded border border-slate-200 shadow-sm transition-all"
                                                 title="View History / Timeline"
                                             >
@@ -246,7 +364,7 @@ export default function DocumentController() {
                                                 <span className="text-[10px] font-bold uppercase tracking-wider">History</span>
                                             </button>
                                             <button
-                                                onClick={() => { setSelectedDoc(doc); setIsUpdateModalOpen(true); }}
+                                                onClick={() => openDocument(doc)}
                                                 className="flex items-center gap-1.5 px-3 py-1.5 text-blue-600 hover:bg-blue-50 rounded border border-blue-200 shadow-sm transition-all"
                                                 title="Transfer to Next Signer"
                                             >
@@ -264,11 +382,22 @@ export default function DocumentController() {
                                 </tr>
                             )) : (
                                 <tr>
-                                    <td colSpan="6" className="px-6 py-10 text-center text-slate-400 italic">No documents found matching your search.</td>
+                                    <td colSpan="7" className="px-6 py-10 text-center text-slate-400 italic">No documents found matching your search.</td>
                                 </tr>
                             )}
                         </tbody>
                     </table>
+                    {nextCursor && !searchResults && (
+                        <div className="p-4 border-t border-slate-100 text-center">
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="px-4 py-2 text-sm text-blue-600 hover:bg-blue-50 rounded-lg font-bold disabled:opacity-50"
+                            >
+                                {loadingMore ? 'Loading...' : 'Load more documents'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
 
@@ -344,8 +473,8 @@ export default function DocumentController() {
                             <h4 className="text-xs font-bold text-slate-400 uppercase mb-4 tracking-wider">Movement History</h4>
                             <div className="space-y-6 relative">
                                 <div className="absolute left-2.5 top-2 bottom-2 w-0.5 bg-slate-200"></div>
-                                {selectedDoc.logs?.map((log, i) => {
-                                    const nextLog = selectedDoc.logs[i + 1];
+                                {docLogs.map((log, i) => {
+                                    const nextLog = docLogs[i + 1];
                                     return (
                                         <div key={log.id} className="relative pl-8">
                                             <div className={clsx("absolute left-0 top-1 w-5 h-5 rounded-full border-2 bg-white z-10",
@@ -363,9 +492,9 @@ export default function DocumentController() {
                                                             <CheckCircle2 size={10} />
                                                             <span>Received by {log.signer_name || 'Unknown'}:</span> {new Date(log.signed_at).toLocaleString('en-GB', { dateStyle: 'short', timeStyle: 'short' })}
                                                         </p>
-                                                        {log.signature_image && (
+                                                        {log.signature_hash && (
                                                             <div className="mt-1 bg-white p-1 rounded border border-slate-200 inline-block">
-                                                                <img src={log.signature_image} alt="Signature" className="h-6 object-contain" />
+                                                                <img src={signatureUrl(log.signature_hash)} alt="Signature" className="h-6 object-contain" />
                                                             </div>
                                                         )}
                                                     </div>
@@ -54,6 +54,7 @@ export default function NotesPage() {
 
     // Sharing State
     const [users, setUsers] = useState([]);
+    const [userQuery, setUserQuery] = useState('');
     const [isShareModalOpen, setIsShareModalOpen] = useState(false);
     const [noteToShare, setNoteToShare] = useState(null);
     const [selectedUserIds, setSelectedUserIds] = useState([]);
@@ -62,17 +63,22 @@ export default function NotesPage() {
         const userId = localStorage.getItem('user_id');
         setCurrentUser(userId ? parseInt(userId) : null);
         loadNotes();
-        loadUsers();
     }, []);
 
-    const loadUsers = async () => {
-        try {
-            const data = await userService.getUsers();
-            setUsers(data);
-        } catch (err) {
-            console.error("Failed to load users", err);
-        }
-    };
+    // Share candidates come from the server-side directory search while the share modal is open
+    useEffect(() => {
+        if (!isShareModalOpen) return;
+        let cancelled = false;
+        const timer = setTimeout(async () => {
+            try {
+                const page = await userService.searchUsers({ q: userQuery.trim(), limit: 50 });
+                if (!cancelled) setUsers(page.items);
+            } catch (err) {
+                console.error("Failed to load users", err);
+            }
+        }, 250);
+        return () => { cancelled = true; clearTimeout(timer); };
+    }, [isShareModalOpen, userQuery]);
 
     const loadNotes = async () => {
         setLoading(true);
@@ -539,6 +545,13 @@ export default function NotesPage() {
 
                         <div className="flex-1 overflow-y-auto p-8 space-y-4">
                             <p className="text-sm text-slate-500 font-medium">Select staff members to share this note with:</p>
+                            <input
+                                type="text"
+                                placeholder="Search by name, username or email..."
+                                className="w-full px-4 py-3 bg-slate-50 border-2 border-slate-100 rounded-2xl outline-none focus:border-indigo-500 text-sm font-medium"
+                                value={userQuery}
+                                onChange={e => setUserQuery(e.target.value)}
+                            />
                             <div className="space-y-2">
                                 {users.filter(u => u.id !== currentUser).map(user => (
                                     <button
@@ -1,7 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getProjects, getProjectDetails, getProjectWBS, getProjectPayments, createProjectWBS, createProjectTask, createProjectPayment, updateProject, updateProjectPayment, deleteProjectPayment, deleteProjectWBS, deleteProjectTask, updateProjectWBS, updateProjectTask, bulkDeleteProjectTasks, downloadWBSTemplate, importWBSTasks, moveProjectTask, exportWBSTasks } from '../services/projects';
-import { getUsers } from '../services/users';
+import { getProjects, getProjectDetails, getProjectWBS, getProjectPayments, createProjectWBS, createProjectTask, createProjectPayment, updateProject, updateProjectPayment, deleteProjectPayment, deleteProjectWBS, deleteProjectTask, updateProjectWBS, updateProjectTask, bulkDeleteProjectTasks, downloadWBSTemplate, moveProjectTask, exportWBSTasks, getProjectChanges, submitImportJob } from '../services/projects';
+import { waitForJob } from '../services/jobs';
+import { getUserPicker } from '../services/users';
 import {
     Calendar,
     CheckCircle2,
@@ -179,11 +180,16 @@ export default function ProjectWorkspace() {
         due_date: ''
     });
 
+    // Change-feed version the loaded data is at (see syncChanges)
+    const versionRef = useRef(null);
+
     async function loadAllData() {
         if (!selectedProjectId) return;
         setLoading(true);
         setError(null);
         try {
+            // Version first: anything written while loading comes again in the next delta
+            const { version } = await getProjectChanges(selectedProjectId);
             const [p, w, pay] = await Promise.all([
                 getProjectDetails(selectedProjectId),
                 getProjectWBS(selectedProjectId),
@@ -192,6 +198,7 @@ export default function ProjectWorkspace() {
             setProject(p);
             setWbs(w);
             setPayments(pay);
+            versionRef.current = version;
         } catch (err) {
             console.error(err);
             setError("Failed to load project details. Please check your connection or database.");
@@ -200,6 +207,52 @@ export default function ProjectWorkspace() {
         }
     }
 
+    // Apply only what changed since the last load/sync instead of refetching the whole workspace
+    async function syncChanges() {
+        if (versionRef.current === null) return loadAllData();
+        const delta = await getProjectChanges(selectedProjectId, versionRef.current);
+        versionRef.current = delta.version;
+        if (delta.version === delta.since) return;
+
+        const deletedTasks = new Set(delta.deleted.tasks);
+        const deletedPhases = new Set(delta.deleted.phases);
+        const changedTasks = new Set(delta.tasks.map(t => t.id));
+
+        setWbs(prev => {
+            const phases = prev
+                .filter(phase => !deletedPhases.has(phase.id))
+                .map(phase => {
+                    const changed = delta.phases.find(ph => ph.id === phase.id);
+                    return {
+                        ...phase,
+                        ...(changed || {}),
+                        tasks: phase.tasks.filter(t => !deletedTasks.has(t.id) && !changedTasks.has(t.id))
+                    };
+                });
+            delta.phases.forEach(ph => {
+                if (!phases.some(phase => phase.id === ph.id)) {
+                    phases.push({ ...ph, project_id: selectedProjectId, tasks: [] });
+                }
+            });
+            delta.tasks.forEach(t => {
+                const phase = phases.find(ph => ph.id === t.wbs_id);
+                if (phase) phase.tasks.push(t);
+            });
+            phases.forEach(phase => phase.tasks.sort((a, b) => (a.position - b.position) || (a.id - b.id)));
+            return phases;
+        });
+
+        if (delta.payments.length || delta.deleted.payments.length) {
+            const deletedPayments = new Set(delta.deleted.payments);
+            const changedPayments = new Set(delta.payments.map(pay => pay.id));
+            setPayments(prev => [
+                ...prev.filter(pay => !deletedPayments.has(pay.id) && !changedPayments.has(pay.id)),
+                ...delta.payments
+            ].sort((a, b) => new Date(a.planned_date) - new Date(b.planned_date)));
+        }
+        if (delta.metrics) setProject(prev => ({ ...prev, ...delta.metrics }));
+    }
+
     async function loadList() {
         try {
             const role = localStorage.getItem('role');
@@ -229,7 +282,7 @@ export default function ProjectWorkspace() {
     useEffect(() => {
         async function loadUsers() {
             try {
-                const u = await getUsers();
+                const u = await getUserPicker();
                 setUsers(u);
             } catch (err) {
                 console.error(err);
@@ -312,8 +365,7 @@ export default function ProjectWorkspace() {
                 await createProjectPayment(selectedProjectId, payload);
             }
 
-            const pay = await getProjectPayments(selectedProjectId);
-            setPayments(pay);
+            await syncChanges();
             setIsPaymentModalOpen(false);
         } catch (err) {
             alert("Failed to save payment: " + err.message);
@@ -324,7 +376,7 @@ export default function ProjectWorkspace() {
         try {
             const nextStatus = pay.status === 'paid' ? 'unpaid' : 'paid';
             await updateProjectPayment(pay.id, { status: nextStatus });
-            await loadAllData();
+            await syncChanges();
         } catch (err) {
             alert("Failed to update status: " + err.message);
         }
@@ -334,8 +386,7 @@ export default function ProjectWorkspace() {
         if (!confirm("Are you sure you want to delete this payment?")) return;
         try {
             await deleteProjectPayment(paymentId);
-            const pay = await getProjectPayments(selectedProjectId);
-            setPayments(pay);
+            await syncChanges();
         } catch (err) {
             alert("Failed to delete: " + err.message);
         }
@@ -345,8 +396,7 @@ export default function ProjectWorkspace() {
         if (!confirm("Are you sure you want to delete this phase? This will also delete all tasks inside it.")) return;
         try {
             await deleteProjectWBS(wbsId);
-            const w = await getProjectWBS(selectedProjectId);
-            setWbs(w);
+            await syncChanges();
         } catch (err) {
             alert("Failed to delete phase: " + err.message);
         }
@@ -356,8 +406,7 @@ export default function ProjectWorkspace() {
         if (!confirm("Are you sure you want to delete this task?")) return;
         try {
             await deleteProjectTask(taskId);
-            const w = await getProjectWBS(selectedProjectId);
-            setWbs(w);
+            await syncChanges();
         } catch (err) {
             alert("Failed to delete task: " + err.message);
         }
@@ -375,8 +424,7 @@ export default function ProjectWorkspace() {
         if (!wbsFormData.name) return;
         try {
             await updateProjectWBS(selectedWBSItem.id, wbsFormData);
-            const w = await getProjectWBS(selectedProjectId);
-            setWbs(w);
+            await syncChanges();
             setIsEditWBSModalOpen(false);
         } catch (err) {
             alert("Failed to update phase: " + err.message);
@@ -426,7 +474,7 @@ export default function ProjectWorkspace() {
             } else {
                 await createProjectTask(selectedProjectId, payload);
             }
-            await loadAllData();
+            await syncChanges();
             setIsEditTaskModalOpen(false);
         } catch (err) {
             alert("Failed to save task: " + err.message);
@@ -472,8 +520,20 @@ export default function ProjectWorkspace() {
         if (!window.confirm("This will import phases and tasks from the Excel file. Proceed?")) return;
 
         try {
-            const result = await importWBSTasks(selectedProjectId, file);
-            alert(result.message);
+            // Runs as a background job so large workbooks don't hit request timeouts
+            const mode = window.confirm("Update tasks that already exist (matched by Task ID, or phase and task name)?\nCancel adds every row as a new task.") ? 'upsert' : 'append';
+            const job = await submitImportJob(selectedProjectId, file, mode);
+            const { result } = await waitForJob(job.id);
+            const issueLines = (issues, count) => {
+                const lines = (issues || []).slice(0, 10).map(e => `Row ${e.row} (${e.column}): ${e.message}`);
+                if (count > lines.length) lines.push(`...and ${count - lines.length} more`);
+                return lines;
+            };
+            alert([
+                result.message,
+                ...issueLines(result.errors, result.error_count),
+                ...issueLines(result.warnings, result.warning_count)
+            ].join('\n'));
             await loadAllData();
         } catch (err) {
             alert("Failed to import: " + err.message);
@@ -487,7 +547,7 @@ export default function ProjectWorkspace() {
             // Minimal payload to just update status
             await updateProjectTask(taskId, { status: newStatus });
             // Soft refresh to update progress bars and table
-            await loadAllData();
+            await syncChanges();
         } catch (err) {
             alert("Failed to update status: " + err.message);
         }
@@ -496,7 +556,7 @@ export default function ProjectWorkspace() {
     async function handleMoveTask(taskId, direction) {
         try {
             await moveProjectTask(taskId, direction);
-            await loadAllData();
+            await syncChanges();
         } catch (err) {
             alert("Failed to move task: " + err.message);
         }
@@ -509,7 +569,7 @@ export default function ProjectWorkspace() {
         try {
             await bulkDeleteProjectTasks(selectedTaskIds);
             setSelectedTaskIds([]);
-            await loadAllData();
+            await syncChanges();
             alert("Tasks deleted successfully");
         } catch (err) {
             alert("Failed to delete tasks: " + err.message);
@@ -1001,8 +1061,7 @@ export default function ProjectWorkspace() {
                                                     planned_start: new Date(newTaskData.start_date).toISOString(),
                                                     due_date: new Date(newTaskData.end_date).toISOString()
                                                 });
-                                                const w = await getProjectWBS(selectedProjectId);
-                                                setWbs(w);
+                                                await syncChanges();
                                                 setIsTaskModalOpen(false);
                                                 setNewTaskData(prev => ({ ...prev, name: '' })); // Reset name only
                                             }}
@@ -1021,8 +1080,7 @@ export default function ProjectWorkspace() {
                                     const phaseName = prompt("Enter new Phase Name (e.g., 4.0 Testing):");
                                     if (phaseName) {
                                         await createProjectWBS(selectedProjectId, { name: phaseName });
-                                        const w = await getProjectWBS(selectedProjectId);
-                                        setWbs(w);
+                                        await syncChanges();
                                     }
                                 }}
                                 className="flex items-center gap-2 px-3 py-1.5 text-sm font-medium text-slate-600 bg-white border border-slate-300 rounded-lg hover:bg-slate-50 transition-all shadow-sm"
@@ -24,7 +24,9 @@ export default function StaffDashboard() {
     const navigate = useNavigate();
     const [projects, setProjects] = useState([]);
     const [tasks, setTasks] = useState([]);
+    const [pendingTaskCount, setPendingTaskCount] = useState(0);
     const [documents, setDocuments] = useState([]);
+    const [openDocumentCount, setOpenDocumentCount] = useState(0);
     const [loading, setLoading] = useState(true);
     const role = localStorage.getItem('role');
     const fullName = localStorage.getItem('full_name') || 'User';
@@ -50,19 +52,28 @@ export default function StaffDashboard() {
             const projectsRes = await getProjects(isAdmin ? null : userId);
             setProjects(projectsRes);
 
-            // Fetch Tasks
+            // Fetch Tasks (first page of open tasks by due date; total comes from X-Total-Count)
+            const openTasksQuery = 'status=not_started&status=in_progress&status=blocked&limit=5';
             const tasksUrl = isAdmin
-                ? `${API_URL}/tasks/assigned`
-                : `${API_URL}/tasks/assigned?assignee_id=${userId}`;
+                ? `${API_URL}/tasks/assigned?${openTasksQuery}`
+                : `${API_URL}/tasks/assigned?assignee_id=${userId}&${openTasksQuery}`;
             const tasksRes = await fetch(tasksUrl, { headers });
-            if (tasksRes.ok) setTasks(await tasksRes.json());
+            if (tasksRes.ok) {
+                const pageTasks = await tasksRes.json();
+                setTasks(pageTasks);
+                setPendingTaskCount(Number(tasksRes.headers.get('X-Total-Count') ?? pageTasks.length));
+            }
 
-            // Fetch Documents
+            // Fetch open Documents (held by the user unless admin)
             const docsUrl = isAdmin
-                ? `${API_URL}/documents/`
-                : `${API_URL}/documents/?holder=${fullName}`;
+                ? `${API_URL}/documents/list?open_only=true&limit=20`
+                : `${API_URL}/documents/list?mine=true&open_only=true&limit=20`;
             const docsRes = await fetch(docsUrl, { headers });
-            if (docsRes.ok) setDocuments(await docsRes.json());
+            if (docsRes.ok) {
+                const page = await docsRes.json();
+                setDocuments(page.items);
+                setOpenDocumentCount(Object.values(page.status_counts || {}).reduce((sum, n) => sum + n, 0));
+            }
 
         } catch (err) {
             console.error("Dashboard Load Error:", err);
@@ -110,13 +121,13 @@ export default function StaffDashboard() {
                 />
                 <StatCard
                     label={isAdmin ? "System-wide Urgent Tasks" : "Assigned Tasks"}
-                    value={tasks.filter(t => t.status !== 'completed').length}
+                    value={pendingTaskCount}
                     icon={ListTodo}
                     color="bg-amber-50 text-amber-600"
                 />
                 <StatCard
                     label={isAdmin ? "Documents in Transit" : "Documents to Sign"}
-                    value={documents.filter(d => d.status !== 'completed').length}
+                    value={openDocumentCount}
                     icon={FileText}
                     color="bg-purple-50 text-purple-600"
                 />
@@ -201,7 +212,7 @@ export default function StaffDashboard() {
                         <button onClick={() => navigate('/documents')} className="text-xs font-bold text-blue-600 hover:underline">Manage Tracking</button>
                     </div>
                     <div className="divide-y divide-slate-100">
-                        {documents.filter(d => d.status !== 'completed').map(d => (
+                        {documents.map(d => (
                             <div key={d.id} className="p-4 flex items-center justify-between hover:bg-slate-50 transition-colors group">
                                 <div className="flex items-center gap-4">
                                     <div className="w-10 h-10 rounded-lg bg-purple-50 text-purple-600 flex items-center justify-center">
@@ -223,7 +234,7 @@ export default function StaffDashboard() {
                                 </div>
                             </div>
                         ))}
-                        {documents.filter(d => d.status !== 'completed').length === 0 && (
+                        {documents.length === 0 && (
                             <div className="p-12 text-center">
                                 <div className="w-12 h-12 bg-emerald-50 text-emerald-600 rounded-full flex items-center justify-center mx-auto mb-3">
                                     <CheckCircle2 size={24} />
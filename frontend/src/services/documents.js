@@ -19,6 +19,43 @@ export const getDocuments = async (projectId = null) => {
     return response.json();
 };
 
+// One page of documents with their latest log; pass page.next_cursor to get the next one
+export const listDocuments = async ({ cursor = null, projectId = null, limit = 50 } = {}) => {
+    const params = new URLSearchParams({ limit });
+    if (cursor) params.append('cursor', cursor);
+    if (projectId) params.append('project_id', projectId);
+    const response = await fetch(`${API_URL}/documents/list?${params}`, { headers: getHeaders() });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || "Failed to fetch documents");
+    }
+    return response.json();
+};
+
+// Ranked full-text search; each hit carries a snippet with matches wrapped in <mark></mark>
+export const searchDocuments = async (q, { projectId = null, limit = 20 } = {}) => {
+    const params = new URLSearchParams({ q, limit });
+    if (projectId) params.append('project_id', projectId);
+    const response = await fetch(`${API_URL}/documents/search?${params}`, { headers: getHeaders() });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || "Failed to search documents");
+    }
+    return response.json();
+};
+
+export const getDocumentLogs = async (id) => {
+    const response = await fetch(`${API_URL}/documents/${id}/logs`, { headers: getHeaders() });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || "Failed to fetch document history");
+    }
+    return response.json();
+};
+
+// Signatures are served by content hash and cached by the browser
+export const signatureUrl = (signatureHash) => `${API_URL}/documents/signatures/${signatureHash}`;
+
 export const createDocument = async (data) => {
     const response = await fetch(`${API_URL}/documents/`, {
         method: 'POST',
@@ -45,6 +82,20 @@ export const updateDocument = async (id, data) => {
     return response.json();
 };
 
+// Hand several documents to one holder in a single request
+export const transferDocuments = async (documentIds, currentHolder, note = null) => {
+    const response = await fetch(`${API_URL}/documents/transfer`, {
+        method: 'POST',
+        headers: getHeaders(),
+        body: JSON.stringify({ document_ids: documentIds, current_holder: currentHolder, note })
+    });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || "Failed to transfer documents");
+    }
+    return response.json();
+};
+
 export const deleteDocument = async (id) => {
     const response = await fetch(`${API_URL}/documents/${id}`, {
         method: 'DELETE',
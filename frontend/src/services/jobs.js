@@ -0,0 +1,32 @@
+const API_URL = window.location.hostname === 'localhost' ? "http://localhost:8000" : "";
+
+const getHeaders = () => {
+    const token = localStorage.getItem('token');
+    return {
+        "Content-Type": "application/json",
+        "Authorization": `Bearer ${token}`
+    };
+};
+
+export const getJob = async (jobId) => {
+    const response = await fetch(`${API_URL}/jobs/${jobId}`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch job");
+    return response.json();
+};
+
+// Poll a background job until it finishes; resolves with the job, rejects with its error
+export const waitForJob = async (jobId, onProgress = null, intervalMs = 1000) => {
+    while (true) {
+        const job = await getJob(jobId);
+        if (job.status === 'succeeded') return job;
+        if (job.status === 'failed') throw new Error(job.error || "Job failed");
+        if (onProgress) onProgress(job);
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+};
+
+export const downloadJobResult = async (jobId) => {
+    const response = await fetch(`${API_URL}/jobs/${jobId}/download`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to download job result");
+    return response.blob();
+};
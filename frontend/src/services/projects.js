@@ -162,8 +162,27 @@ export const updateProjectTask = async (taskId, data) => {
     return response.json();
 };
 
-export const downloadWBSTemplate = async () => {
-    const response = await fetch(`${API_URL}/tasks/template`, {
+export const submitImportJob = async (projectId, file, mode = 'append') => {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch(`${API_URL}/projects/${projectId}/tasks/import/jobs?mode=${mode}`, {
+        method: 'POST',
+        headers: {
+            "Authorization": `Bearer ${localStorage.getItem('token')}`
+        },
+        body: formData
+    });
+    if (!response.ok) {
+        const err = await response.json();
+        throw new Error(err.detail || "Failed to queue import");
+    }
+    return response.json();
+};
+
+export const downloadWBSTemplate = async (departmentId = null) => {
+    const query = departmentId ? `?department_id=${departmentId}` : '';
+    const response = await fetch(`${API_URL}/tasks/template${query}`, {
         headers: {
             "Authorization": `Bearer ${localStorage.getItem('token')}`
         }
@@ -200,8 +219,8 @@ export const moveProjectTask = async (taskId, direction) => {
     return response.json();
 };
 
-export const exportWBSTasks = async (projectId) => {
-    const response = await fetch(`${API_URL}/projects/${projectId}/tasks/export`, {
+export const exportWBSTasks = async (projectId, format = 'xlsx') => {
+    const response = await fetch(`${API_URL}/projects/${projectId}/tasks/export?format=${format}`, {
         headers: {
             "Authorization": `Bearer ${localStorage.getItem('token')}`
         }
@@ -209,3 +228,114 @@ export const exportWBSTasks = async (projectId) => {
     if (!response.ok) throw new Error("Failed to export tasks");
     return response.blob();
 };
+
+export const reorderPhaseTasks = async (wbsId, items) => {
+    const response = await fetch(`${API_URL}/wbs/${wbsId}/tasks/reorder`, {
+        method: 'PUT',
+        headers: getHeaders(),
+        body: JSON.stringify({ items })
+    });
+    if (!response.ok) {
+        const err = await response.json().catch(() => ({}));
+        throw new Error(err.detail || "Failed to reorder tasks");
+    }
+    return response.json();
+};
+
+export const getProjectWBSTree = async (id, maxDepth = null) => {
+    let url = `${API_URL}/projects/${id}/wbs/tree`;
+    if (maxDepth !== null) url += `?max_depth=${maxDepth}`;
+
+    const response = await fetch(url, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch WBS tree");
+    return response.json();
+};
+
+export const moveTaskToPhase = async (taskId, wbsId) => {
+    const response = await fetch(`${API_URL}/tasks/${taskId}/phase`, {
+        method: 'PUT',
+        headers: getHeaders(),
+        body: JSON.stringify({ wbs_id: wbsId })
+    });
+    if (!response.ok) throw new Error("Failed to move task to phase");
+    return response.json();
+};
+
+export const updateTaskSubtreeStatus = async (taskId, status) => {
+    const response = await fetch(`${API_URL}/tasks/${taskId}/subtree/status`, {
+        method: 'PUT',
+        headers: getHeaders(),
+        body: JSON.stringify({ status })
+    });
+    if (!response.ok) throw new Error("Failed to update task status");
+    return response.json();
+};
+
+export const getTaskSubtreeCount = async (taskId) => {
+    const response = await fetch(`${API_URL}/tasks/${taskId}/subtree/count`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to count sub-tasks");
+    return response.json();
+};
+
+export const bulkUpdateProjectTasks = async (taskIds, data) => {
+    const response = await fetch(`${API_URL}/tasks`, {
+        method: 'PATCH',
+        headers: getHeaders(),
+        body: JSON.stringify({ ids: taskIds, update: data })
+    });
+    if (!response.ok) throw new Error("Failed to update tasks");
+    return response.json();
+};
+
+export const getProjectDependencies = async (projectId) => {
+    const response = await fetch(`${API_URL}/projects/${projectId}/dependencies`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch dependencies");
+    return response.json();
+};
+
+export const createTaskDependency = async (projectId, data) => {
+    const response = await fetch(`${API_URL}/projects/${projectId}/dependencies`, {
+        method: 'POST',
+        headers: getHeaders(),
+        body: JSON.stringify(data)
+    });
+    if (!response.ok) {
+        const err = await response.json().catch(() => ({}));
+        throw new Error(err.detail || "Failed to create dependency");
+    }
+    return response.json();
+};
+
+export const deleteTaskDependency = async (dependencyId) => {
+    const response = await fetch(`${API_URL}/dependencies/${dependencyId}`, {
+        method: 'DELETE',
+        headers: getHeaders()
+    });
+    if (!response.ok) throw new Error("Failed to delete dependency");
+    return response.json();
+};
+
+export const getProjectSchedule = async (projectId) => {
+    const response = await fetch(`${API_URL}/projects/${projectId}/schedule`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch schedule");
+    return response.json();
+};
+
+export const getProjectGantt = async (projectId) => {
+    const response = await fetch(`${API_URL}/projects/${projectId}/gantt`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch gantt data");
+    return response.json();
+};
+
+export const getProjectProgress = async (projectId) => {
+    const response = await fetch(`${API_URL}/projects/${projectId}/progress`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch progress");
+    return response.json();
+};
+
+export const getProjectChanges = async (projectId, since = null) => {
+    const query = since === null ? '' : `?since=${since}`;
+    const response = await fetch(`${API_URL}/projects/${projectId}/changes${query}`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to fetch project changes");
+    return response.json();
+};
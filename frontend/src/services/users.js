@@ -8,6 +8,30 @@ const getHeaders = () => {
     };
 };
 
+// One page of users matching q (prefix of name, username or email); compact gives {id, full_name} only
+export const searchUsers = async ({ q = '', role = null, departmentId = null, compact = false, cursor = null, limit = 20 } = {}) => {
+    const params = new URLSearchParams({ limit, compact });
+    if (q) params.append('q', q);
+    if (role) params.append('role', role);
+    if (departmentId) params.append('department_id', departmentId);
+    if (cursor) params.append('cursor', cursor);
+    const response = await fetch(`${API_URL}/users/search?${params}`, { headers: getHeaders() });
+    if (!response.ok) throw new Error("Failed to search users");
+    return response.json();
+};
+
+// Every user as {id, full_name}, for select-style pickers
+export const getUserPicker = async () => {
+    const users = [];
+    let cursor = null;
+    do {
+        const page = await searchUsers({ compact: true, cursor, limit: 100 });
+        users.push(...page.items);
+        cursor = page.next_cursor;
+    } while (cursor);
+    return users;
+};
+
 export const getUsers = async () => {
     const response = await fetch(`${API_URL}/users/`, {
         headers: getHeaders()